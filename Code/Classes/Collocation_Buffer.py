@@ -0,0 +1,125 @@
+import  numpy;
+import  torch;
+
+from    Points  import Generate_Points;
+
+
+
+class Collocation_Buffer():
+    """
+    Objects of this class house a fixed-size set of collocation points for one
+    data set. We allocate the set once (on the training device) and then
+    refresh it in place: each call to Refresh replaces some of the points with
+    new random points. We replace the points in a rotating order (the oldest
+    points first), so if we replace a fraction f of the points each time,
+    each point lives for about 1/f refreshes.
+
+    Reusing the same memory avoids allocating a new set of points (and the
+    corresponding autograd bookkeeping) every epoch. If we only replace some
+    of the points, we also draw fewer random numbers. Finally, if we never
+    refresh a set (or refresh it rarely), the losses on that set are directly
+    comparable between epochs (this is useful for the testing set).
+
+    ----------------------------------------------------------------------------
+    Members:
+
+    Points : A Num_Points by n tensor whose rows hold the collocation points.
+    Refresh overwrites this tensor's rows in place; it never allocates a new
+    one.
+
+    Bounds : The rectangle that the points live in (see Generate_Points).
+
+    Refresh_Fraction : The fraction of the points that each call to Refresh
+    replaces. This should be in [0, 1].
+
+    Sampler : The sampler we use to draw new points (see Generate_Points).
+    Note that if we only replace some of the points, the low-discrepancy and
+    stratified samplers only spread out the new points (not the whole set).
+    """
+
+    def __init__(   self,
+                    Bounds              : numpy.ndarray,
+                    Num_Points          : int,
+                    Refresh_Fraction    : float             = 1.0,
+                    Sampler             : str               = "Uniform",
+                    Device              : torch.device      = torch.device('cpu'),
+                    Generator           : torch.Generator   = None) -> None:
+        """
+        Initializer. This draws the initial set of points.
+
+        ------------------------------------------------------------------------
+        Arguments:
+
+        Bounds, Refresh_Fraction, Sampler : See the class doc string.
+
+        Num_Points : The number of points in the set.
+
+        Device : The device that the points live on.
+
+        Generator : The random number generator we use to draw the points (see
+        Generate_Points).
+        """
+
+        assert(Num_Points >= 0);
+        assert(Refresh_Fraction >= 0 and Refresh_Fraction <= 1);
+
+        self.Bounds             : numpy.ndarray = Bounds;
+        self.Refresh_Fraction   : float         = Refresh_Fraction;
+        self.Sampler            : str           = Sampler;
+        self.Device             : torch.device  = Device;
+
+        self.Points             : torch.Tensor  = Generate_Points(  Bounds      = Bounds,
+                                                                    Num_Points  = Num_Points,
+                                                                    Device      = Device,
+                                                                    Generator   = Generator,
+                                                                    Sampler     = Sampler);
+
+        # The index of the oldest row (the first row that the next call to
+        # Refresh replaces).
+        self._Next              : int           = 0;
+
+
+
+    def Refresh(self, Generator : torch.Generator = None, Fraction : float = None) -> int:
+        """
+        This function replaces the oldest Fraction*Num_Points points with new
+        random points, in place.
+
+        ------------------------------------------------------------------------
+        Arguments:
+
+        Generator : The random number generator we use to draw the new points
+        (see Generate_Points).
+
+        Fraction : The fraction of the points we replace. If None, we use
+        Refresh_Fraction.
+
+        ------------------------------------------------------------------------
+        Returns:
+
+        The number of points we replaced.
+        """
+
+        if(Fraction is None):
+            Fraction = self.Refresh_Fraction;
+
+        Num_Points  : int = self.Points.shape[0];
+        Num_Refresh : int = min(int(round(Fraction*Num_Points)), Num_Points);
+        if(Num_Refresh == 0):
+            return 0;
+
+        New_Points : torch.Tensor = Generate_Points(Bounds      = self.Bounds,
+                                                    Num_Points  = Num_Refresh,
+                                                    Device      = self.Device,
+                                                    Generator   = Generator,
+                                                    Sampler     = self.Sampler);
+
+        # Overwrite the oldest rows. We wrap around the end of the buffer.
+        with torch.no_grad():
+            First_Part : int = min(Num_Refresh, Num_Points - self._Next);
+            self.Points[self._Next:(self._Next + First_Part), :].copy_(New_Points[:First_Part, :]);
+            if(First_Part < Num_Refresh):
+                self.Points[:(Num_Refresh - First_Part), :].copy_(New_Points[First_Part:, :]);
+
+        self._Next = (self._Next + Num_Refresh) % Num_Points;
+        return Num_Refresh;
@@ -132,7 +132,7 @@ class Derivative():
 
         # Assuming self.Encoding is longer than D.Encoding, make sure that the
         # components of self.Encoding after the l'th are zero.
-        for k in range(l + 1, n):
+        for k in range(l, n):
             if(self.Encoding[k] != 0):
                 return False;
 
@@ -0,0 +1,442 @@
+import  numpy;
+import  torch;
+import  time;
+from    typing      import List, Dict, Tuple, Callable;
+
+from    Derivative  import Derivative;
+from    Term        import Term;
+
+
+
+class Library_Matrix():
+    """
+    Objects of this class house a "compiled" version of the library. Recall
+    that we try to learn a PDE of the form
+            T_0(U) = Xi_1*T_1(U) + ... + Xi_N*T_N(U),
+    where each T_j is a term of the form
+            T_j(U) = (D_1 U)^{p(j, 1)} ... (D_m U)^{p(j, m)}.
+    Here, D_1, ... , D_m are the distinct derivatives that appear anywhere in
+    the library and p(j, k) is a non-negative integer (p(j, k) = 0 if D_k does
+    not appear in T_j). Thus, we can represent the RHS terms as an N by m
+    matrix of integer exponents, and the LHS term as an m element vector of
+    exponents.
+
+    Many terms share the same "factors" (a derivative raised to a power). For
+    example, U^2 might appear in half of the RHS terms. We compute each
+    distinct factor once (using a Power_Cache), stack the factors into a
+    B by F matrix, and then build the B by N library matrix (whose i, j entry
+    holds T_j(U) at the ith point) by gathering each term's factors and
+    multiplying them together. This takes a handful of tensor operations,
+    rather than one operation per sub-term.
+
+    ----------------------------------------------------------------------------
+    Members:
+
+    Derivatives : The list of derivatives D_1, ... , D_m.
+
+    Columns : A dictionary which maps the (tuple of the) Encoding of D_k to k.
+
+    LHS_Exponents : An m element integer tensor whose kth entry holds the power
+    of D_k U in the LHS term.
+
+    RHS_Exponents : An N by m integer tensor whose j, k entry holds the power of
+    D_k U in the jth RHS term.
+
+    Max_Power : The largest element of LHS_Exponents and RHS_Exponents.
+
+    Mask : An N element boolean tensor (on the CPU). If Mask[j] is True, the 
+    jth RHS term is masked (see Set_Mask).
+
+    Active_Terms : A list housing the indices of the un-masked RHS terms, in 
+    increasing order. We only evaluate these terms.
+
+    Active_Indices : A tensor version of Active_Terms (on the library's 
+    device).
+
+    Factors : A list of the distinct (derivative index, power) pairs, with
+    power >= 1, that appear in the LHS term or an active RHS term, sorted by
+    derivative index and then by power.
+
+    Required_Derivatives : A list housing the derivatives that appear in at 
+    least one factor (in the same order as Derivatives). These are the only
+    derivatives we need to compute. If we mask every term that uses D_x^3 U, 
+    for example, we do not need D_x^3 U. Build the derivative plan from this
+    list (the plan computes any intermediate derivatives it needs).
+
+    Compiled : True if we have compiled the residual (see Compile), and False
+    otherwise.
+    """
+
+    def __init__(   self,
+                    Derivatives : List[Derivative],
+                    LHS_Term    : Term,
+                    RHS_Terms   : List[Term],
+                    Device      : torch.device = torch.device('cpu')) -> None:
+        """
+        Initializer.
+
+        ------------------------------------------------------------------------
+        Arguments:
+
+        Derivatives : A list housing every derivative that appears in the LHS
+        or RHS terms (see Read_Library).
+
+        LHS_Term, RHS_Terms : The LHS and RHS terms of the library.
+
+        Device : The device we evaluate the library on.
+        """
+
+        self.Derivatives    : List[Derivative]  = Derivatives;
+        self.Columns        : Dict[Tuple, int]  = {};
+        for k in range(len(Derivatives)):
+            self.Columns[tuple(Derivatives[k].Encoding)] = k;
+
+        Num_Derivatives : int = len(Derivatives);
+        Num_RHS_Terms   : int = len(RHS_Terms);
+
+        # Build the exponent arrays. If a derivative appears in more than one
+        # of a term's sub-terms, we add the powers.
+        LHS_Exponents : numpy.ndarray = self._Exponents(LHS_Term);
+        RHS_Exponents : numpy.ndarray = numpy.zeros((Num_RHS_Terms, Num_Derivatives), dtype = numpy.int64);
+        for j in range(Num_RHS_Terms):
+            RHS_Exponents[j, :] = self._Exponents(RHS_Terms[j]);
+
+        self.LHS_Exponents  : torch.Tensor = torch.from_numpy(LHS_Exponents).to(device = Device);
+        self.RHS_Exponents  : torch.Tensor = torch.from_numpy(RHS_Exponents).to(device = Device);
+        self.Max_Power      : int          = int(max(numpy.max(LHS_Exponents, initial = 0), numpy.max(RHS_Exponents, initial = 0)));
+
+        # We have not compiled the residual (yet).
+        self.Compiled               : bool      = False;
+        self._Compiled_Residual     : Callable  = None;
+
+        # Initially, every term is active.
+        self.Mask : torch.Tensor = None;
+        self.Set_Mask(torch.zeros(Num_RHS_Terms, dtype = torch.bool));
+
+
+
+    def Set_Mask(self, Mask : torch.Tensor) -> None:
+        """
+        This function sets the library's mask. Masked RHS terms have no impact 
+        on the residual, so there is no reason to evaluate them. Thus, we 
+        compact the library to the active (un-masked) terms: we find the 
+        factors that the LHS term and the active RHS terms need, and only 
+        evaluate those factors and terms. 
+
+        Compacting the library requires a little work, so we only do it when 
+        the mask changes. If Mask matches the current mask, this function 
+        does nothing. Call this function whenever the mask changes (main calls
+        it once, after it builds the mask). Coll_Loss does not call it for a 
+        library that we pass in, since comparing the masks would force a host
+        sync every time we evaluate the loss.
+
+        ------------------------------------------------------------------------
+        Arguments:
+
+        Mask : An N element boolean tensor. If Mask[j] is True, we ignore the
+        jth RHS term.
+        """
+
+        Mask = Mask.detach().to(device = 'cpu', dtype = torch.bool);
+        if(self.Mask is not None and torch.equal(Mask, self.Mask)):
+            return;
+
+        self.Mask           : torch.Tensor  = Mask.clone();
+        self.Active_Terms   : List[int]     = [j for j in range(Mask.numel()) if Mask[j].item() == False];
+
+        Device          : torch.device      = self.LHS_Exponents.device;
+        LHS_Exponents   : numpy.ndarray     = self.LHS_Exponents.cpu().numpy();
+        RHS_Exponents   : numpy.ndarray     = self.RHS_Exponents.cpu().numpy()[self.Active_Terms, :];
+        Num_Derivatives : int               = len(self.Derivatives);
+        Num_Active      : int               = len(self.Active_Terms);
+
+        self.Active_Indices : torch.Tensor  = torch.tensor(self.Active_Terms, dtype = torch.int64, device = Device);
+
+        # Find the distinct factors. We sort them so that, for each derivative,
+        # we request low powers before high ones (the Power_Cache builds high 
+        # powers from low ones).
+        Factor_Set : set = set();
+        for k in range(Num_Derivatives):
+            if(LHS_Exponents[k] > 0):
+                Factor_Set.add((k, int(LHS_Exponents[k])));
+            for j in range(Num_Active):
+                if(RHS_Exponents[j, k] > 0):
+                    Factor_Set.add((k, int(RHS_Exponents[j, k])));
+        self.Factors : List[Tuple[int, int]] = sorted(Factor_Set);
+
+        # Find the derivatives that the factors use. If there are no factors
+        # (which only happens if every term is constant), we still evaluate U.
+        Required_Indices : List[int] = sorted(set([k for (k, p) in self.Factors]));
+        if(len(Required_Indices) == 0):
+            Required_Indices = [0];
+        self.Required_Derivatives : List[Derivative] = [self.Derivatives[k] for k in Required_Indices];
+
+        # _Residual only gets the required derivatives, so it needs to know 
+        # where each factor's derivative is among them.
+        self._Required_Factors : List[Tuple[int, int]] = [(Required_Indices.index(k), p) for (k, p) in self.Factors];
+
+        # Now, for each term, make a list of the indices of its factors. 
+        # Column 0 of the factor matrix (see Evaluate) is a column of ones. We 
+        # use it to pad the lists of terms with fewer factors.
+        Factor_Index    : Dict[Tuple[int, int], int] = {};
+        for f in range(len(self.Factors)):
+            Factor_Index[self.Factors[f]] = f + 1;
+
+        LHS_Factor_List : List[int]         = [Factor_Index[(k, int(LHS_Exponents[k]))] for k in range(Num_Derivatives) if LHS_Exponents[k] > 0];
+        RHS_Factor_List : List[List[int]]   = [];
+        for j in range(Num_Active):
+            RHS_Factor_List.append([Factor_Index[(k, int(RHS_Exponents[j, k]))] for k in range(Num_Derivatives) if RHS_Exponents[j, k] > 0]);
+
+        Max_Factors : int = max([len(LHS_Factor_List)] + [len(Factor_List) for Factor_List in RHS_Factor_List]);
+        Max_Factors       = max(Max_Factors, 1);
+
+        LHS_Factor_Indices : numpy.ndarray = numpy.zeros(Max_Factors,               dtype = numpy.int64);
+        RHS_Factor_Indices : numpy.ndarray = numpy.zeros((Num_Active, Max_Factors), dtype = numpy.int64);
+        LHS_Factor_Indices[:len(LHS_Factor_List)] = LHS_Factor_List;
+        for j in range(Num_Active):
+            RHS_Factor_Indices[j, :len(RHS_Factor_List[j])] = RHS_Factor_List[j];
+
+        self._LHS_Factor_Indices : torch.Tensor = torch.from_numpy(LHS_Factor_Indices).to(device = Device);
+        self._RHS_Factor_Indices : torch.Tensor = torch.from_numpy(RHS_Factor_Indices).to(device = Device);
+
+
+
+    def _Exponents(self, T : Term) -> numpy.ndarray:
+        """
+        This function returns an m element array whose kth entry holds the
+        power of D_k U in the term T.
+        """
+
+        Exponents : numpy.ndarray = numpy.zeros(len(self.Derivatives), dtype = numpy.int64);
+        for i in range(T.Num_Sub_Terms):
+            k : int = self.Columns[tuple(T.Derivatives[i].Encoding)];
+            Exponents[k] += T.Powers[i];
+
+        return Exponents;
+
+
+
+    def Evaluate(self, Cache : "Power_Cache") -> Tuple[torch.Tensor, torch.Tensor]:
+        """
+        This function evaluates the LHS and RHS terms.
+
+        ------------------------------------------------------------------------
+        Arguments:
+
+        Cache : A Power_Cache built from the derivatives of U at B collocation
+        points. We fetch every factor from this cache.
+
+        ------------------------------------------------------------------------
+        Returns:
+
+        A tuple. The first entry is a B element tensor holding T_0(U) at each
+        point. The second is the B by N_A active library matrix (where N_A is 
+        the number of active terms), whose i, j entry holds T_k(U) at the ith 
+        point, where k = Active_Terms[j]. If no terms are masked, this is the 
+        full library matrix.
+        """
+
+        # Build the B by (F + 1) factor matrix. Column 0 is a column of ones; 
+        # column f holds the (f - 1)th factor.
+        Factor_Columns : List[torch.Tensor] = [];
+        for (k, p) in self.Factors:
+            Factor_Columns.append(Cache.Get(Encoding = tuple(self.Derivatives[k].Encoding), Power = p));
+
+        if(len(Factor_Columns) == 0):
+            Factor_Columns.append(Cache.Get(Encoding = tuple(self.Derivatives[0].Encoding), Power = 1));
+        Ones    : torch.Tensor = torch.ones_like(Factor_Columns[0]);
+        Factors : torch.Tensor = torch.stack([Ones] + Factor_Columns, dim = 1);
+
+        # Now gather each term's factors and multiply them together. 
+        # Factors[:, RHS_Factor_Indices] is a B by N by (max factors per term)
+        # tensor whose i, j, l entry holds the lth factor of the jth term at the
+        # ith point.
+        LHS_U   : torch.Tensor = torch.prod(Factors[:, self._LHS_Factor_Indices], dim = 1);
+        RHS_U   : torch.Tensor = torch.prod(Factors[:, self._RHS_Factor_Indices], dim = 2);
+
+        return (LHS_U, RHS_U);
+
+
+
+    def _Residual(  self,
+                    D_U         : torch.Tensor,
+                    Active_Xi   : torch.Tensor) -> torch.Tensor:
+        """
+        This function evaluates the PDE residual, b(U) - L(U)Xi (see 
+        Coll_Loss), from the derivatives of U. It does the same thing as 
+        Evaluate (followed by the matrix-vector product), but only uses tensor
+        operations, and does not use a Power_Cache. This makes it suitable for
+        torch.compile (see Compile).
+
+        ------------------------------------------------------------------------
+        Arguments:
+
+        D_U : A B by m_R tensor whose i, k entry holds the kth required 
+        derivative of U at the ith point (see Required_Derivatives).
+
+        Active_Xi : An N_A element tensor holding the active RHS terms' 
+        coefficients (see Set_Mask).
+
+        ------------------------------------------------------------------------
+        Returns:
+
+        A B element tensor whose ith entry holds the residual at the ith point.
+        """
+
+        # Build the factor matrix (see Evaluate). 
+        Factor_Columns  : List[torch.Tensor] = [torch.ones_like(D_U[:, 0])];
+        for (k, p) in self._Required_Factors:
+            Factor_Columns.append(torch.pow(D_U[:, k], p));
+        Factors         : torch.Tensor = torch.stack(Factor_Columns, dim = 1);
+
+        # Evaluate the terms, then the residual.
+        LHS_U   : torch.Tensor = torch.prod(Factors[:, self._LHS_Factor_Indices], dim = 1);
+        RHS_U   : torch.Tensor = torch.prod(Factors[:, self._RHS_Factor_Indices], dim = 2);
+
+        return torch.subtract(LHS_U, torch.matmul(RHS_U, Active_Xi));
+
+
+
+    def Compile(self) -> float:
+        """
+        This function compiles the residual (see _Residual) using 
+        torch.compile. The compiled residual fuses the library's element-wise 
+        arithmetic (the powers, products, and the subtraction) into a few 
+        kernels. Since the library does not change during training, we only 
+        need to compile once. We compile for a variable number of points, so 
+        changing the number of collocation points does not trigger a 
+        re-compile. Changing the mask (see Set_Mask) does trigger a 
+        re-compile, but masks rarely change.
+
+        Compilation happens the first time we evaluate the compiled function. 
+        To make sure that happens here (rather than during the first epoch), 
+        we evaluate the compiled residual, and its gradient, on some random 
+        points. If this fails (for example, because there is no C++ compiler), 
+        we fall back on the un-compiled residual.
+
+        ------------------------------------------------------------------------
+        Returns:
+
+        The number of seconds that compilation took.
+        """
+
+        Timer   : float         = time.perf_counter();
+        Device  : torch.device  = self.LHS_Exponents.device;
+
+        # Make up some inputs.
+        Num_Derivatives : int           = len(self.Required_Derivatives);
+        D_U             : torch.Tensor  = torch.rand((16, Num_Derivatives), dtype = torch.float32, device = Device, requires_grad = True);
+        Active_Xi       : torch.Tensor  = torch.rand(len(self.Active_Terms), dtype = torch.float32, device = Device, requires_grad = True);
+
+        try:
+            Compiled_Residual : Callable = torch.compile(self._Residual, dynamic = True);
+            torch.sum(Compiled_Residual(D_U, Active_Xi)).backward();
+        except Exception as Error:
+            print("Could not compile the residual; using the un-compiled residual. Error: %s" % str(Error).split('\n')[0]);
+            self.Compiled           = False;
+            self._Compiled_Residual = None;
+        else:
+            self.Compiled           = True;
+            self._Compiled_Residual = Compiled_Residual;
+
+        return time.perf_counter() - Timer;
+
+
+
+    def Residual(   self,
+                    D_U_Dict    : Dict[Tuple, torch.Tensor],
+                    Xi          : torch.Tensor) -> torch.Tensor:
+        """
+        This function evaluates the PDE residual, b(U) - L(U)Xi, using the 
+        compiled residual (see Compile). You should only call this function 
+        if Compiled is True.
+
+        ------------------------------------------------------------------------
+        Arguments:
+
+        D_U_Dict : A dictionary which maps the (tuple of the) Encoding of each
+        derivative to a 1D tensor holding D U at each point (see Power_Cache). 
+        This must include every required derivative.
+
+        Xi : An N element tensor holding the RHS terms' coefficients. We 
+        ignore the masked ones (see Set_Mask).
+
+        ------------------------------------------------------------------------
+        Returns:
+
+        A 1D tensor whose ith entry holds the residual at the ith point.
+        """
+
+        assert(self.Compiled == True);
+
+        D_U : torch.Tensor = torch.stack([D_U_Dict[tuple(D.Encoding)] for D in self.Required_Derivatives], dim = 1);
+        return self._Compiled_Residual(D_U, Xi[self.Active_Indices]);
+
+
+
+class Power_Cache():
+    """
+    Objects of this class memoize powers of derivatives of U at a batch of 
+    collocation points. The cache maps (Encoding, Power) pairs to 
+    (D U)^Power, where D is the derivative with the corresponding Encoding. 
+    We build each new power from the powers that are already in the cache 
+    using multiplication. For example, once we know U and U^2, we get U^3 using
+    a single multiplication, and U^4 with another. The LHS and every RHS term 
+    share one cache, so we compute each distinct factor once per batch.
+
+    ----------------------------------------------------------------------------
+    Members:
+
+    Hits : The number of requests which the cache could answer directly.
+
+    Misses : The number of requests which required a new multiplication.
+    """
+
+    def __init__(self, D_U_Dict : Dict[Tuple, torch.Tensor]) -> None:
+        """
+        Initializer.
+
+        ------------------------------------------------------------------------
+        Arguments:
+
+        D_U_Dict : A dictionary which maps the (tuple of the) Encoding of each
+        derivative D to a 1D tensor holding D U at each point in the batch (a 
+        Derivative_Plan returns such a dictionary).
+        """
+
+        self.Hits   : int = 0;
+        self.Misses : int = 0;
+
+        # The first power of each derivative is already known.
+        self._Powers : Dict[Tuple, Dict[int, torch.Tensor]] = {};
+        for (Encoding, D_U) in D_U_Dict.items():
+            self._Powers[tuple(Encoding)] = {1 : D_U};
+
+
+
+    def Get(self, Encoding : Tuple, Power : int) -> torch.Tensor:
+        """
+        This function returns (D U)^Power, where D is the derivative whose 
+        Encoding is Encoding. Power must be a positive integer.
+        """
+
+        assert(Power >= 1);
+        Powers : Dict[int, torch.Tensor] = self._Powers[Encoding];
+
+        if(Power in Powers):
+            self.Hits += 1;
+            return Powers[Power];
+
+        # Find the largest power of D U below Power that we already know (q;
+        # we always know (D U)^1), then build the requested power as 
+        # (D U)^q * (D U)^(Power - q). We get the second factor from this
+        # function as well, so if it is not in the cache, we build it (and 
+        # cache it) the same way. Since q >= 1, Power - q < Power, so this
+        # ends. Note that Power - q can be larger than q (e.g., if we only 
+        # know (D U)^1 and want (D U)^3), in which case we build the powers in
+        # between as well.
+        self.Misses += 1;
+        q : int = max([Known for Known in Powers.keys() if Known < Power]);
+
+        Powers[Power] = torch.multiply(Powers[q], self.Get(Encoding = Encoding, Power = Power - q));
+        return Powers[Power];
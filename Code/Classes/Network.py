@@ -1,6 +1,13 @@
 import  torch;
 import  math;
-from    typing  import Dict, List;
+import  contextlib;
+from    typing  import Dict, List, Tuple, Iterator;
+
+
+
+# If False, _Rational evaluates rational activations using ordinary torch 
+# operations rather than Rational_Function (see Unfused_Rational).
+_Use_Rational_Function : bool = True;
 
 
 
@@ -46,20 +53,178 @@ class Rational(torch.nn.Module):
         to each element of X and returns the resulting tensor. 
         """
 
-        # Create aliases for self.a and self.b. This makes the code cleaner.
-        a = self.a;
-        b = self.b;
+        return _Rational(X = X, a = self.a, b = self.b);
+
+
+
+def _Rational(X : torch.Tensor, a : torch.Tensor, b : torch.Tensor) -> torch.Tensor:
+    """
+    This function applies the rational function with coefficients a and b to 
+    each element of X (see Rational_Function). Usually, we use 
+    Rational_Function, which evaluates R in one go and only saves what it 
+    needs to differentiate R. Inside an Unfused_Rational block, we evaluate R
+    using ordinary torch operations instead.
+    """
+
+    if(_Use_Rational_Function == False):
+        N_X = a[0] + X*(a[1] + X*(a[2] + a[3]*X));
+        D_X = b[0] + X*(b[1] + b[2]*X);
+        return torch.div(N_X, D_X);
+
+    return Rational_Function.apply(X, a, b);
+
+
+
+@contextlib.contextmanager
+def Unfused_Rational() -> Iterator[None]:
+    """
+    Inside a "with Unfused_Rational():" block, rational activations use 
+    ordinary torch operations rather than Rational_Function. 
+    
+    Use this when nesting torch.func.jvp calls (the forward derivative backend
+    does this). torch.func runs an autograd.Function's jvp method with the 
+    enclosing transforms turned off, so the inner jvp's result does not depend
+    on the outer jvp's tangent, and second and higher order derivatives come 
+    out as zero. A single jvp (or vmap) through Rational_Function is fine.
+    """
+
+    global _Use_Rational_Function;
+    Previous : bool = _Use_Rational_Function;
+    _Use_Rational_Function = False;
+    try:
+        yield;
+    finally:
+        _Use_Rational_Function = Previous;
+
+
+
+class Rational_Function(torch.autograd.Function):
+    """
+    This class applies a rational function, R(x) = N(x)/D(x), where
+            N(x) = a_0 + a_1 x + a_2 x^2 + a_3 x^3,
+            D(x) = b_0 + b_1 x + b_2 x^2,
+    to each element of a tensor, X. We could evaluate R using ordinary torch
+    operations (as we used to). However, autograd would then record about ten
+    element-wise operations (and save most of their inputs), each of which we
+    would have to differentiate up to four times when we compute derivatives
+    of U. Instead, we record R as a single operation and give autograd 
+    closed-form expressions for its derivatives:
+            dR/dx   = (N'(x) - R(x) D'(x))/D(x),
+            dR/da_j =  x^j/D(x),
+            dR/db_j = -R(x) x^j/D(x).
+    
+    The backward and jvp methods evaluate these using ordinary (differentiable)
+    torch operations. Thus, autograd can differentiate them, which means that 
+    higher order derivatives (double-backward, nested jvps, etc) still work.
+
+    The coefficients can be batched: a and b can have shapes 4 by S and 3 by
+    S, so long as a[j] and b[j] broadcast with X (the ensemble uses this).
+
+    Since forward is separate from setup_context, this class also works with
+    torch.func's transforms. We let torch generate the vmap rule (forward only
+    uses element-wise operations). Nested jvps do not work, however (see 
+    Unfused_Rational).
+    """
+
+    generate_vmap_rule = True;
+
+    @staticmethod
+    def forward(X : torch.Tensor, a : torch.Tensor, b : torch.Tensor) -> torch.Tensor:
+        """
+        This function returns R(X), which it evaluates element-wise using 
+        Horner's method.
+        """
 
-        # Evaluate the numerator and denominator. Because of how the * and +
-        # operators work, this gets applied element-wise.
         N_X = a[0] + X*(a[1] + X*(a[2] + a[3]*X));
         D_X = b[0] + X*(b[1] + b[2]*X);
 
-        # Return R = N_X/D_X. This is also applied element-wise.
         return torch.div(N_X, D_X);
 
 
 
+    @staticmethod
+    def setup_context(ctx, inputs : Tuple[torch.Tensor], output : torch.Tensor) -> None:
+        """
+        This function saves X, a, b, and R(X). We need these to evaluate R's
+        derivatives (in backward and jvp). 
+        """
+
+        X, a, b = inputs;
+        ctx.save_for_backward(X, a, b, output);
+        ctx.save_for_forward( X, a, b, output);
+
+
+
+    @staticmethod
+    def _Derivatives(X : torch.Tensor, a : torch.Tensor, b : torch.Tensor, R_X : torch.Tensor) -> Tuple[torch.Tensor]:
+        """
+        This function returns 1/D(X) and R'(X).
+        """
+
+        Inv_D_X     : torch.Tensor = torch.reciprocal(b[0] + X*(b[1] + b[2]*X));
+        dN_X        : torch.Tensor = a[1] + X*(2*a[2] + 3*a[3]*X);
+        dD_X        : torch.Tensor = b[1] + 2*b[2]*X;
+
+        return (Inv_D_X, (dN_X - R_X*dD_X)*Inv_D_X);
+
+
+
+    @staticmethod
+    def backward(ctx, Grad_R : torch.Tensor) -> Tuple[torch.Tensor]:
+        """
+        This function maps the gradient of the loss with respect to R(X) to its
+        gradient with respect to X, a, and b (see the class doc string).
+        """
+
+        X, a, b, R_X        = ctx.saved_tensors;
+        Inv_D_X, dR_X       = Rational_Function._Derivatives(X, a, b, R_X);
+
+        Grad_X  : torch.Tensor = None;
+        Grad_a  : torch.Tensor = None;
+        Grad_b  : torch.Tensor = None;
+
+        if(ctx.needs_input_grad[0]):
+            Grad_X = Grad_R*dR_X;
+
+        if(ctx.needs_input_grad[1] or ctx.needs_input_grad[2]):
+            # Build Grad_R/D(X) times 1, X, X^2, X^3, then sum over every 
+            # dimension that a[j] (or b[j]) broadcasts along.
+            Grad_R_D_X  : torch.Tensor          = Grad_R*Inv_D_X;
+            Powers      : List[torch.Tensor]    = [Grad_R_D_X];
+            for j in range(1, 4):
+                Powers.append(Powers[-1]*X);
+
+            if(ctx.needs_input_grad[1]):
+                Grad_a =  torch.stack([Powers[j].sum_to_size(a.shape[1:]) for j in range(4)]);
+            if(ctx.needs_input_grad[2]):
+                Grad_b = -torch.stack([(Powers[j]*R_X).sum_to_size(b.shape[1:]) for j in range(3)]);
+
+        return (Grad_X, Grad_a, Grad_b);
+
+
+
+    @staticmethod
+    def jvp(ctx, X_t : torch.Tensor, a_t : torch.Tensor, b_t : torch.Tensor) -> torch.Tensor:
+        """
+        This function returns the directional derivative of R(X) when X, a, and
+        b move in the directions X_t, a_t, and b_t (any of which may be None).
+        """
+
+        X, a, b, R_X        = ctx.saved_tensors;
+        Inv_D_X, dR_X       = Rational_Function._Derivatives(X, a, b, R_X);
+
+        R_t : torch.Tensor = torch.zeros_like(R_X);
+        if(X_t is not None):
+            R_t = R_t + dR_X*X_t;
+        if(a_t is not None):
+            R_t = R_t + (a_t[0] + X*(a_t[1] + X*(a_t[2] + a_t[3]*X)))*Inv_D_X;
+        if(b_t is not None):
+            R_t = R_t - R_X*(b_t[0] + X*(b_t[1] + b_t[2]*X))*Inv_D_X;
+
+        return R_t;
+
+
+
 class Network(torch.nn.Module):
     def __init__(   self,
                     Widths              : List[int],
@@ -165,7 +330,10 @@ class Network(torch.nn.Module):
         elif(Processed_Encoding == "elu"):
             return torch.nn.ELU();
         elif(Processed_Encoding == "softmax"):
-            return torch.nn.Softmax();
+            # Normalize over the neurons (the last axis). This matches the 
+            # default for a B by Width tensor, and keeps working for the 
+            # K by B by Width tensors that Ensemble_Network uses.
+            return torch.nn.Softmax(dim = -1);
         elif(Processed_Encoding == "rational"):
             return Rational(Device = Device);
         else:
@@ -310,3 +478,305 @@ class Network(torch.nn.Module):
             X = self.Activation_Functions[i](self.Layers[i](X));
             
         return X;
+
+
+
+    def Jet_Forward(self, X : torch.Tensor, Axis : int, Order : int) -> torch.Tensor:
+        """ 
+        This function evaluates the network, along with its first Order 
+        derivatives with respect to the Axis'th input coordinate, at each row 
+        of X. Rather than using autograd, we propagate a "jet" (truncated 
+        Taylor series) through the network. Let e denote the Axis'th unit 
+        vector. For each row, x, of X, we track the Taylor coefficients of 
+        s -> Y(x + s*e) at s = 0 for the output, Y, of each layer. The linear
+        layers act on each coefficient separately (the bias only affects the
+        0th one). For the activation functions, we use the closed-form 
+        recurrences in _Jet_Activation. 
+
+        Note: This function only works if the network has one output and does
+        not use Softmax.
+
+        ------------------------------------------------------------------------
+        Arguments:
+
+        X: A B by Input_Dim tensor whose ith row holds the ith input.
+
+        Axis: The input coordinate we differentiate with respect to.
+
+        Order: The highest order derivative we want. 
+
+        ------------------------------------------------------------------------
+        Returns:
+
+        A B by (Order + 1) tensor whose i, k entry holds the kth derivative of 
+        the network with respect to the Axis'th coordinate at the ith row of X
+        (the 0 column holds the network's value).
+        """
+
+        assert(self.Widths[-1] == 1), ("Jet_Forward requires one output. Got %u" % self.Widths[-1]);
+        assert(Order >= 0);
+
+        # Set up the jet of the input. The 0 coefficient is X, the 1 
+        # coefficient is e, and the rest are zero.
+        Jet : List[torch.Tensor] = [X];
+        for k in range(1, Order + 1):
+            Jet.append(torch.zeros_like(X));
+        if(Order >= 1):
+            Jet[1][:, Axis] = 1.0;
+
+        # Pass the jet through the layers.
+        for i in range(0, self.Num_Layers):
+            W : torch.Tensor = self.Layers[i].weight;
+
+            Jet = [self.Layers[i](Jet[0])] + [torch.nn.functional.linear(Jet[k], W) for k in range(1, Order + 1)];
+            Jet = _Jet_Activation(AF = self.Activation_Functions[i], Y = Jet);
+
+        # Convert the Taylor coefficients to derivatives (the kth derivative 
+        # is k! times the kth coefficient).
+        return torch.cat([math.factorial(k)*Jet[k] for k in range(Order + 1)], dim = 1);
+
+
+
+def _Jet_Multiply(A : List[torch.Tensor], B : List[torch.Tensor], k : int) -> torch.Tensor:
+    """
+    This function returns the kth Taylor coefficient of the product of the 
+    series whose coefficients are A and B (the Cauchy product).
+    """
+
+    C_k : torch.Tensor = A[0]*B[k];
+    for i in range(1, k + 1):
+        C_k = C_k + A[i]*B[k - i];
+    
+    return C_k;
+
+
+
+def _Jet_Activation(AF : torch.nn.Module, Y : List[torch.Tensor]) -> List[torch.Tensor]:
+    """
+    This function applies the activation function AF to a jet. Y should be a 
+    list whose kth entry holds the kth Taylor coefficient of some function 
+    s -> Y(s). This function returns a list whose kth entry holds the kth 
+    Taylor coefficient of s -> AF(Y(s)).
+
+    For Tanh, Sigmoid, and Elu, the derivative of the activation function is a
+    simple function of its value:
+            Tanh'(y)    = 1 - Tanh(y)^2
+            Sigmoid'(y) = Sigmoid(y) - Sigmoid(y)^2
+            Elu'(y)     = Elu(y) + alpha        (y <= 0)
+    Thus, if Z = AF(Y) and W = AF'(Y), then Z' = W Y'. Matching the Taylor 
+    coefficients on both sides gives
+            Z_k = (1/k) sum_{j = 1}^{k} j Y_j W_{k - j}.
+    We compute W_{k - 1} from Z_0, ... , Z_{k - 1}, which gives Z_k, and so on.
+    For Rational, we evaluate N(Y) and D(Y) using Horner's method and then 
+    apply the quotient rule: if R = N/D, then N = R D, so
+            R_k = (N_k - sum_{j = 1}^{k} D_j R_{k - j}) / D_0.
+    """
+
+    Order : int = len(Y) - 1;
+
+    if(isinstance(AF, torch.nn.Identity)):
+        return Y;
+
+    elif(isinstance(AF, torch.nn.Tanh) or isinstance(AF, torch.nn.Sigmoid)):
+        Z : List[torch.Tensor] = [AF(Y[0])];
+        W : List[torch.Tensor] = [];
+
+        for k in range(1, Order + 1):
+            # Find W_{k - 1}.
+            Z_Z : torch.Tensor = _Jet_Multiply(Z, Z, k - 1);
+            if(isinstance(AF, torch.nn.Tanh)):
+                W.append((1.0 if k == 1 else 0.0) - Z_Z);
+            else:
+                W.append(Z[k - 1] - Z_Z);
+
+            # Now find Z_k.
+            Z_k : torch.Tensor = Y[1]*W[k - 1];
+            for j in range(2, k + 1):
+                Z_k = Z_k + j*Y[j]*W[k - j];
+            Z.append(Z_k/k);
+        
+        return Z;
+
+    elif(isinstance(AF, torch.nn.ELU)):
+        # Find the jet of E = exp(Y) (E' = E Y'). We use it where Y_0 <= 0.
+        E : List[torch.Tensor] = [torch.exp(torch.clamp(Y[0], max = 0.0))];
+        for k in range(1, Order + 1):
+            E_k : torch.Tensor = Y[1]*E[k - 1];
+            for j in range(2, k + 1):
+                E_k = E_k + j*Y[j]*E[k - j];
+            E.append(E_k/k);
+
+        Positive : torch.Tensor = torch.greater(Y[0], 0);
+        Z : List[torch.Tensor] = [AF(Y[0])];
+        for k in range(1, Order + 1):
+            Z.append(torch.where(Positive, Y[k], AF.alpha*E[k]));
+        
+        return Z;
+
+    elif(isinstance(AF, Rational)):
+        return _Jet_Rational(a = AF.a, b = AF.b, Y = Y);
+
+    else:
+        print("Jet_Forward does not support %s activation functions" % str(type(AF)));
+        exit();
+
+
+
+def _Jet_Rational(a : torch.Tensor, b : torch.Tensor, Y : List[torch.Tensor]) -> List[torch.Tensor]:
+    """
+    This function applies the rational function with numerator coefficients 
+    a[0], ... , a[3] and denominator coefficients b[0], ... , b[2] to a jet 
+    (see _Jet_Activation). a[j] and b[j] can be scalars or any tensors that 
+    broadcast with the entries of Y.
+    """
+
+    Order : int = len(Y) - 1;
+
+    # Horner's method: N = a_0 + Y(a_1 + Y(a_2 + a_3 Y)), and similarly 
+    # for D.
+    N : List[torch.Tensor] = [a[3]*Y[k] for k in range(Order + 1)];
+    N[0] = N[0] + a[2];
+    for c in (a[1], a[0]):
+        N       = [_Jet_Multiply(Y, N, k) for k in range(Order + 1)];
+        N[0]    = N[0] + c;
+
+    D : List[torch.Tensor] = [b[2]*Y[k] for k in range(Order + 1)];
+    D[0] = D[0] + b[1];
+    D    = [_Jet_Multiply(Y, D, k) for k in range(Order + 1)];
+    D[0] = D[0] + b[0];
+
+    # Quotient rule.
+    R : List[torch.Tensor] = [];
+    for k in range(Order + 1):
+        R_k : torch.Tensor = N[k];
+        for j in range(1, k + 1):
+            R_k = R_k - D[j]*R[k - j];
+        R.append(torch.div(R_k, D[0]));
+
+    return R;
+
+
+
+class Ensemble_Network(torch.nn.Module):
+    def __init__(self, U_List : List[Network]):
+        """
+        Objects of this class evaluate a list of K networks which share the 
+        same Widths and activation functions at once. Each time we evaluate
+        the ensemble, we stack the kth layer's weight matrices (biases) of the
+        networks into a K by out by in (K by 1 by out) tensor. We then evaluate
+        the kth layer of every network using one batched matrix multiply 
+        (torch.baddbmm). Since we stack the networks' parameters (rather than 
+        copying them), gradients flow back to each network's parameters. Thus,
+        an optimizer built from the networks' parameters trains the ensemble.
+
+        The ensemble acts on a K*B by Input_Dim tensor. The first B rows go to 
+        the first network, the next B rows go to the second, and so on. This 
+        means we can pass the ensemble to Coll_Loss (or a derivative plan) as
+        if it were a single network.
+
+        -----------------------------------------------------------------------
+        Arguments: 
+
+        U_List: A list of networks. Each one must have the same Widths and
+        activation functions.
+        """
+
+        super(Ensemble_Network, self).__init__();
+
+        assert(len(U_List) > 0);
+        for k in range(1, len(U_List)):
+            assert(U_List[k].Widths == U_List[0].Widths), ("Ensemble networks must have the same Widths");
+            for i in range(U_List[0].Num_Layers):
+                assert(type(U_List[k].Activation_Functions[i]) == type(U_List[0].Activation_Functions[i])), ("Ensemble networks must use the same activation functions");
+
+        self.U_List         = torch.nn.ModuleList(U_List);
+        self.Num_Networks   : int       = len(U_List);
+        self.Widths         : List[int] = U_List[0].Widths;
+        self.Num_Layers     : int       = U_List[0].Num_Layers;
+
+
+
+    def _Stack_Layer(self, i : int):
+        """
+        This function returns the stacked weight matrices (K by out by in), 
+        bias vectors (K by 1 by out), and, if the ith layer uses a rational 
+        activation function, its stacked coefficients (4 by K by 1 by 1 and 
+        3 by K by 1 by 1, so that a[j] broadcasts with a K by B by out tensor).
+        Otherwise, the last two return values are None.
+        """
+
+        W : torch.Tensor = torch.stack([U.Layers[i].weight for U in self.U_List], dim = 0);
+        b : torch.Tensor = torch.stack([U.Layers[i].bias   for U in self.U_List], dim = 0).unsqueeze(1);
+
+        if(isinstance(self.U_List[0].Activation_Functions[i], Rational)):
+            a_R : torch.Tensor = torch.stack([U.Activation_Functions[i].a for U in self.U_List], dim = 1).view(4, -1, 1, 1);
+            b_R : torch.Tensor = torch.stack([U.Activation_Functions[i].b for U in self.U_List], dim = 1).view(3, -1, 1, 1);
+            return (W, b, a_R, b_R);
+        
+        return (W, b, None, None);
+
+
+
+    def forward(self, X : torch.Tensor) -> torch.Tensor:
+        """ 
+        Forward method for the ensemble.
+
+        ------------------------------------------------------------------------
+        Arguments:
+
+        X: A K*B by Input_Dim tensor. Rows k*B, ... , (k + 1)*B - 1 hold the 
+        inputs for the kth network.
+
+        ------------------------------------------------------------------------
+        Returns:
+
+        A K*B by Output_Dim tensor whose ith row holds the value of the 
+        corresponding network at the ith row of X.
+        """
+
+        K : int = self.Num_Networks;
+        Y : torch.Tensor = X.view(K, -1, X.shape[-1]);
+
+        for i in range(self.Num_Layers):
+            W, b, a_R, b_R = self._Stack_Layer(i);
+            Y = torch.baddbmm(b, Y, W.transpose(1, 2));
+
+            if(a_R is None):
+                Y = self.U_List[0].Activation_Functions[i](Y);
+            else:
+                Y = _Rational(X = Y, a = a_R, b = b_R);
+        
+        return Y.reshape(-1, Y.shape[-1]);
+
+
+
+    def Jet_Forward(self, X : torch.Tensor, Axis : int, Order : int) -> torch.Tensor:
+        """ 
+        The ensemble version of Network.Jet_Forward. X should be a K*B by 
+        Input_Dim tensor (see forward). This function returns a K*B by 
+        (Order + 1) tensor whose i, k entry holds the kth derivative of the 
+        corresponding network with respect to the Axis'th coordinate at the 
+        ith row of X.
+        """
+
+        assert(self.Widths[-1] == 1), ("Jet_Forward requires one output. Got %u" % self.Widths[-1]);
+        assert(Order >= 0);
+
+        K : int = self.Num_Networks;
+        Jet : List[torch.Tensor] = [X.view(K, -1, X.shape[-1])];
+        for k in range(1, Order + 1):
+            Jet.append(torch.zeros_like(Jet[0]));
+        if(Order >= 1):
+            Jet[1][:, :, Axis] = 1.0;
+
+        for i in range(self.Num_Layers):
+            W, b, a_R, b_R = self._Stack_Layer(i);
+            W_T : torch.Tensor = W.transpose(1, 2);
+
+            Jet = [torch.baddbmm(b, Jet[0], W_T)] + [torch.bmm(Jet[k], W_T) for k in range(1, Order + 1)];
+            if(a_R is None):
+                Jet = _Jet_Activation(AF = self.U_List[0].Activation_Functions[i], Y = Jet);
+            else:
+                Jet = _Jet_Rational(a = a_R, b = b_R, Y = Jet);
+
+        return torch.cat([math.factorial(k)*Jet[k].reshape(-1, 1) for k in range(Order + 1)], dim = 1);
@@ -0,0 +1,193 @@
+import  torch;
+
+
+
+class Residual_Pool():
+    """
+    Objects of this class house a persistent, bounded pool of "targeted"
+    collocation points: points where the PDE residual was large. Each epoch,
+    we evaluate the residual at a set of random collocation points (as well as
+    some points from the pool). We then
+        1. update the residuals of the pool points we evaluated,
+        2. evict pool points that are too old, or whose residual has decayed
+           (the networks and Xi have learned to satisfy the PDE there),
+        3. add the random points whose residual is at least 3 standard
+           deviations above the mean (the "cutoff"),
+        4. if the pool is over capacity, keep the points with the largest
+           residuals.
+    Before the next epoch, we draw some points from the pool, with probability
+    proportional to their residual (see Sample). We add these points to the
+    next epoch's random points.
+
+    Unlike throwing the targeted points away each epoch, this keeps points
+    where the residual stays large, and bounds the number of targeted points
+    we evaluate each epoch.
+
+    ----------------------------------------------------------------------------
+    Members:
+
+    Points : A P by n tensor whose ith row holds the ith point in the pool.
+
+    Residuals : A P element tensor whose ith entry holds the absolute value of
+    the residual at the ith point, when we last evaluated it.
+
+    Ages : A P element tensor whose ith entry holds the number of epochs that
+    the ith point has been in the pool.
+
+    Capacity : The maximum number of points in the pool.
+
+    Num_Samples : The number of points we draw from the pool each epoch.
+
+    Max_Age : We evict points that have been in the pool for more than this
+    many epochs.
+
+    Decay : We evict points whose residual falls below Decay times the
+    current cutoff.
+
+    Cutoff : The cutoff from the most recent call to Update.
+    """
+
+    def __init__(   self,
+                    Num_Dim     : int,
+                    Capacity    : int,
+                    Num_Samples : int,
+                    Max_Age     : int,
+                    Decay       : float,
+                    Device      : torch.device = torch.device('cpu')) -> None:
+        """
+        Initializer. The pool starts off empty.
+
+        ------------------------------------------------------------------------
+        Arguments:
+
+        Num_Dim : The number of components in each point.
+
+        Capacity, Num_Samples, Max_Age, Decay : See the class doc string.
+
+        Device : The device that the collocation points live on.
+        """
+
+        assert(Capacity     > 0);
+        assert(Num_Samples  > 0);
+        assert(Max_Age      >= 0);
+        assert(Decay        >= 0);
+
+        self.Capacity       : int           = Capacity;
+        self.Num_Samples    : int           = Num_Samples;
+        self.Max_Age        : int           = Max_Age;
+        self.Decay          : float         = Decay;
+        self.Cutoff         : float         = 0.0;
+
+        self.Points         : torch.Tensor  = torch.empty((0, Num_Dim), dtype = torch.float32, device = Device);
+        self.Residuals      : torch.Tensor  = torch.empty(0,            dtype = torch.float32, device = Device);
+        self.Ages           : torch.Tensor  = torch.empty(0,            dtype = torch.int64,   device = Device);
+
+        # The indices of the points we drew in the last call to Sample.
+        self._Sampled       : torch.Tensor  = torch.empty(0,            dtype = torch.int64,   device = Device);
+
+
+
+    def Size(self) -> int:
+        """
+        This function returns the number of points in the pool.
+        """
+
+        return self.Points.shape[0];
+
+
+
+    def Sample(self, Generator : torch.Generator = None) -> torch.Tensor:
+        """
+        This function draws Num_Samples distinct points from the pool. The
+        probability of drawing a point is proportional to its residual, so we
+        usually draw the points where the residual is largest, but also
+        revisit the others from time to time. If the pool has Num_Samples or
+        fewer points, we return every point.
+
+        You should evaluate the residual at the returned points, and pass
+        those residuals to the next call to Update.
+
+        ------------------------------------------------------------------------
+        Arguments:
+
+        Generator : The random number generator we use to draw the points
+        (see Generate_Points). If None, we use torch's default generator.
+
+        ------------------------------------------------------------------------
+        Returns:
+
+        A tensor whose rows hold the sampled points.
+        """
+
+        Num_Points : int = self.Size();
+        if(Num_Points <= self.Num_Samples):
+            self._Sampled = torch.arange(Num_Points, device = self.Points.device);
+        else:
+            # Make sure every point has a chance of being drawn.
+            Probabilities : torch.Tensor = torch.clamp(self.Residuals, min = 1e-12);
+            self._Sampled = torch.multinomial(  Probabilities,
+                                                num_samples = self.Num_Samples,
+                                                replacement = False,
+                                                generator   = Generator);
+
+        return self.Points[self._Sampled, :];
+
+
+
+    def Update( self,
+                Random_Points       : torch.Tensor,
+                Random_Residuals    : torch.Tensor,
+                Sampled_Residuals   : torch.Tensor) -> None:
+        """
+        This function updates the pool using the residuals from the most
+        recent epoch (see the class doc string).
+
+        ------------------------------------------------------------------------
+        Arguments:
+
+        Random_Points : A B by n tensor holding the epoch's random collocation
+        points.
+
+        Random_Residuals : A B element tensor holding the residual at each of
+        Random_Points.
+
+        Sampled_Residuals : A tensor holding the residual at each of the points
+        that the most recent call to Sample returned (in the same order).
+
+        These tensors may live on a different device than the pool (Training
+        stores the residuals on the CPU); we move them to the pool's device.
+        """
+
+        Device : torch.device = self.Points.device;
+        Random_Points       = Random_Points.detach().to(device = Device, dtype = torch.float32);
+        Random_Residuals    = torch.abs(Random_Residuals.detach().to(device = Device, dtype = torch.float32));
+        Sampled_Residuals   = torch.abs(Sampled_Residuals.detach().to(device = Device, dtype = torch.float32));
+        assert(Sampled_Residuals.numel() == self._Sampled.numel());
+
+        # Update the residuals at the points we sampled, and age every point.
+        self.Residuals[self._Sampled]    = Sampled_Residuals;
+        self.Ages                       += 1;
+        self._Sampled                    = self._Sampled[0:0];
+
+        # Find the cutoff: 3 standard deviations above the mean of the
+        # residuals at the random points.
+        Cutoff : torch.Tensor = torch.mean(Random_Residuals) + 3*torch.std(Random_Residuals);
+        self.Cutoff = Cutoff.item();
+
+        # Evict old points, and points whose residual has decayed.
+        Keep : torch.Tensor = torch.logical_and(self.Ages <= self.Max_Age, self.Residuals >= self.Decay*Cutoff);
+
+        # Add the random points whose residual is above the cutoff.
+        New : torch.Tensor = torch.greater_equal(Random_Residuals, Cutoff);
+
+        self.Points     = torch.vstack((self.Points[Keep, :], Random_Points[New, :]));
+        self.Residuals  = torch.hstack((self.Residuals[Keep], Random_Residuals[New]));
+        self.Ages       = torch.hstack((self.Ages[Keep],      torch.zeros_like(Random_Residuals[New], dtype = torch.int64)));
+
+        # If the pool is over capacity, keep the points with the largest
+        # residuals.
+        if(self.Size() > self.Capacity):
+            Indices : torch.Tensor = torch.topk(self.Residuals, k = self.Capacity).indices;
+            self.Points     = self.Points[Indices, :];
+            self.Residuals  = self.Residuals[Indices];
+            self.Ages       = self.Ages[Indices];
@@ -1,22 +1,40 @@
 import  numpy;
 import  torch;
-from    typing  import List, Dict, Callable;
+import  json;
+import  os;
+import  queue;
+import  threading;
+import  warnings;
+from    typing  import List, Dict, Callable, Iterator, Tuple;
 
 
-def Data_Loader(DataSet_Name   : str,
-                Device         : torch.device) -> Dict:
-    """ 
+def Data_Loader(DataSet_Name    : str,
+                Device          : torch.device,
+                DataSets_Path   : str = "../Data/DataSets/") -> Dict:
+    """
     This function loads a DataSet from file, converts it contents to a torch
     Tensor, and returns the result.
 
+    A DataSet is either a directory (with a "Manifest.json" file and one .npy
+    file per array) or a .npz file (see Create_Data_Set). If both exist, we
+    use the directory. We memory-map the .npy files in a directory DataSet
+    rather than reading them. If Device is the CPU, the returned tensors use
+    the mapped memory directly (we do not copy them), so loading is
+    essentially instant no matter how big the DataSet is, and several runs
+    that use the same DataSet share one copy of it (the operating system
+    reads the parts we use, when we use them). These tensors are read-only;
+    do not modify them in place.
+
     ----------------------------------------------------------------------------
     Arguments:
 
-    DataSet_Name : The name of a file in Data/DataSets (without the .npz
-    extension). We load the DataSet in this file.
+    DataSet_Name : The name of a DataSet in Data/DataSets (without the .npz
+    extension). We load the DataSet with this name.
 
     Device : The device we're running training on.
 
+    DataSets_Path : The directory that holds the DataSets.
+
     ----------------------------------------------------------------------------
     Returns:
 
@@ -33,20 +51,159 @@ def Data_Loader(DataSet_Name   : str,
         upper bounds of the problem domain along the ith axis.
 
         "Number of Dimensions": An integer specifying the number of dimensions
-        (the number of rows in "Input Bounds").  
+        (the number of rows in "Input Bounds").
     """
 
     # Load the DataSet.
-    DataSet_Path        = "../Data/DataSets/" + DataSet_Name + ".npz";
-    DataSet             = numpy.load(DataSet_Path);
+    Directory_Path : str = os.path.join(DataSets_Path, DataSet_Name);
+    if(os.path.isfile(os.path.join(Directory_Path, "Manifest.json"))):
+        DataSet = _Map_DataSet_Directory(Directory_Path);
+    else:
+        DataSet_Path        = os.path.join(DataSets_Path, DataSet_Name + ".npz");
+        DataSet             = numpy.load(DataSet_Path);
 
     # Now build the return dictionary
-    Data_Dict   : Dict  = { "Train Inputs"          : torch.from_numpy(DataSet["Train_Inputs"]).to( device = Device),
-                            "Train Targets"         : torch.from_numpy(DataSet["Train_Targets"]).to(device = Device),
-                            "Test Inputs"           : torch.from_numpy(DataSet["Test_Inputs"]).to(  device = Device),
-                            "Test Targets"          : torch.from_numpy(DataSet["Test_Targets"]).to( device = Device),
-                            "Input Bounds"          : DataSet["Input_Bounds"],
+    Data_Dict   : Dict  = { "Train Inputs"          : _To_Tensor(DataSet["Train_Inputs"],   Device),
+                            "Train Targets"         : _To_Tensor(DataSet["Train_Targets"],  Device),
+                            "Test Inputs"           : _To_Tensor(DataSet["Test_Inputs"],    Device),
+                            "Test Targets"          : _To_Tensor(DataSet["Test_Targets"],   Device),
+                            "Input Bounds"          : numpy.array(DataSet["Input_Bounds"]),
                             "Number of Dimensions"  : DataSet["Input_Bounds"].shape[0]};
 
     # All done... return!
     return Data_Dict;
+
+
+
+def _Map_DataSet_Directory(Directory_Path : str) -> Dict[str, numpy.ndarray]:
+    """
+    This function memory-maps (read-only) each array listed in a directory
+    DataSet's manifest, and checks that each array's shape and type match the
+    manifest. It returns a dictionary whose keys are the array names (e.g.,
+    "Train_Inputs") and whose values are the mapped arrays.
+    """
+
+    with open(os.path.join(Directory_Path, "Manifest.json"), mode = "r") as File:
+        Manifest : Dict = json.load(File);
+
+    DataSet : Dict[str, numpy.ndarray] = {};
+    for (Array_Name, Entry) in Manifest["Arrays"].items():
+        Array : numpy.ndarray = numpy.load(os.path.join(Directory_Path, Entry["File"]), mmap_mode = "r");
+
+        if(list(Array.shape) != list(Entry["Shape"]) or Array.dtype.str != Entry["Dtype"]):
+            raise ValueError("The array %s in %s has shape %s and type %s, but the manifest says it should have shape %s and type %s." %
+                             (Entry["File"], Directory_Path, str(list(Array.shape)), Array.dtype.str, str(Entry["Shape"]), Entry["Dtype"]));
+
+        DataSet[Array_Name] = Array;
+
+    return DataSet;
+
+
+
+def _To_Tensor(Array : numpy.ndarray, Device : torch.device) -> torch.Tensor:
+    """
+    This function converts Array to a tensor on Device. If Device is the CPU,
+    the tensor shares Array's memory (we do not copy Array).
+    """
+
+    # torch warns when it wraps read-only (e.g., memory-mapped) memory. We
+    # never modify the data tensors in place, so this is safe.
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", message = "The given NumPy array is not writable");
+        Tensor : torch.Tensor = torch.from_numpy(Array);
+
+    return Tensor.to(device = Device);
+
+
+
+def Iterate_Chunks( Inputs      : torch.Tensor,
+                    Targets     : torch.Tensor,
+                    Chunk_Size  : int,
+                    Device      : torch.device  = torch.device('cpu'),
+                    Prefetch    : bool          = False) -> Iterator[Tuple[torch.Tensor, torch.Tensor]]:
+    """
+    This function walks through a data set in chunks. It yields the inputs and
+    targets of the first Chunk_Size data points, then the next Chunk_Size,
+    and so on. We copy each chunk to Device (and into memory) just before we
+    yield it, so only a few chunks are in memory at once. This lets us use
+    data sets that are much larger than memory (Inputs and Targets can be 
+    memory-mapped, see Data_Loader).
+
+    ----------------------------------------------------------------------------
+    Arguments:
+
+    Inputs, Targets : The data set's inputs (one row per point) and targets
+    (one entry per point). These can live anywhere (usually, on the CPU).
+
+    Chunk_Size : The number of points in each chunk (the last chunk may have
+    fewer).
+
+    Device : The device we copy each chunk to.
+
+    Prefetch : If True, a background thread reads (and copies) the next chunk
+    while the caller works on the current one. This hides the time it takes
+    to read the chunk from disk (or copy it to the GPU).
+
+    ----------------------------------------------------------------------------
+    Yields:
+
+    Tuples whose first entry holds the chunk's inputs and whose second holds
+    its targets (both on Device).
+    """
+
+    assert(Chunk_Size > 0);
+    Num_Points : int = Inputs.shape[0];
+
+    def Load_Chunk(Start : int) -> Tuple[torch.Tensor, torch.Tensor]:
+        End : int = min(Start + Chunk_Size, Num_Points);
+
+        # Copy the chunk (even on the CPU). This reads the chunk into memory,
+        # rather than leaving it in the (possibly memory-mapped) data set.
+        return (Inputs[Start:End].to(device = Device, copy = True),
+                Targets[Start:End].to(device = Device, copy = True));
+
+    if(Prefetch == False):
+        for Start in range(0, Num_Points, Chunk_Size):
+            yield Load_Chunk(Start);
+        return;
+
+    # The background thread puts chunks in this queue. We keep at most two
+    # chunks waiting, so the thread never gets too far ahead. The thread puts
+    # None in the queue when it is done (or the exception, if it fails).
+    Chunks  : queue.Queue       = queue.Queue(maxsize = 2);
+    Stop    : threading.Event   = threading.Event();
+
+    def Put(Item) -> bool:
+        # Wait for room in the queue, but give up if the caller stopped.
+        while(Stop.is_set() == False):
+            try:
+                Chunks.put(Item, timeout = 0.1);
+                return True;
+            except queue.Full:
+                continue;
+        return False;
+
+    def Producer() -> None:
+        try:
+            for Start in range(0, Num_Points, Chunk_Size):
+                if(Put(Load_Chunk(Start)) == False):
+                    return;
+            Put(None);
+        except Exception as Error:
+            Put(Error);
+
+    Thread : threading.Thread = threading.Thread(target = Producer, daemon = True);
+    Thread.start();
+
+    try:
+        while(True):
+            Chunk = Chunks.get();
+            if(Chunk is None):
+                break;
+            if(isinstance(Chunk, Exception)):
+                raise Chunk;
+            yield Chunk;
+    finally:
+        # If the caller stops early, tell the thread to stop, then wait for it.
+        Stop.set();
+        Thread.join();
@@ -9,11 +9,12 @@ Classes_Path    = os.path.join(Code_Path, "Classes");
 # Add the Readers, Classes directories to the python path.
 sys.path.append(Classes_Path);
 
-from    typing      import Tuple, List;
+from    typing      import Tuple, List, Dict, Callable;
 import  torch;
 import  numpy;
 
 from    Derivative  import Derivative;
+from    Network     import Unfused_Rational;
 
 
 
@@ -205,3 +206,477 @@ def Derivative_From_Derivative(
             Dz_Dy_Dx_Dt_Db_U = Grad_Dz_Dy_Dx_Dt_Db_U[:, 3].view(-1);
 
     return Dz_Dy_Dx_Dt_Db_U;
+
+
+
+class Derivative_Plan():
+    """
+    Objects of this class house a "plan" for evaluating a list of derivatives 
+    of U. Each torch.autograd.grad call gives us the gradient of some D U with
+    respect to every coordinate at once. For example, the gradient of U gives 
+    D_t U, D_x U, and (in 2D) D_y U. Derivative_From_Derivative keeps one 
+    column of each gradient and throws the others away. The plan instead keeps
+    every column in a derivative cache. Many derivatives in a library are 
+    related, so this saves a lot of work. For example, if the library contains
+    D_t U, D_x U, D_x^2 U, D_x D_y U, and D_y^2 U, then we need three backward
+    passes: one for the gradient of U (which gives D_t U, D_x U, D_y U), one
+    for the gradient of D_x U (which gives D_x^2 U, D_x D_y U), and one for the
+    gradient of D_y U (which gives D_y^2 U). Computing each derivative from U 
+    directly would instead take 1 + 1 + 2 + 2 + 2 = 8 backward passes. 
+    
+    We build the plan once (from the library's derivatives) and then execute 
+    it each time we evaluate the collocation loss. The plan is a list of 
+    "steps". Each step is the encoding of a derivative whose gradient we 
+    compute. Each step's derivative is either U itself or a column of the 
+    gradient of an earlier step. When building the plan, we make each 
+    derivative available using as few new steps as possible.
+
+    ----------------------------------------------------------------------------
+    Members:
+
+    Derivatives : The list of derivatives that the plan computes, sorted by 
+    order.
+
+    Num_Dim : The number of columns of each gradient that we keep. This is the
+    length of the longest Encoding in Derivatives.
+
+    Steps : A list of tuples. Each tuple is the (zero-padded) Encoding of a
+    derivative whose gradient we compute. We compute the gradients in this 
+    order.
+
+    Num_Grad_Passes : The number of torch.autograd.grad calls we need to 
+    execute the plan (the length of Steps).
+    """
+
+    def __init__(self, Derivatives : List[Derivative]) -> None:
+        """
+        Initializer. 
+
+        ------------------------------------------------------------------------
+        Arguments:
+
+        Derivatives : A list of derivative operators. This list should be 
+        ordered according to the Derivatives' orders (Read_Library returns 
+        such a list).
+        """
+
+        # Make sure Derivatives is sorted by order. The plan works with any 
+        # order, but sorting means we add low order steps first, which later 
+        # derivatives can reuse.
+        for j in range(1, len(Derivatives)):
+            assert(Derivatives[j - 1].Order <= Derivatives[j].Order);
+
+        self.Derivatives        : List[Derivative]  = Derivatives;
+        self.Num_Dim            : int               = max([len(D.Encoding) for D in Derivatives] + [2]);
+        self.Steps              : List[Tuple]       = [];
+
+        # Available holds the encodings of the derivatives that the steps so 
+        # far give us (U, plus every column of each step's gradient).
+        self._Available : set = set([self._Pad(numpy.zeros(self.Num_Dim, dtype = numpy.int32))]);
+
+        for D in Derivatives:
+            self._Make_Available(self._Pad(D.Encoding));
+
+        self.Num_Grad_Passes    : int               = len(self.Steps);
+
+
+
+    def _Pad(self, Encoding : numpy.ndarray) -> Tuple:
+        """
+        This function returns a tuple holding Encoding, padded with zeros so 
+        that it has Num_Dim elements.
+        """
+
+        Padded : List[int] = [0]*self.Num_Dim;
+        for k in range(len(Encoding)):
+            Padded[k] = int(Encoding[k]);
+
+        return tuple(Padded);
+
+
+
+    def _Parents(self, Encoding : Tuple) -> List[Tuple]:
+        """
+        This function returns a list of the encodings whose gradient contains 
+        the derivative with the given Encoding. If Encoding = (p_0, ... , p_l), 
+        these are the encodings (p_0, ... , p_k - 1, ... , p_l) with p_k > 0.
+        """
+
+        Parents : List[Tuple] = [];
+        for k in range(self.Num_Dim):
+            if(Encoding[k] > 0):
+                Parent      : List[int] = list(Encoding);
+                Parent[k]  -= 1;
+                Parents.append(tuple(Parent));
+
+        return Parents;
+
+
+
+    def _Cost(self, Encoding : Tuple) -> int:
+        """
+        This function returns the number of new steps we need to make the
+        derivative with the given Encoding available.
+        """
+
+        if(Encoding in self._Available):
+            return 0;
+
+        # We need to make one of the parents available and then add it as a 
+        # step.
+        return 1 + min([self._Cost(Parent) for Parent in self._Parents(Encoding)]);
+
+
+
+    def _Make_Available(self, Encoding : Tuple) -> None:
+        """
+        This function adds the steps we need to make the derivative with the 
+        given Encoding available. We pick the parent that needs the fewest new
+        steps (ties go to the parent which comes first in _Parents).
+        """
+
+        if(Encoding in self._Available):
+            return;
+
+        Parents : List[Tuple]   = self._Parents(Encoding);
+        Costs   : List[int]     = [self._Cost(Parent) for Parent in Parents];
+        Parent  : Tuple         = Parents[Costs.index(min(Costs))];
+
+        self._Make_Available(Parent);
+
+        # Add a step for the parent. Its gradient gives us every derivative 
+        # that is one order higher than the parent.
+        self.Steps.append(Parent);
+        for k in range(self.Num_Dim):
+            Child       : List[int] = list(Parent);
+            Child[k]   += 1;
+            self._Available.add(tuple(Child));
+
+
+
+    def __call__(   self,
+                    U_Coords    : torch.Tensor,
+                    Coords      : torch.Tensor) -> Dict[Tuple, torch.Tensor]:
+        """
+        This function executes the plan. 
+
+        ------------------------------------------------------------------------
+        Arguments:
+
+        U_Coords : A 1D tensor whose ith entry holds U evaluated at the ith 
+        row of Coords. We assume the graph from Coords to U_Coords exists.
+
+        Coords : A 2D tensor whose ith row holds the ith coordinate. Coords 
+        must require grad and must have at least Num_Dim columns.
+
+        ------------------------------------------------------------------------
+        Returns:
+
+        A dictionary whose keys are the (tuples of) Encodings of the 
+        derivatives in self.Derivatives. The value for the key of derivative D 
+        is a 1D tensor whose ith entry holds D U at the ith row of Coords.
+        """
+
+        # The derivative cache. This maps the padded encoding of each 
+        # derivative we have computed to its value at the Coords.
+        Cache : Dict[Tuple, torch.Tensor] = {};
+        Cache[self._Pad(numpy.zeros(self.Num_Dim, dtype = numpy.int32))] = U_Coords;
+
+        for Step in self.Steps:
+            Grad_D_U : torch.Tensor = torch.autograd.grad(
+                                        outputs         = Cache[Step],
+                                        inputs          = Coords,
+                                        grad_outputs    = torch.ones_like(Cache[Step]),
+                                        retain_graph    = True,
+                                        create_graph    = True)[0];
+
+            # Keep every column of the gradient.
+            for k in range(self.Num_Dim):
+                Child       : List[int] = list(Step);
+                Child[k]   += 1;
+                Cache[tuple(Child)] = Grad_D_U[:, k].view(-1);
+
+        D_U_Dict : Dict[Tuple, torch.Tensor] = {};
+        for D in self.Derivatives:
+            D_U_Dict[tuple(D.Encoding)] = Cache[self._Pad(D.Encoding)];
+
+        return D_U_Dict;
+
+
+
+class Forward_Derivative_Plan():
+    """
+    Objects of this class house a forward-mode alternative to Derivative_Plan.
+    Derivative_Plan uses repeated reverse-mode (torch.autograd.grad, with 
+    create_graph = True) passes. The graph which these passes build grows 
+    quickly with the derivative order, which makes fourth order libraries 
+    (KS, Cahn-Hilliard, Beam) slow and memory hungry. 
+    
+    This class instead uses nested forward-mode Jacobian-vector products 
+    (torch.func.jvp). Let e_k denote the kth unit vector. Since U acts on each
+    coordinate independently, the jvp of X -> D U(X) in the direction e_k (at
+    every point) gives D_k D U. Nesting these products lets us compute
+    something like D_x^4 U in one forward sweep through U. Each sweep also 
+    gives us every lower order derivative along the way (D_x U, D_x^2 U, 
+    D_x^3 U), so we group the derivatives into "chains". 
+    
+    To do this, we write each derivative as a sequence of axes, sorted in 
+    increasing order. For example, if the coordinates are (t, x, y), then 
+    D_t D_x^2 U corresponds to the sequence (0, 1, 1). If one derivative's 
+    sequence is a prefix of another's, then the sweep for the second gives 
+    us the first. Thus, we only need one sweep per "maximal" sequence (one that
+    is not a prefix of another).
+
+    ----------------------------------------------------------------------------
+    Members:
+
+    Derivatives : The list of derivatives that the plan computes.
+
+    Num_Dim : The length of the longest Encoding in Derivatives.
+
+    Chains : A list of tuples of axes. We do one forward sweep per chain.
+
+    Num_Forward_Sweeps : The number of forward sweeps we need to execute the 
+    plan (the length of Chains).
+    """
+
+    def __init__(self, Derivatives : List[Derivative]) -> None:
+        """
+        Initializer. 
+
+        ------------------------------------------------------------------------
+        Arguments:
+
+        Derivatives : A list of derivative operators (Read_Library returns 
+        such a list).
+        """
+
+        self.Derivatives    : List[Derivative]  = Derivatives;
+        self.Num_Dim        : int               = max([len(D.Encoding) for D in Derivatives] + [2]);
+
+        # Find each derivative's sequence of axes.
+        Sequences : List[Tuple] = [];
+        for D in Derivatives:
+            Sequences.append(self._Sequence(D));
+
+        # Keep the maximal sequences. We keep the first copy of any duplicates.
+        self.Chains : List[Tuple] = [];
+        for i in range(len(Sequences)):
+            Seq_i : Tuple = Sequences[i];
+
+            Is_Maximal : bool = (len(Seq_i) > 0) and (Seq_i not in self.Chains);
+            for Seq_j in Sequences:
+                if(len(Seq_j) > len(Seq_i) and Seq_j[:len(Seq_i)] == Seq_i):
+                    Is_Maximal = False;
+                    break;
+
+            if(Is_Maximal):
+                self.Chains.append(Seq_i);
+
+        self.Num_Forward_Sweeps : int = len(self.Chains);
+
+
+
+    def _Sequence(self, D : Derivative) -> Tuple:
+        """
+        This function returns the (increasing) sequence of axes corresponding
+        to the derivative D (see class doc string).
+        """
+
+        Sequence : List[int] = [];
+        for k in range(len(D.Encoding)):
+            Sequence += [k]*int(D.Encoding[k]);
+
+        return tuple(Sequence);
+
+
+
+    def __call__(   self,
+                    U           : torch.nn.Module,
+                    Coords      : torch.Tensor) -> Dict[Tuple, torch.Tensor]:
+        """
+        This function executes the plan. 
+
+        ------------------------------------------------------------------------
+        Arguments:
+
+        U : The network (or other function) whose derivatives we want. U should
+        map a B by n tensor to a B by 1 (or B element) tensor.
+
+        Coords : A 2D tensor whose ith row holds the ith coordinate. Coords 
+        must have at least Num_Dim columns. Coords does not need to require 
+        grad.
+
+        ------------------------------------------------------------------------
+        Returns:
+
+        A dictionary whose keys are the (tuples of) Encodings of the 
+        derivatives in self.Derivatives. The value for the key of derivative D 
+        is a 1D tensor whose ith entry holds D U at the ith row of Coords.
+        """
+
+        # The derivative cache. This maps sequences of axes to the 
+        # corresponding derivative of U at the Coords.
+        Cache : Dict[Tuple, torch.Tensor] = self._Sweep(U = U, Coords = Coords);
+
+        # If a derivative is the identity (or there are no chains), evaluate U
+        # directly.
+        if(() not in Cache):
+            Cache[()] = U(Coords).view(-1);
+
+        D_U_Dict : Dict[Tuple, torch.Tensor] = {};
+        for D in self.Derivatives:
+            D_U_Dict[tuple(D.Encoding)] = Cache[self._Sequence(D)];
+
+        return D_U_Dict;
+
+
+
+    def _Sweep(self, U : torch.nn.Module, Coords : torch.Tensor) -> Dict[Tuple, torch.Tensor]:
+        """
+        This function runs one forward sweep per chain. It returns the
+        derivative cache: a dictionary which maps each prefix of each chain to
+        the corresponding derivative of U at the Coords.
+        """
+
+        Cache : Dict[Tuple, torch.Tensor] = {};
+
+        # We nest jvps, which does not work through Rational_Function (see
+        # Unfused_Rational).
+        with Unfused_Rational():
+            for Chain in self.Chains:
+                # Build the nested function. F_0(X) = (U(X), ()). If F_k(X) = 
+                # (D U(X), Lower), then F_{k + 1}(X) = (D_a D U(X), Lower + (D U,)),
+                # where a is the (k + 1)th axis in the chain. Thus, the last 
+                # function returns the derivative for the full chain along with 
+                # every lower order derivative in the chain (as its auxiliary
+                # output).
+                F : Callable = lambda X : (U(X).view(-1), ());
+                for Axis in Chain:
+                    F = _Extend(F = F, Axis = Axis);
+
+                D_U, Lower = F(Coords);
+
+                for k in range(len(Lower)):
+                    Cache[Chain[:k]] = Lower[k];
+                Cache[Chain] = D_U;
+
+        return Cache;
+
+
+
+def _Extend(F : Callable, Axis : int) -> Callable:
+    """
+    This function is a helper for Forward_Derivative_Plan. F should be a 
+    function which maps a B by n tensor, X, to a tuple whose first entry is a 
+    B element tensor, D U(X), and whose second is a tuple of tensors. This 
+    function returns the function which maps X to
+            (D_Axis D U(X), (second entry of F(X)) + (D U(X),)).
+    """
+
+    def F_Next(X : torch.Tensor) -> Tuple[torch.Tensor, Tuple]:
+        # The derivative with respect to the Axis'th coordinate is the jvp in
+        # the direction of the Axis'th unit vector (at every point).
+        Tangent : torch.Tensor  = torch.zeros_like(X);
+        Tangent[:, Axis]        = 1.0;
+
+        D_U, Next_D_U, Lower = torch.func.jvp(F, (X,), (Tangent,), has_aux = True);
+        return (Next_D_U, Lower + (D_U,));
+
+    return F_Next;
+
+
+
+class Jet_Derivative_Plan(Forward_Derivative_Plan):
+    """
+    Objects of this class house a plan which computes derivatives using 
+    Network.Jet_Forward. That function propagates the value of U and its first
+    k derivatives with respect to one coordinate through the network using 
+    closed-form activation derivatives, which skips autograd entirely. This 
+    only works for derivatives with respect to a single coordinate (like 
+    D_x^4). For mixed partials (like D_x D_y), we fall back on the forward-mode
+    plan (see Forward_Derivative_Plan).
+
+    ----------------------------------------------------------------------------
+    Members:
+
+    Derivatives : The list of derivatives that the plan computes.
+
+    Jet_Orders : A dictionary which maps each axis to the highest order 
+    derivative with respect to that axis (and only that axis) in Derivatives.
+    We compute one jet per axis.
+
+    Mixed_Derivatives : The derivatives in Derivatives which involve more than 
+    one axis. We compute these using the Forward_Derivative_Plan members (such
+    as Chains) which this class inherits.
+    """
+
+    def __init__(self, Derivatives : List[Derivative]) -> None:
+        """
+        Initializer. 
+
+        ------------------------------------------------------------------------
+        Arguments:
+
+        Derivatives : A list of derivative operators (Read_Library returns 
+        such a list).
+        """
+
+        self.Jet_Orders         : Dict[int, int]    = {};
+        self.Mixed_Derivatives  : List[Derivative]  = [];
+
+        for D in Derivatives:
+            Axes : List[int] = [k for k in range(len(D.Encoding)) if D.Encoding[k] > 0];
+
+            if(len(Axes) == 1):
+                self.Jet_Orders[Axes[0]] = max(self.Jet_Orders.get(Axes[0], 0), int(D.Encoding[Axes[0]]));
+            elif(len(Axes) > 1):
+                self.Mixed_Derivatives.append(D);
+
+        super(Jet_Derivative_Plan, self).__init__(Derivatives = self.Mixed_Derivatives);
+
+        # Restore Derivatives (the initializer above sets it to the mixed 
+        # derivatives).
+        self.Derivatives : List[Derivative] = Derivatives;
+
+
+
+    def __call__(   self,
+                    U           : torch.nn.Module,
+                    Coords      : torch.Tensor) -> Dict[Tuple, torch.Tensor]:
+        """
+        This function executes the plan. 
+
+        ------------------------------------------------------------------------
+        Arguments:
+
+        U : A Network object (it must have a Jet_Forward method).
+
+        Coords : A 2D tensor whose ith row holds the ith coordinate. 
+
+        ------------------------------------------------------------------------
+        Returns:
+
+        A dictionary whose keys are the (tuples of) Encodings of the 
+        derivatives in self.Derivatives. The value for the key of derivative D 
+        is a 1D tensor whose ith entry holds D U at the ith row of Coords.
+        """
+
+        # The derivative cache (see Forward_Derivative_Plan). We start with the
+        # mixed partials (if there are any).
+        Cache : Dict[Tuple, torch.Tensor] = self._Sweep(U = U, Coords = Coords);
+
+        for (Axis, Order) in self.Jet_Orders.items():
+            Jet : torch.Tensor = U.Jet_Forward(X = Coords, Axis = Axis, Order = Order);
+
+            for k in range(Order + 1):
+                Cache[tuple([Axis]*k)] = Jet[:, k];
+
+        if(() not in Cache):
+            Cache[()] = U(Coords).view(-1);
+
+        D_U_Dict : Dict[Tuple, torch.Tensor] = {};
+        for D in self.Derivatives:
+            D_U_Dict[tuple(D.Encoding)] = Cache[self._Sequence(D)];
+
+        return D_U_Dict;
@@ -4,20 +4,25 @@ import sys
 
 # Get path to Code, Readers, Classes directories.
 Code_Path       = os.path.dirname(os.path.abspath(__file__));
+Readers_Path    = os.path.join(Code_Path, "Readers");
 Classes_Path    = os.path.join(Code_Path, "Classes");
 
 # Add the Readers, Classes directories to the python path.
+sys.path.append(Readers_Path);
 sys.path.append(Classes_Path);
 
 import  numpy;
 import  torch;
 import  math;
+import  time;
 from    typing                  import Tuple, List, Dict;
 
 from    Derivative              import Derivative;
 from    Term                    import Term;
-from    Network                 import Network, Rational;
-from    Evaluate_Derivatives    import Derivative_From_Derivative;
+from    Network                 import Network, Rational, Ensemble_Network;
+from    Library_Matrix          import Library_Matrix, Power_Cache;
+from    Evaluate_Derivatives    import Derivative_Plan, Forward_Derivative_Plan;
+from    Data                    import Iterate_Chunks;
 
 
 def Data_Loss(
@@ -63,6 +68,68 @@ def Data_Loss(
 
 
 
+def Streaming_Data_Loss(
+        U           : Network,
+        Inputs      : torch.Tensor,
+        Targets     : torch.Tensor,
+        Chunk_Size  : int,
+        Scale       : float         = 1.0,
+        Prefetch    : bool          = False,
+        Device      : torch.device  = torch.device('cpu')) -> torch.Tensor:
+    """ 
+    This function evaluates the data loss (see Data_Loss) one chunk of data 
+    points at a time (see Iterate_Chunks). If grad is enabled, we also 
+    back-propagate Scale times the loss, one chunk at a time: we add up the
+    gradient of each chunk's share of the loss as soon as we evaluate it, and
+    then free that chunk's graph. Thus, the memory we need depends on 
+    Chunk_Size, not on the number of data points. This lets us use data sets
+    that do not fit on the device (or in memory, see Data_Loader).
+
+    ----------------------------------------------------------------------------
+    Arguments:
+
+    U, Inputs, Targets: See Data_Loss. Inputs and Targets can live on the CPU
+    (and be memory-mapped), even if U lives on a GPU.
+
+    Chunk_Size: The number of data points in each chunk.
+
+    Scale: We back-propagate Scale times the loss (usually, the data loss' 
+    weight).
+
+    Prefetch: If True, we read the next chunk in the background while we 
+    evaluate the current one (see Iterate_Chunks).
+
+    Device: The device that U lives on.
+
+    ----------------------------------------------------------------------------
+    Returns:
+
+    A scalar tensor whose sole entry holds the mean square data loss. This 
+    tensor is NOT part of a graph (we have already back-propagated it).
+    """
+
+    Num_Points          : int           = Inputs.shape[0];
+    Sum_Square_Error    : torch.Tensor  = torch.zeros((), dtype = torch.float32, device = Device);
+
+    for (Inputs_Chunk, Targets_Chunk) in Iterate_Chunks(Inputs      = Inputs,
+                                                        Targets     = Targets,
+                                                        Chunk_Size  = Chunk_Size,
+                                                        Device      = Device,
+                                                        Prefetch    = Prefetch):
+        # Evaluate the chunk's sum of square errors.
+        U_Predict           : torch.Tensor = U(Inputs_Chunk).view(-1);
+        Chunk_Square_Error  : torch.Tensor = torch.sum((U_Predict - Targets_Chunk.view(-1))**2);
+
+        # Back-propagate the chunk's share of the (scaled) mean.
+        if(Chunk_Square_Error.requires_grad == True):
+            (Chunk_Square_Error*(Scale/Num_Points)).backward();
+
+        Sum_Square_Error += Chunk_Square_Error.detach();
+
+    return Sum_Square_Error/max(Num_Points, 1);
+
+
+
 def Coll_Loss(
         U           : Network,
         Xi          : torch.Tensor,
@@ -71,7 +138,10 @@ def Coll_Loss(
         Derivatives : List[Derivative],
         LHS_Term    : Term,
         RHS_Terms   : List[Term],
-        Device      : torch.device = torch.device('cpu')) -> Tuple[torch.Tensor, torch.Tensor]:
+        Plan        : Derivative_Plan   = None,
+        Library     : Library_Matrix    = None,
+        Point_Weights : torch.Tensor    = None,
+        Device      : torch.device      = torch.device('cpu')) -> Tuple[torch.Tensor, torch.Tensor]:
     """ 
     Let L(U) denote the library matrix (i,j entry is the jth RHS term evaluated
     at the ith collocation point. Further, let b(U) denote the vector whose ith 
@@ -86,9 +156,13 @@ def Coll_Loss(
     Xi: A trainable (requires_grad = True) torch 1D tensor. If there are N
     RHS_Terms, this should be an N element vector.
 
-    Mask: A boolean tensor whose shape matches that of Xi. When adding the kth 
-    RHS term to the Library_Xi product, we check if Mask[k] == False. If so, 
-    We add 0*Xi[k]. Otherwise, we compute the kth library term as usual.
+    Mask: A boolean tensor whose shape matches that of Xi. If Mask[k] == True,
+    we drop the kth column of L(U) (so that the kth RHS term, and Xi[k], have
+    no impact on the loss). We do not evaluate masked terms at all (see 
+    Library_Matrix.Set_Mask). If Library is not None, its mask must match 
+    this one (the caller should call Library.Set_Mask whenever the mask 
+    changes). We do not check this, since comparing the masks would force a
+    host sync every time we evaluate the loss.
 
     Coll_Points: B by n column tensor, where B is the number of coordinates and
     n is the dimension of the problem domain. The ith row of Coll_Points should
@@ -108,13 +182,29 @@ def Coll_Loss(
     RHS_Terms : A list of Term objects whose ith entry represents T_i in the
     equation above.
 
+    Plan : A Derivative_Plan or Forward_Derivative_Plan object built from 
+    Derivatives, or from the derivatives that the active terms need (see
+    Library_Matrix.Required_Derivatives). If None, we build a Derivative_Plan
+    for the latter. Building the plan is cheap, but callers that evaluate the
+    loss every epoch should build it once and pass it in.
+
+    Library : A Library_Matrix object built from Derivatives, LHS_Term, and 
+    RHS_Terms, whose mask matches Mask. If None, we build one (see Plan).
+
+    Point_Weights: A B element tensor whose ith entry holds the weight of the
+    ith collocation point, or None. If this is not None, the loss is the mean
+    of Point_Weights times the square residual (rather than the mean square 
+    residual). We use this when we do not draw the collocation points 
+    uniformly (see Importance_Points); the weights make the loss an unbiased
+    estimate of the mean square residual over the problem domain.
+
     Device: The device (gpu or cpu) that we train on.
 
     ----------------------------------------------------------------------------
     Returns:
 
     A tuple. The first entry of the tuple is a scalar tensor whose lone element
-    contains the mean square collocation loss at the Coll_Points. The second is a
+    contains the (weighted) mean square collocation loss at the Coll_Points. The second is a
     1D tensor whose ith entry holds the PDE residual at the ith collocation
     point. You can safely discard the second return variable if you just want
     to get the loss. 
@@ -123,129 +213,234 @@ def Coll_Loss(
     # Make sure Xi's length matches RHS_Terms'.
     assert(torch.numel(Xi) == len(RHS_Terms));
 
-    # Make sure Coll_Points requires grad.
-    Coll_Points.requires_grad_(True);
+    ############################################################################
+    # Set up the library.
 
-    # First, evaluate U at the Coll_Points.
-    U_Coords : torch.Tensor = U(Coll_Points).view(-1);
+    # If the caller did not give us a compiled library, build one, and give
+    # it the mask. The library only evaluates the active (un-masked) terms. 
+    # Otherwise, the caller has already set the library's mask.
+    if(Library is None):
+        Library = Library_Matrix(   Derivatives = Derivatives,
+                                    LHS_Term    = LHS_Term,
+                                    RHS_Terms   = RHS_Terms,
+                                    Device      = Coll_Points.device);
+        Library.Set_Mask(Mask);
 
 
 
     ############################################################################
-    # Form a dictionary housing D_j U, for each derivative D_j in Derivatives.
+    # Form a dictionary housing D_j U, for each derivative D_j that the active
+    # terms need.
 
-    # Initialize
-    D_U_Dict : Dict[Derivative] = {};
+    # If the caller did not give us a plan, build one. The plan computes each 
+    # derivative from the gradients of lower order ones. We only need the 
+    # derivatives that the active terms use.
+    if(Plan is None):
+        Plan = Derivative_Plan(Derivatives = Library.Required_Derivatives);
 
-    # Cycle through the derivatives.
-    for j in range(len(Derivatives)):
-        # Fetch D_j.
-        D_j : Derivative = Derivatives[j];
+    # A plan built for an earlier mask may not compute a derivative that the 
+    # current mask needs (if the new mask activates a term that the old one
+    # masked). Catch this here, rather than failing when we evaluate the 
+    # library.
+    Plan_Encodings  : set = set([tuple(numpy.trim_zeros(D.Encoding, 'b')) for D in Plan.Derivatives]);
+    Missing         : List[Derivative] = [D for D in Library.Required_Derivatives if tuple(numpy.trim_zeros(D.Encoding, 'b')) not in Plan_Encodings];
+    assert(len(Missing) == 0), ("The derivative plan does not compute %s, which the active library terms need. Rebuild the plan from Library.Required_Derivatives after changing the mask." %
+                               ", ".join([str(list(D.Encoding)) for D in Missing]));
 
-        # Check if we can compute D_j from any of the derivatives of U that
-        # we've already computed.
-        for i in range(j, 0):
-            # Get the ith derivative.
-            D_i : Derivative = Derivatives[i];
+    if(isinstance(Plan, Forward_Derivative_Plan)):
+        # The forward (and jet) plans evaluate U themselves.
+        D_U_Dict : Dict[Tuple, torch.Tensor] = Plan(U = U, Coords = Coll_Points);
+    else:
+        # Make sure Coll_Points requires grad, then evaluate U at the 
+        # Coll_Points.
+        Coll_Points.requires_grad_(True);
+        U_Coords : torch.Tensor = U(Coll_Points).view(-1);
 
-            # Check if D_i is a child of D_j.
-            if(D_i.Is_Child_Of(D_j)):
-                # If so, compute D_j U from D_i U.
-                D_j_U : torch.Tensor = Derivative_From_Derivative(
-                                        Da      = D_j,
-                                        Db      = D_i,
-                                        Db_U    = D_U_Dict[tuple(D_i.Encoding)],
-                                        Coords  = Coll_Points).view(-1);
+        D_U_Dict : Dict[Tuple, torch.Tensor] = Plan(U_Coords = U_Coords, Coords = Coll_Points);
 
 
-                # Store the result in the dictionary.
-                D_U_Dict[tuple(D_j.Encoding)] = D_j_U;
 
-                # Break!
-                break;
-        else:
-            # This runs if we do not encounter break in the for loop above.
-            # If we end up here, then we can not calculate D_j U from a
-            # derivative that we already computed. In this case, we must compute
-            # D_j U from U_Coords.
-            I : Derivative = Derivative(Encoding = numpy.array([0, 0]));
+    ############################################################################
+    # Construct b(U) and L(U) (see doc string).
 
-            # Compute D_j U.
-            D_j_U : torch.Tensor = Derivative_From_Derivative(
-                                    Da      = D_j,
-                                    Db      = I,
-                                    Db_U    = U_Coords,
-                                    Coords  = Coll_Points).view(-1);
+    # If we compiled the library, it can evaluate the residual in one go.
+    if(Library.Compiled == True):
+        Residual : torch.Tensor = Library.Residual(D_U_Dict = D_U_Dict, Xi = Xi);
+        return (_Mean_Square(Residual, Point_Weights), Residual);
 
-            # Store the result in the dictionary.
-            D_U_Dict[tuple(D_j.Encoding)] = D_j_U;
+    # Evaluate every term at once. The LHS and RHS terms share a cache of the
+    # powers of each derivative.
+    Cache       : Power_Cache = Power_Cache(D_U_Dict = D_U_Dict);
+    b_U, L_U    = Library.Evaluate(Cache);
 
 
 
     ############################################################################
-    # Construct b(U) (see doc string).
+    # Construct L(U)*Xi (see doc string).
 
-    # Initialize b_U to a vector of all ones.
-    b_U : torch.Tensor = torch.ones_like(U_Coords);
+    # L(U) only has columns for the active terms, so we only need the 
+    # corresponding components of Xi. This way, masked components of Xi have
+    # no impact on the loss.
+    L_U_Xi : torch.Tensor = torch.matmul(L_U, Xi[Library.Active_Indices]);
 
-    # Cycle through the sub-terms of the LHS Term.
-    for i in range(LHS_Term.Num_Sub_Terms):
-        # First, fetch the sub-term's derivative, power.
-        Di : Derivative = LHS_Term.Derivatives[i];
-        pi : int        = LHS_Term.Powers[i];
+    # Now, compute the residual, b(U) - L(U)Xi.
+    Residual : torch.Tensor = torch.subtract(b_U, L_U_Xi);
 
-        # Next, fetch its value from the dictionary.
-        Di_U : torch.Tensor = D_U_Dict[tuple(Di.Encoding)];
+    # Return the mean square residual (Collocation Loss), and the residual.
+    return (_Mean_Square(Residual, Point_Weights), Residual);
 
-        # Raise it to the sub term's power.
-        Di_U_pi : torch.Tensor = torch.pow(Di_U, pi);
 
-        # Accumulate D_i_U into b_U.
-        b_U = torch.multiply(b_U, Di_U_pi);
 
+def _Mean_Square(Residual : torch.Tensor, Point_Weights : torch.Tensor = None) -> torch.Tensor:
+    """
+    This function returns the mean of Residual**2, or, if Point_Weights is not
+    None, the mean of Point_Weights*Residual**2 (see Coll_Loss).
+    """
 
+    if(Point_Weights is None):
+        return (Residual**2).mean();
+    else:
+        return (Point_Weights.view(-1)*Residual**2).mean();
 
-    ############################################################################
-    # Construct L(U)*Xi (see doc string).
 
-    L_U_Xi : torch.Tensor = torch.zeros_like(b_U);
 
-    # Cycle through the RHS Terms.
-    for j in range(len(RHS_Terms)):
-        # Check if the jth term is masked. If so, move on.
-        if(Mask[j] == True):
-            L_U_Xi += 0.0*Xi[j];
-            continue;
-    
-        # Get the term.
-        T_j     : Term          = RHS_Terms[j];
+def Pad_And_Stack(Tensor_List : List[torch.Tensor]) -> Tuple[torch.Tensor, torch.Tensor]:
+    """
+    This function pads a list of K tensors, whose first dimensions may differ,
+    to a common length, B (the longest of the lengths), and then stacks them.
+    We pad each tensor using copies of its first entry (or zeros, if it is 
+    empty). This makes sure that we can safely evaluate a network at the 
+    padding. 
 
-        # Initialize a tensor to hold T_j(U).
-        T_j_U   : torch.Tensor  = torch.ones_like(U_Coords);
+    ----------------------------------------------------------------------------
+    Arguments:
 
-        # Cycle through T_j's sub-terms.
-        for i in range(T_j.Num_Sub_Terms):
-            # First, fetch the derivative, power for T_j's ith sub-term.
-            Di : Derivative = T_j.Derivatives[i];
-            pi : int        = T_j.Powers[i];
+    Tensor_List: A list of K tensors. Each tensor should have the same shape, 
+    except possibly along the first dimension.
 
-            # Next, fetch its value from the dictionary.
-            Di_U : torch.Tensor = D_U_Dict[tuple(Di.Encoding)];
+    ----------------------------------------------------------------------------
+    Returns:
 
-            # Raise it to the sub term's power.
-            Di_U_pi : torch.Tensor = torch.pow(Di_U, pi);
+    A tuple. The first entry is a tensor whose first dimension has length K*B.
+    Its kth block of B rows holds Tensor_List[k] followed by the padding. The
+    second entry is a K by B boolean tensor whose k, i entry is True if the 
+    ith row of the kth block is part of Tensor_List[k] (not padding).
+    """
 
-            # Accumulate D_i_U into T_j_U.
-            T_j_U = torch.multiply(T_j_U, Di_U_pi);
+    K : int = len(Tensor_List);
+    B : int = max([T.shape[0] for T in Tensor_List]);
 
-        # Accumulate T_j_U*Xi[j] into L_U_Xi.
-        L_U_Xi += torch.multiply(T_j_U, Xi[j]);
+    Padded_List : List[torch.Tensor] = [];
+    Valid       : torch.Tensor       = torch.zeros((K, B), dtype = torch.bool, device = Tensor_List[0].device);
+    for k in range(K):
+        T       : torch.Tensor  = Tensor_List[k];
+        Num_Pad : int           = B - T.shape[0];
 
-    # Now, compute the residual, b(U) - L(U)Xi.
-    Residual : torch.Tensor = torch.subtract(b_U, L_U_Xi);
+        if(T.shape[0] == 0):
+            Padding : torch.Tensor = torch.zeros((Num_Pad,) + tuple(T.shape[1:]), dtype = T.dtype, device = T.device);
+        else:
+            Padding : torch.Tensor = T[0:1].expand((Num_Pad,) + tuple(T.shape[1:]));
+        
+        Padded_List.append(torch.cat((T, Padding), dim = 0));
+        Valid[k, :T.shape[0]] = True;
 
-    # Return the mean square residual (Collocation Loss), and the residual.
-    return ((Residual**2).mean(), Residual);
+    return (torch.cat(Padded_List, dim = 0), Valid);
+
+
+
+def Ensemble_Data_Loss(
+        U               : Ensemble_Network,
+        Inputs_List     : List[torch.Tensor],
+        Targets_List    : List[torch.Tensor]) -> List[torch.Tensor]:
+    """ 
+    This function evaluates the data loss (see Data_Loss) for every network in
+    an ensemble at once. Inputs_List[k] and Targets_List[k] hold the data 
+    points for the kth network in the ensemble. The data sets can have 
+    different numbers of points (we pad them, see Pad_And_Stack).
+
+    ----------------------------------------------------------------------------
+    Returns:
+
+    A list of K scalar tensors whose kth entry holds the kth network's mean
+    square data loss.
+    """
+
+    assert(len(Inputs_List) == U.Num_Networks);
+    assert(len(Targets_List) == U.Num_Networks);
+
+    Inputs,  Valid  = Pad_And_Stack(Inputs_List);
+    Targets, _      = Pad_And_Stack(Targets_List);
+
+    # Evaluate the ensemble, then find the square error at each (real) point.
+    U_Predict       : torch.Tensor = U(Inputs).view(Valid.shape);
+    Square_Error    : torch.Tensor = torch.where(Valid, (U_Predict - Targets.view(Valid.shape)) ** 2, torch.zeros_like(U_Predict));
+
+    # Return the mean square error for each network.
+    Losses : torch.Tensor = Square_Error.sum(dim = 1)/torch.clamp(Valid.sum(dim = 1), min = 1);
+    return [Losses[k] for k in range(U.Num_Networks)];
+
+
+
+def Ensemble_Coll_Loss(
+        U                   : Ensemble_Network,
+        Xi                  : torch.Tensor,
+        Mask                : torch.Tensor,
+        Coll_Points_List    : List[torch.Tensor],
+        Derivatives         : List[Derivative],
+        LHS_Term            : Term,
+        RHS_Terms           : List[Term],
+        Plan                : Derivative_Plan   = None,
+        Library             : Library_Matrix    = None,
+        Point_Weights_List  : List[torch.Tensor] = None,
+        Device              : torch.device      = torch.device('cpu')) -> Tuple[List[torch.Tensor], List[torch.Tensor]]:
+    """ 
+    This function evaluates the collocation loss (see Coll_Loss) for every 
+    network in an ensemble at once. Coll_Points_List[k] holds the collocation
+    points for the kth network. These can have different numbers of points (we
+    pad them, see Pad_And_Stack). If Point_Weights_List is not None, its kth 
+    entry holds the weights of Coll_Points_List[k] (see Coll_Loss' 
+    Point_Weights). The other arguments are the same as Coll_Loss'.
+
+    ----------------------------------------------------------------------------
+    Returns:
+
+    A tuple. The first entry is a list of K scalar tensors whose kth entry 
+    holds the kth network's mean square collocation loss. The second is a list
+    of K 1D tensors whose kth entry holds the PDE residual at each of 
+    Coll_Points_List[k].
+    """
+
+    assert(len(Coll_Points_List) == U.Num_Networks);
+
+    # Evaluate the residual at every point (including the padding).
+    Coll_Points, Valid  = Pad_And_Stack(Coll_Points_List);
+    _, Residual         = Coll_Loss(U           = U,
+                                    Xi          = Xi,
+                                    Mask        = Mask,
+                                    Coll_Points = Coll_Points,
+                                    Derivatives = Derivatives,
+                                    LHS_Term    = LHS_Term,
+                                    RHS_Terms   = RHS_Terms,
+                                    Plan        = Plan,
+                                    Library     = Library,
+                                    Device      = Device);
+    Residual            = Residual.view(Valid.shape);
+
+    # Find each network's mean square residual, ignoring the padding.
+    Counts          : torch.Tensor = Valid.sum(dim = 1);
+    Square_Residual : torch.Tensor = torch.where(Valid, Residual**2, torch.zeros_like(Residual));
+    if(Point_Weights_List is not None):
+        Point_Weights, _ = Pad_And_Stack([Point_Weights.view(-1) for Point_Weights in Point_Weights_List]);
+        Square_Residual  = Square_Residual*Point_Weights.view(Valid.shape);
+    Losses          : torch.Tensor = Square_Residual.sum(dim = 1)/torch.clamp(Counts, min = 1);
+
+    Loss_List       : List[torch.Tensor] = [];
+    Residual_List   : List[torch.Tensor] = [];
+    for k in range(U.Num_Networks):
+        Loss_List.append(Losses[k]);
+        Residual_List.append(Residual[k, :Coll_Points_List[k].shape[0]]);
+
+    return (Loss_List, Residual_List);
 
 
 
@@ -278,34 +473,26 @@ def Lp_Loss(Xi : torch.Tensor, Mask : torch.Tensor, p : float):
 
     assert(p > 0 and p < 2)
 
-    # First, square the components of Xi. Also, make a double precision copy of
-    # Xi that is detached from Xi's graph.
+    # First, square the components of Xi. Also, make a copy of Xi that is 
+    # detached from Xi's graph (the weights are constants).
     delta : float = .0000001;
     Xi_2          = torch.mul(Xi, Xi);
     Xi_Detach     = torch.detach(Xi);
 
-    # Now, define a weights tensor.
-    W               = torch.empty_like(Xi_Detach);
-    N : int         = W.numel();
-    for k in range(N):
-        if(Mask[k] == True):
-            W[k] = 0.0;
-            continue;
-
-        # First, obtain the absolute value of the kth component of Xi, as a float.
-        Abs_Xi_k    : float = abs(Xi[k].item());
-
-        # Now, evaluate W[k].
-        W_k  = 1./max(delta, Abs_Xi_k**(2 - p));
-
-        # Check for infinity (which can happen, unfortunately, if delta is too
-        # small). If so, remedy it.
-        if(math.isinf(W_k)):
-            print("W_k got to infinity");
-            print("Abs_Xi_k = %f" % Abs_Xi_k);
-            W_k = 0;
-
-        W[k] = W_k;
+    # Now, evaluate the weights. We do this using tensor operations (rather 
+    # than looping through the components of Xi) to avoid pulling each 
+    # component of Xi back to the host. We compute the weights in double 
+    # precision and then cast them back to Xi's type.
+    Abs_Xi  = torch.abs(Xi_Detach.to(dtype = torch.float64));
+    W       = torch.reciprocal(torch.clamp(torch.pow(Abs_Xi, 2 - p), min = delta));
+
+    # Check for infinity (which can happen, unfortunately, if delta is too
+    # small). If so, remedy it. Also zero out the weights of masked components
+    # (so they do not contribute to the loss). We use torch.where rather than
+    # selecting the active components, since the number of active components
+    # depends on Mask's values (finding it would force a host sync).
+    W = torch.where(torch.logical_or(torch.isinf(W), Mask.to(device = W.device)), torch.zeros_like(W), W);
+    W = W.to(dtype = Xi_Detach.dtype);
 
     # Finally, evaluate the element-wise product of Xi and W[k].
     W_Xi_2 = torch.mul(W, Xi_2);
@@ -358,4 +545,56 @@ def L2_Squared_Loss(U : Network) -> torch.Tensor:
             Loss += torch.sum(torch.multiply(AF.a, AF.a));
             Loss += torch.sum(torch.multiply(AF.b, AF.b));
     
-    return Loss;
\ No newline at end of file
+    return Loss;
+
+
+
+def main():
+    # Report Coll_Loss' throughput (collocation points per second, including
+    # the backward pass) for several numbers of intra-op threads. Use this to 
+    # pick the "Intra-op Threads" setting for a machine. We use the library in
+    # Library.txt and a network with the default architecture.
+    from Library_Reader import Read_Library;
+
+    Derivatives, LHS_Term, RHS_Terms = Read_Library(os.path.join(Code_Path, "..", "Library.txt"));
+    Num_Dim : int = Derivatives[0].Encoding.size;
+
+    torch.manual_seed(0);
+    U           : Network           = Network(Widths = [Num_Dim, 20, 20, 20, 20, 20, 1], Hidden_Activation = "Rational");
+    Xi          : torch.Tensor      = torch.rand(len(RHS_Terms), dtype = torch.float32, requires_grad = True);
+    Mask        : torch.Tensor      = torch.zeros(len(RHS_Terms), dtype = torch.bool);
+    Plan        : Derivative_Plan   = Derivative_Plan(Derivatives = Derivatives);
+    Library     : Library_Matrix    = Library_Matrix(Derivatives = Derivatives, LHS_Term = LHS_Term, RHS_Terms = RHS_Terms);
+
+    # Try 1, 2, 4, ... threads, as well as one thread per core.
+    Num_Cores           : int       = os.cpu_count() or 1;
+    Num_Threads_List    : List[int] = [2**k for k in range(int(math.log2(Num_Cores)) + 1)];
+    if(Num_Cores not in Num_Threads_List):
+        Num_Threads_List.append(Num_Cores);
+
+    Num_Trials  : int = 5;
+    for Num_Threads in Num_Threads_List:
+        torch.set_num_threads(Num_Threads);
+
+        for Num_Points in [1000, 10000]:
+            Coll_Points : torch.Tensor = torch.rand((Num_Points, Num_Dim), dtype = torch.float32);
+
+            Timer : float = time.perf_counter();
+            for i in range(Num_Trials):
+                Loss, Residual = Coll_Loss( U           = U, 
+                                            Xi          = Xi, 
+                                            Mask        = Mask, 
+                                            Coll_Points = Coll_Points, 
+                                            Derivatives = Derivatives, 
+                                            LHS_Term    = LHS_Term, 
+                                            RHS_Terms   = RHS_Terms, 
+                                            Plan        = Plan, 
+                                            Library     = Library);
+                Loss.backward();
+            Runtime : float = (time.perf_counter() - Timer)/Num_Trials;
+
+            print("Threads = %3u, Num_Points = %6u: %9.6fs per call, %.3e points/s" % (Num_Threads, Num_Points, Runtime, Num_Points/Runtime));
+
+
+if __name__ == "__main__":
+    main();
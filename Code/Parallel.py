@@ -0,0 +1,255 @@
+import  os;
+import  socket;
+import  torch;
+import  torch.distributed;
+from    typing import List, Dict, Any;
+
+
+
+def Find_Free_Port() -> int:
+    """
+    This function asks the operating system for a free TCP port on this
+    machine. The worker processes use this port to find each other (see
+    Setup_Process_Group).
+    """
+
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as Socket:
+        Socket.bind(("127.0.0.1", 0));
+        return Socket.getsockname()[1];
+
+
+
+def Setup_Process_Group(Rank        : int,
+                        World_Size  : int,
+                        Port        : int) -> None:
+    """
+    This function connects the calling process to the other worker processes.
+    We use torch.distributed with the gloo backend, which runs on the CPU.
+    Every worker must call this function (with the same World_Size and Port,
+    but a different Rank) before training. Each worker should then call
+    Configure_Threads (so that the workers do not over-subscribe the cores).
+
+    ----------------------------------------------------------------------------
+    Arguments:
+
+    Rank : The index of the calling process. This should be in
+    {0, 1, ... , World_Size - 1}.
+
+    World_Size : The number of worker processes.
+
+    Port : A free port on this machine (see Find_Free_Port).
+    """
+
+    os.environ["MASTER_ADDR"] = "127.0.0.1";
+    os.environ["MASTER_PORT"] = str(Port);
+
+    torch.distributed.init_process_group(   backend     = "gloo",
+                                            rank        = Rank,
+                                            world_size  = World_Size);
+
+
+
+def Configure_Threads(  Intra_Threads   : int,
+                        Inter_Threads   : int,
+                        Affinity        : List[int],
+                        Rank            : int = 0,
+                        World_Size      : int = 1) -> None:
+    """
+    This function sets up the calling process' threads. torch uses two thread
+    pools on the CPU: "intra-op" threads split the work of a single operation
+    (like a matrix multiply), while "inter-op" threads run independent 
+    operations at the same time. By default, torch uses one intra-op thread 
+    per core. This is a poor choice if several processes share the machine 
+    (each process thinks it owns every core, so the processes fight each 
+    other). 
+
+    Call this function at the start of the program (or worker), before torch
+    runs any operations. torch can only set the number of inter-op threads 
+    once, and only before it uses them.
+
+    ----------------------------------------------------------------------------
+    Arguments:
+
+    Intra_Threads : The number of intra-op threads. If None, we use one thread
+    per core that the process can use (if there are several workers, the 
+    workers split the cores evenly).
+
+    Inter_Threads : The number of inter-op threads. If None, we use torch's 
+    default.
+
+    Affinity : A list of the cores that the process can run on, or None. If 
+    there are several workers, we split these cores evenly between the 
+    workers (each worker gets a contiguous block of the list). If None, the
+    process can run on any core. Only some operating systems (e.g., Linux) 
+    support this.
+
+    Rank, World_Size : The calling worker's index and the number of workers
+    (see Setup_Process_Group).
+    """
+
+    # First, pin the process to its cores (if we want to).
+    if(Affinity is not None):
+        Start   : int       = (Rank*len(Affinity)) // World_Size;
+        End     : int       = ((Rank + 1)*len(Affinity)) // World_Size;
+        Cores   : List[int] = Affinity[Start:End] if End > Start else Affinity;
+
+        if(hasattr(os, "sched_setaffinity")):
+            os.sched_setaffinity(0, Cores);
+            Num_Cores : int = len(Cores);
+        else:
+            print("This operating system does not support CPU affinity. Ignoring \"CPU Affinity\".");
+            Num_Cores : int = max((os.cpu_count() or 1) // World_Size, 1);
+    else:
+        Num_Cores : int = max((os.cpu_count() or 1) // World_Size, 1);
+
+    # Now set the number of intra-op threads. We leave torch's default alone
+    # if there is one process and it can use every core.
+    if(Intra_Threads is not None):
+        torch.set_num_threads(Intra_Threads);
+    elif(Affinity is not None or World_Size > 1):
+        torch.set_num_threads(Num_Cores);
+
+    # Finally, set the number of inter-op threads.
+    if(Inter_Threads is not None):
+        try:
+            torch.set_num_interop_threads(Inter_Threads);
+        except RuntimeError:
+            print("Could not set the number of inter-op threads (torch has already started using them). Ignoring \"Inter-op Threads\".");
+
+
+
+def Cleanup_Process_Group() -> None:
+    """
+    This function disconnects the calling process from the other workers.
+    Each worker should call this once it is done training.
+    """
+
+    if(Is_Distributed() == True):
+        torch.distributed.destroy_process_group();
+
+
+
+def Is_Distributed() -> bool:
+    """
+    This function returns True if the calling process is one of several
+    worker processes (that is, if the calling process has called
+    Setup_Process_Group), and False otherwise.
+    """
+
+    return torch.distributed.is_available() and torch.distributed.is_initialized();
+
+
+
+def Owned_DataSets( Num_DataSets    : int,
+                    Rank            : int,
+                    World_Size      : int) -> List[int]:
+    """
+    This function determines which data sets a worker owns. Each worker trains
+    the networks for its data sets (and only those data sets), while every
+    worker trains Xi. We assign the data sets round-robin: worker r owns data
+    sets r, r + World_Size, r + 2*World_Size, ... .
+
+    ----------------------------------------------------------------------------
+    Arguments:
+
+    Num_DataSets : The total number of data sets.
+
+    Rank, World_Size : The calling worker's index and the number of workers
+    (see Setup_Process_Group). If World_Size = 1, the only worker owns every
+    data set.
+
+    ----------------------------------------------------------------------------
+    Returns:
+
+    A list housing the indices of the data sets that the worker owns, in
+    increasing order.
+    """
+
+    assert(World_Size >= 1);
+    assert(World_Size <= Num_DataSets);
+    assert(Rank >= 0 and Rank < World_Size);
+
+    return list(range(Rank, Num_DataSets, World_Size));
+
+
+
+def All_Reduce_Sum(X : torch.Tensor) -> None:
+    """
+    If the calling process is one of several workers, this function replaces
+    X (in place) with the sum of X over every worker. Otherwise, it does
+    nothing.
+
+    Training uses this function to add up each worker's contribution to the
+    gradient of the loss with respect to Xi. Since each worker owns different
+    data sets, and the loss is a sum over the data sets, the sum of the
+    workers' gradients is the gradient that a single process would get.
+    """
+
+    if(Is_Distributed() == True):
+        torch.distributed.all_reduce(X, op = torch.distributed.ReduceOp.SUM);
+
+
+
+def All_Reduce_Max(X : torch.Tensor) -> None:
+    """
+    If the calling process is one of several workers, this function replaces
+    X (in place) with the maximum of X over every worker. Otherwise, it does
+    nothing.
+
+    Training uses this function to agree on the number of optimizer steps in
+    an epoch. Each step all-reduces the gradient with respect to Xi, so every
+    worker must take the same number of steps (even if its data sets need 
+    fewer).
+    """
+
+    if(Is_Distributed() == True):
+        torch.distributed.all_reduce(X, op = torch.distributed.ReduceOp.MAX);
+
+
+
+def Gather_DataSet_Lists(   Local_Dict      : Dict[str, List[Any]],
+                            Owned           : List[int],
+                            Num_DataSets    : int) -> Dict[str, List[Any]]:
+    """
+    Each worker reports its losses (and network states) as lists whose ith
+    entry corresponds to its ith data set (the data set whose index is
+    Owned[i]). This function collects these lists from every worker and
+    arranges them into lists whose ith entry corresponds to the ith data set
+    (of all the data sets). Every worker must call this function.
+
+    ----------------------------------------------------------------------------
+    Arguments:
+
+    Local_Dict : A dictionary whose values are lists with one entry per data
+    set that the calling worker owns. Every worker must use the same keys.
+    Entries must be picklable.
+
+    Owned : The indices of the data sets that the calling worker owns (see
+    Owned_DataSets).
+
+    Num_DataSets : The total number of data sets.
+
+    ----------------------------------------------------------------------------
+    Returns:
+
+    A dictionary with the same keys as Local_Dict. Each value is a list with
+    Num_DataSets entries. If there is only one worker, this is just Local_Dict.
+    """
+
+    if(Is_Distributed() == False):
+        return Local_Dict;
+
+    World_Size      : int         = torch.distributed.get_world_size();
+    Gathered_List   : List[tuple] = [None]*World_Size;
+    torch.distributed.all_gather_object(Gathered_List, (Owned, Local_Dict));
+
+    Global_Dict : Dict[str, List[Any]] = {};
+    for Key in Local_Dict.keys():
+        Global_Dict[Key] = [None]*Num_DataSets;
+
+    for (Worker_Owned, Worker_Dict) in Gathered_List:
+        for Key in Global_Dict.keys():
+            for j in range(len(Worker_Owned)):
+                Global_Dict[Key][Worker_Owned[j]] = Worker_Dict[Key][j];
+
+    return Global_Dict;
@@ -1,16 +1,199 @@
 import numpy;
 import torch;
-import random;
+import time;
+from   typing import Dict, List, Callable, Tuple;
+
+
+
+def Uniform_Sampler(
+        Num_Points  : int,
+        Num_Dim     : int,
+        Device      : torch.device,
+        Generator   : torch.Generator = None) -> torch.Tensor:
+    """
+    This function draws Num_Points independent, uniformly distributed points
+    in the unit cube, [0, 1]^Num_Dim. 
+
+    All of the samplers in this file share this function's signature: they 
+    take the number of points, the number of dimensions, a device, and an
+    (optional) random number generator, and return a Num_Points by Num_Dim 
+    tensor (on Device) whose rows lie in [0, 1]^Num_Dim. Generate_Points maps 
+    these points onto the problem domain.
+    """
+
+    return torch.rand(  (Num_Points, Num_Dim),
+                        generator   = Generator,
+                        dtype       = torch.float32,
+                        device      = Device);
+
+
+
+def _Random_Seed(Generator : torch.Generator = None) -> int:
+    """ 
+    This function uses Generator to draw a seed for samplers (like the Sobol
+    sampler) which have their own random number generator. 
+    """
+
+    if(Generator is None):
+        return torch.randint(0, 2**31 - 1, (1,)).item();
+    else:
+        return torch.randint(0, 2**31 - 1, (1,), generator = Generator, device = Generator.device).item();
+
+
+
+def Sobol_Sampler(
+        Num_Points  : int,
+        Num_Dim     : int,
+        Device      : torch.device,
+        Generator   : torch.Generator = None) -> torch.Tensor:
+    """
+    This function returns the first Num_Points points of a scrambled Sobol 
+    sequence in [0, 1]^Num_Dim. We draw the scrambling seed using Generator,
+    meaning each call gives a new (randomized) low-discrepancy point set. See
+    Uniform_Sampler for a description of the arguments and return value.
+    """
+
+    Engine = torch.quasirandom.SobolEngine( dimension   = Num_Dim,
+                                            scramble    = True,
+                                            seed        = _Random_Seed(Generator));
+
+    return Engine.draw(Num_Points, dtype = torch.float32).to(device = Device);
+
+
+
+# The first few primes. The Halton sampler uses the ith prime as the base for 
+# the ith coordinate.
+Primes : List[int] = [2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37];
+
+def Halton_Sampler(
+        Num_Points  : int,
+        Num_Dim     : int,
+        Device      : torch.device,
+        Generator   : torch.Generator = None) -> torch.Tensor:
+    """
+    This function returns Num_Points points of a randomly shifted Halton 
+    sequence in [0, 1]^Num_Dim. The jth coordinate of the ith Halton point is 
+    the radical inverse of i in base Primes[j]. To randomize the sequence, we 
+    add a random shift to every point (modulo 1). See Uniform_Sampler for a 
+    description of the arguments and return value.
+    """
+
+    assert(Num_Dim <= len(Primes));
+
+    # Compute the radical inverses in double precision. We use the identity
+    #       phi(i) = ((i mod Base) + phi(floor(i/Base)))/Base,
+    # where phi is the radical inverse (in base Base). This lets us build the 
+    # table of phi(0), ... , phi(Base^(m + 1) - 1) from the table of phi(0), ... ,
+    # phi(Base^m - 1) with a single gather. We skip the 0 index (which maps to 
+    # the origin).
+    Points  : torch.Tensor = torch.empty((Num_Points, Num_Dim), dtype = torch.float64, device = Device);
+
+    for j in range(Num_Dim):
+        Base    : int           = Primes[j];
+        Phi     : torch.Tensor  = torch.zeros(1, dtype = torch.float64, device = Device);
+
+        while(Phi.numel() < Num_Points + 1):
+            Indices : torch.Tensor = torch.arange(Phi.numel()*Base, dtype = torch.int64, device = Device);
+            Phi = (torch.remainder(Indices, Base).to(dtype = torch.float64) + Phi[torch.div(Indices, Base, rounding_mode = "floor")])/Base;
+
+        Points[:, j] = Phi[1:(Num_Points + 1)];
+
+    # Apply a random shift.
+    Shift : torch.Tensor = torch.rand(Num_Dim, generator = Generator, dtype = torch.float64, device = Device);
+    Points = torch.remainder(Points + Shift, 1.0);
+
+    return Points.to(dtype = torch.float32);
+
+
+
+def Latin_Hypercube_Sampler(
+        Num_Points  : int,
+        Num_Dim     : int,
+        Device      : torch.device,
+        Generator   : torch.Generator = None) -> torch.Tensor:
+    """
+    This function returns a Latin hypercube sample of Num_Points points in 
+    [0, 1]^Num_Dim. We split each axis into Num_Points equal intervals; along
+    every axis, each interval contains exactly one point. See Uniform_Sampler 
+    for a description of the arguments and return value.
+    """
+
+    # We work in double precision. In single precision, Permutation + Points 
+    # can round up to the next integer (moving the point to the next interval)
+    # when Num_Points is large.
+    Points : torch.Tensor = torch.rand( (Num_Points, Num_Dim),
+                                        generator   = Generator,
+                                        dtype       = torch.float64,
+                                        device      = Device);
+
+    # Shuffle the intervals independently along each axis.
+    for j in range(Num_Dim):
+        Permutation : torch.Tensor = torch.randperm(Num_Points, generator = Generator, device = Device);
+        Points[:, j] += Permutation.to(dtype = torch.float64);
+
+    return Points.div_(Num_Points).to(dtype = torch.float32);
+
+
+
+def Stratified_Grid_Sampler(
+        Num_Points  : int,
+        Num_Dim     : int,
+        Device      : torch.device,
+        Generator   : torch.Generator = None) -> torch.Tensor:
+    """
+    This function returns a jittered (stratified) grid sample of Num_Points 
+    points in [0, 1]^Num_Dim. Let k be the largest integer such that 
+    k^Num_Dim <= Num_Points. We split the unit cube into a k x ... x k grid of 
+    cells and draw one uniformly distributed point from each cell. We draw the
+    remaining Num_Points - k^Num_Dim points uniformly from the whole cube. See 
+    Uniform_Sampler for a description of the arguments and return value.
+    """
+
+    # Find k. We round first to avoid floating point trouble (e.g., 
+    # 1000^(1/3) = 9.999...).
+    k : int = max(1, int(round(Num_Points ** (1.0/Num_Dim))));
+    while(k**Num_Dim > Num_Points):
+        k -= 1;
+    Num_Cells : int = k**Num_Dim;
+
+    # Build the (integer) coordinates of the lower corner of each cell.
+    Axis    : torch.Tensor = torch.arange(k, dtype = torch.float32, device = Device);
+    Corners : torch.Tensor = torch.cartesian_prod(*([Axis]*Num_Dim)).reshape(Num_Cells, Num_Dim);
+
+    # Jitter each point within its cell.
+    Jitter  : torch.Tensor = torch.rand((Num_Cells, Num_Dim), generator = Generator, dtype = torch.float32, device = Device);
+    Grid_Points : torch.Tensor = (Corners + Jitter)/k;
+
+    # Fill in the rest of the points uniformly.
+    Extra_Points : torch.Tensor = Uniform_Sampler(  Num_Points  = Num_Points - Num_Cells,
+                                                    Num_Dim     = Num_Dim,
+                                                    Device      = Device,
+                                                    Generator   = Generator);
+
+    return torch.vstack((Grid_Points, Extra_Points));
+
+
+
+# The samplers that Generate_Points knows about. To add a new sampler, write a
+# function with the same signature as Uniform_Sampler and add it here.
+Samplers : Dict[str, Callable] = {  "Uniform"   : Uniform_Sampler,
+                                    "Sobol"     : Sobol_Sampler,
+                                    "Halton"    : Halton_Sampler,
+                                    "LHS"       : Latin_Hypercube_Sampler,
+                                    "Grid"      : Stratified_Grid_Sampler};
 
 
 
 def Generate_Points(
         Bounds     : numpy.array,
         Num_Points : int,
-        Device     : torch.device = torch.device('cpu')) -> torch.Tensor:
+        Device     : torch.device       = torch.device('cpu'),
+        Generator  : torch.Generator    = None,
+        Sampler    : str                = "Uniform") -> torch.Tensor:
     """ 
     This function generates a two-dimensional tensor, each row of which holds a 
     randomly generated coordinate that lies in the rectangle defined by Bounds.
+    We draw every coordinate at once, directly on Device.
 
     ----------------------------------------------------------------------------
     Arguments:
@@ -22,6 +205,14 @@ def Generate_Points(
 
     Device: The device you want the Point tensor to be stored on.
 
+    Generator: The random number generator we draw the points with. This 
+    should live on Device. If you pass the same (seeded) generator each time, 
+    you get reproducible points. If None, we use torch's default generator.
+
+    Sampler: The name of the sampler we use to draw the points. This must be 
+    a key of the Samplers dictionary ("Uniform", "Sobol", "Halton", "LHS", or
+    "Grid").
+
     ----------------------------------------------------------------------------
     Returns:
 
@@ -41,19 +232,150 @@ def Generate_Points(
     for j in range(Num_Dim):
         assert(Bounds[j, 0] <= Bounds[j, 1]);
 
-    # Make a tensor to hold all the points.
-    Points = torch.empty((Num_Points, Num_Dim),
-                          dtype  = torch.float32,
-                          device = Device);
+    # Fetch the lower bound and the side length of the rectangle along each 
+    # axis.
+    Lower_Bounds    : torch.Tensor = torch.tensor(numpy.asarray(Bounds[:, 0]), dtype = torch.float32, device = Device);
+    Upper_Bounds    : torch.Tensor = torch.tensor(numpy.asarray(Bounds[:, 1]), dtype = torch.float32, device = Device);
+    Widths          : torch.Tensor = Upper_Bounds - Lower_Bounds;
 
-    # Populate the coordinates in Points, one coordinate at a time.
-    for j in range(Num_Dim):
-        # Get the upper and lower bounds for the jth coordinate.
-        Lower_Bound : float = Bounds[j, 0];
-        Upper_Bound : float = Bounds[j, 1];
-
-        # Cycle through the points.
-        for i in range(Num_Points):
-            Points[i, j] = random.uniform(Lower_Bound, Upper_Bound);
+    # Draw points in the unit cube, [0, 1]^n, then map them to the rectangle.
+    Points : torch.Tensor = Samplers[Sampler](  Num_Points  = Num_Points,
+                                                Num_Dim     = Num_Dim,
+                                                Device      = Device,
+                                                Generator   = Generator);
+    Points.mul_(Widths).add_(Lower_Bounds);
 
     return Points;
+
+
+
+def Importance_Points(
+        Bounds      : numpy.array,
+        Num_Points  : int,
+        Old_Points  : torch.Tensor,
+        Residuals   : torch.Tensor,
+        Exponent    : float             = 2.0,
+        Grid_Size   : int               = 10,
+        Mix         : float             = 0.1,
+        Device      : torch.device      = torch.device('cpu'),
+        Generator   : torch.Generator   = None) -> Tuple[torch.Tensor, torch.Tensor]:
+    """
+    This function draws collocation points from a density that is (roughly)
+    proportional to |R|^Exponent, where R is the PDE residual. We estimate this
+    density using the residuals at the previous epoch's collocation points: We
+    split the rectangle defined by Bounds into a Grid_Size x ... x Grid_Size
+    grid of cells and find the mean of |R|^Exponent in each cell (cells
+    without any old points get the mean over every cell). We then pick each
+    point's cell with probability
+            P(cell) = (1 - Mix)*(cell's mean)/(sum of the means) + Mix/(number of cells),
+    and draw the point uniformly from that cell. The Mix term makes sure we
+    keep drawing some points from every cell.
+
+    Since we do not draw the points uniformly, the plain mean of the square
+    residual over these points over-weights the cells where the residual is
+    large. To fix this, we also return a weight for each point:
+            w = 1/(P(cell)*(number of cells)),
+    (the ratio of the uniform density to the density we drew the point from).
+    The mean of w*R^2 over the points is an unbiased estimate of the mean
+    square residual over the rectangle (see Coll_Loss' Point_Weights).
+
+    ----------------------------------------------------------------------------
+    Arguments:
+
+    Bounds, Num_Points, Device, Generator: See Generate_Points.
+
+    Old_Points: A B by n tensor whose rows hold the previous epoch's
+    collocation points.
+
+    Residuals: A B element tensor whose ith entry holds the PDE residual at
+    the ith row of Old_Points.
+
+    Exponent: We draw points with density proportional to |R|^Exponent.
+
+    Grid_Size: The number of cells along each axis.
+
+    Mix: The share of points that we (effectively) draw uniformly. This should
+    be in (0, 1].
+
+    ----------------------------------------------------------------------------
+    Returns:
+
+    A tuple. The first entry is a Num_Points by n tensor whose rows hold the
+    new points. The second is a Num_Points element tensor whose ith entry
+    holds the weight of the ith point.
+    """
+
+    assert(Grid_Size > 0);
+    assert(Mix > 0 and Mix <= 1);
+
+    Num_Dim     : int = Bounds.shape[0];
+    Num_Cells   : int = Grid_Size**Num_Dim;
+
+    Lower_Bounds    : torch.Tensor = torch.tensor(numpy.asarray(Bounds[:, 0]), dtype = torch.float32, device = Device);
+    Upper_Bounds    : torch.Tensor = torch.tensor(numpy.asarray(Bounds[:, 1]), dtype = torch.float32, device = Device);
+    Widths          : torch.Tensor = Upper_Bounds - Lower_Bounds;
+
+    # The cell's index along each axis is floor(Grid_Size*(x - a)/(b - a)).
+    # We flatten these into a single index (in row-major order).
+    Strides : torch.Tensor = Grid_Size**torch.arange(Num_Dim - 1, -1, -1, dtype = torch.int64, device = Device);
+
+    ############################################################################
+    # Estimate the mean of |R|^Exponent in each cell.
+
+    Old_Unit    : torch.Tensor = (Old_Points.detach().to(device = Device) - Lower_Bounds)/torch.clamp(Widths, min = 1e-12);
+    Old_Cells   : torch.Tensor = torch.clamp((Old_Unit*Grid_Size).to(dtype = torch.int64), 0, Grid_Size - 1);
+    Old_Indices : torch.Tensor = torch.sum(Old_Cells*Strides, dim = 1);
+
+    Values      : torch.Tensor = torch.abs(Residuals.detach().to(device = Device, dtype = torch.float32))**Exponent;
+    Sums        : torch.Tensor = torch.zeros(Num_Cells, dtype = torch.float32, device = Device).index_add_(0, Old_Indices, Values);
+    Counts      : torch.Tensor = torch.zeros(Num_Cells, dtype = torch.float32, device = Device).index_add_(0, Old_Indices, torch.ones_like(Values));
+
+    Overall     : torch.Tensor = torch.mean(Values) if Values.numel() > 0 else torch.ones(1, device = Device)[0];
+    Means       : torch.Tensor = torch.where(Counts > 0, Sums/torch.clamp(Counts, min = 1), Overall);
+
+    # Build the cell probabilities. If every mean is zero, fall back to
+    # uniform.
+    Total : float = torch.sum(Means).item();
+    if(Total > 0):
+        Probabilities : torch.Tensor = (1 - Mix)*Means/Total + Mix/Num_Cells;
+    else:
+        Probabilities : torch.Tensor = torch.full((Num_Cells,), 1.0/Num_Cells, dtype = torch.float32, device = Device);
+
+
+    ############################################################################
+    # Draw the points: pick cells, then draw uniformly within each cell.
+
+    Cell_Indices : torch.Tensor = torch.multinomial(Probabilities, num_samples = Num_Points, replacement = True, generator = Generator);
+
+    # Recover each cell's index along each axis.
+    Cells   : torch.Tensor = torch.div(Cell_Indices.view(-1, 1), Strides, rounding_mode = "floor") % Grid_Size;
+    Jitter  : torch.Tensor = torch.rand((Num_Points, Num_Dim), generator = Generator, dtype = torch.float32, device = Device);
+
+    Points  : torch.Tensor = ((Cells.to(dtype = torch.float32) + Jitter)/Grid_Size)*Widths + Lower_Bounds;
+    Weights : torch.Tensor = 1.0/(Probabilities[Cell_Indices]*Num_Cells);
+
+    return (Points, Weights);
+
+
+
+def main():
+    # Report Generate_Points' throughput (points per second) for each sampler
+    # and a few problem sizes. 
+    Bounds      : numpy.ndarray     = numpy.array([[0, 1], [-1, 1]], dtype = numpy.float32);
+    Device      : torch.device      = torch.device('cpu');
+    Generator   : torch.Generator   = torch.Generator(device = Device);
+    Generator.manual_seed(0);
+
+    Num_Trials : int = 10;
+    for Sampler in Samplers.keys():
+        for Num_Points in [1000, 10000, 100000, 1000000]:
+            Timer : float = time.perf_counter();
+            for i in range(Num_Trials):
+                Generate_Points(Bounds = Bounds, Num_Points = Num_Points, Device = Device, Generator = Generator, Sampler = Sampler);
+            Runtime : float = (time.perf_counter() - Timer)/Num_Trials;
+
+            print("%-8s Num_Points = %8u: %9.6fs per call, %.3e points/s" % (Sampler, Num_Points, Runtime, Num_Points/Runtime));
+
+
+if __name__ == "__main__":
+    main();
@@ -76,6 +76,9 @@ def Settings_Reader() -> Dict:
             raise Read_Error("\"Activation Function [Tanh, Rational, Sin]:\" should be" + \
                             "\"Tanh\", \"Rational\", or \"Sin\" Got " + Buffer);
 
+    # Should we evaluate the networks as an ensemble?
+    Settings["Ensemble"] = Read_Bool_Setting(File, "Ensemble [bool]:");
+
     # Read the device.
     Buffer = Read_Setting(File, "Train on CPU or GPU [GPU, CPU]:");
     if(Buffer[0] == 'G' or Buffer[0] == 'g'):
@@ -89,6 +92,38 @@ def Settings_Reader() -> Dict:
     else:
         raise Read_Error("\"Train on CPU or GPU\" should be \"CPU\" or \"GPU\". Got " + Buffer);
 
+    # How many worker processes should we use? Each one trains the networks
+    # for some of the data sets (see Parallel.py). The workers run on the CPU.
+    Settings["Num Processes"] = int(Read_Setting(File, "Number of Processes [int]:"));
+    if(Settings["Num Processes"] < 1):
+        raise Read_Error("\"Number of Processes\" should be a positive integer. Got %d" % Settings["Num Processes"]);
+    if(Settings["Num Processes"] > 1 and Settings["Device"] != torch.device('cpu')):
+        raise Read_Error("\"Number of Processes\" must be 1 when training on a GPU.");
+
+    # Read the thread settings. None means "use the default" (see 
+    # Configure_Threads in Parallel.py).
+    Buffer = Read_Setting(File, "Intra-op Threads [int, None]:");
+    if(Buffer[0] == 'N' or Buffer[0] == 'n'):
+        Settings["Intra-op Threads"] = None;
+    else:
+        Settings["Intra-op Threads"] = int(Buffer);
+
+    Buffer = Read_Setting(File, "Inter-op Threads [int, None]:");
+    if(Buffer[0] == 'N' or Buffer[0] == 'n'):
+        Settings["Inter-op Threads"] = None;
+    else:
+        Settings["Inter-op Threads"] = int(Buffer);
+
+    Buffer = Read_Setting(File, "CPU Affinity [List of int, None]:");
+    if(Buffer[0] == 'N' or Buffer[0] == 'n'):
+        Settings["CPU Affinity"] = None;
+    else:
+        Settings["CPU Affinity"] = [int(Core) for Core in Buffer.split(',')];
+
+    for Key in ["Intra-op Threads", "Inter-op Threads"]:
+        if(Settings[Key] is not None and Settings[Key] < 1):
+            raise Read_Error("\"%s\" should be a positive integer or None. Got %d" % (Key, Settings[Key]));
+
 
 
     ############################################################################
@@ -109,6 +144,79 @@ def Settings_Reader() -> Dict:
     Settings["Num Train Coll Points"]   = int(Read_Setting(File, "Number of Training Collocation Points [int]:"));
     Settings["Num Test Coll Points"]    = int(Read_Setting(File, "Number of Testing Collocation Points [int]:"));
 
+    # Read the seed for the collocation point generator (if there is one).
+    Buffer = Read_Setting(File, "Collocation Seed [int, None]:");
+    if(Buffer[0] == 'N' or Buffer[0] == 'n'):
+        Settings["Collocation Seed"] = None;
+    else:
+        Settings["Collocation Seed"] = int(Buffer);
+
+    # Read the collocation point sampler.
+    Buffer = Read_Setting(File, "Collocation Sampler [Uniform, Sobol, Halton, LHS, Grid]:").lower();
+    if  (Buffer == "uniform"):
+        Settings["Collocation Sampler"] = "Uniform";
+    elif(Buffer == "sobol"):
+        Settings["Collocation Sampler"] = "Sobol";
+    elif(Buffer == "halton"):
+        Settings["Collocation Sampler"] = "Halton";
+    elif(Buffer == "lhs" or Buffer == "latin hypercube"):
+        Settings["Collocation Sampler"] = "LHS";
+    elif(Buffer == "grid" or Buffer == "stratified"):
+        Settings["Collocation Sampler"] = "Grid";
+    else:
+        raise Read_Error("\"Collocation Sampler\" should be \"Uniform\", \"Sobol\", \"Halton\", \"LHS\", or \"Grid\". Got " + Buffer);
+
+    # Read how often we refresh the training and testing collocation points.
+    Settings["Coll Refresh Fraction"] = float(Read_Setting(File, "Collocation Refresh Fraction [float]:"));
+    if(Settings["Coll Refresh Fraction"] < 0 or Settings["Coll Refresh Fraction"] > 1):
+        raise Read_Error("\"Collocation Refresh Fraction\" should be in [0, 1]. Got %f" % Settings["Coll Refresh Fraction"]);
+
+    Buffer = Read_Setting(File, "Test Collocation Refresh Period [int, None]:");
+    if(Buffer[0] == 'N' or Buffer[0] == 'n'):
+        Settings["Test Coll Refresh Period"] = None;
+    else:
+        Settings["Test Coll Refresh Period"] = int(Buffer);
+        if(Settings["Test Coll Refresh Period"] < 1):
+            raise Read_Error("\"Test Collocation Refresh Period\" should be a positive integer or None. Got %d" % Settings["Test Coll Refresh Period"]);
+
+    # Read how we pick the targeted collocation points, and the pool settings.
+    Buffer = Read_Setting(File, "Targeting Method [Cutoff, Pool, Importance]:").lower();
+    if  (Buffer == "cutoff"):
+        Settings["Targeting Method"] = "Cutoff";
+    elif(Buffer == "pool"):
+        Settings["Targeting Method"] = "Pool";
+    elif(Buffer == "importance"):
+        Settings["Targeting Method"] = "Importance";
+    else:
+        raise Read_Error("\"Targeting Method\" should be \"Cutoff\", \"Pool\", or \"Importance\". Got " + Buffer);
+
+    Settings["Pool Capacity"]   = int(Read_Setting(File, "Pool Capacity [int]:"));
+    Settings["Pool Samples"]    = int(Read_Setting(File, "Pool Samples [int]:"));
+    Settings["Pool Max Age"]    = int(Read_Setting(File, "Pool Max Age [int]:"));
+    Settings["Pool Decay"]      = float(Read_Setting(File, "Pool Decay [float]:"));
+    if(Settings["Pool Capacity"] < 1 or Settings["Pool Samples"] < 1):
+        raise Read_Error("\"Pool Capacity\" and \"Pool Samples\" should be positive. Got %d and %d" % (Settings["Pool Capacity"], Settings["Pool Samples"]));
+
+    # Read the importance sampling settings.
+    Settings["Importance Exponent"]     = float(Read_Setting(File, "Importance Exponent [float]:"));
+    Settings["Importance Grid Size"]    = int(Read_Setting(File, "Importance Grid Size [int]:"));
+    if(Settings["Importance Grid Size"] < 1):
+        raise Read_Error("\"Importance Grid Size\" should be positive. Got %d" % Settings["Importance Grid Size"]);
+
+    # Read the derivative backend.
+    Buffer = Read_Setting(File, "Derivative Backend [Reverse, Forward, Jet]:").lower();
+    if  (Buffer == "reverse"):
+        Settings["Derivative Backend"] = "Reverse";
+    elif(Buffer == "forward"):
+        Settings["Derivative Backend"] = "Forward";
+    elif(Buffer == "jet"):
+        Settings["Derivative Backend"] = "Jet";
+    else:
+        raise Read_Error("\"Derivative Backend\" should be \"Reverse\", \"Forward\", or \"Jet\". Got " + Buffer);
+
+    # Should we compile the residual (see Library_Matrix.Compile)?
+    Settings["Compile Residual"] = Read_Bool_Setting(File, "Compile Residual [bool]:");
+
     # Read in if we should mask small components of Xi.
     Settings["Mask Small Xi Components"] = Read_Bool_Setting(File, "Mask Small Xi Components [bool]:");
 
@@ -125,9 +233,39 @@ def Settings_Reader() -> Dict:
     else:
         raise Read_Error("\"Optimizer [Adam, LBFGS]:\" should be \"Adam\" or \"LBFGS\". Got " + Buffer);
 
+    # LBFGS picks its search direction, step size, and when to stop using 
+    # dot products and norms over every parameter. A worker only has the 
+    # parameters for its own networks (and Xi), so the workers would disagree
+    # about Xi's step (and could take different numbers of iterations).
+    if(Settings["Optimizer"] == "LBFGS" and Settings["Num Processes"] > 1):
+        raise Read_Error("\"Number of Processes\" must be 1 when using the LBFGS optimizer.");
+
     # Read the learning rate, number of epochs.
     Settings["Learning Rate"] = float(Read_Setting(File, "Learning Rate [float]:"));
     Settings["Num Epochs"]    = int(  Read_Setting(File, "Number of Epochs [int]:"));
+
+    # Read the collocation batch size (if there is one), and if we should take
+    # an optimizer step after each batch.
+    Buffer = Read_Setting(File, "Collocation Batch Size [int, None]:");
+    if(Buffer[0] == 'N' or Buffer[0] == 'n'):
+        Settings["Coll Batch Size"] = None;
+    else:
+        Settings["Coll Batch Size"] = int(Buffer);
+
+    Settings["Step Per Coll Batch"] = Read_Bool_Setting(File, "Step Per Collocation Batch [bool]:");
+
+    # Read the data batch size (if there is one).
+    Buffer = Read_Setting(File, "Data Batch Size [int, None]:");
+    if(Buffer[0] == 'N' or Buffer[0] == 'n'):
+        Settings["Data Batch Size"] = None;
+    else:
+        Settings["Data Batch Size"] = int(Buffer);
+        if(Settings["Data Batch Size"] < 1):
+            raise Read_Error("\"Data Batch Size\" should be a positive integer or None. Got %d" % Settings["Data Batch Size"]);
+
+        # LBFGS expects the loss to be the same each time it evaluates it.
+        if(Settings["Optimizer"] == "LBFGS"):
+            raise Read_Error("\"Data Batch Size\" must be None when using the LBFGS optimizer.");
     
 
 
@@ -139,6 +277,18 @@ def Settings_Reader() -> Dict:
     if(Settings["Load U"] == False):
         Settings["DataSet Names"] = Read_List_Setting(File, "DataSet Names [List of str]:");
 
+    # Read the data chunk size (if there is one), and if we should prefetch 
+    # chunks.
+    Buffer = Read_Setting(File, "Data Chunk Size [int, None]:");
+    if(Buffer[0] == 'N' or Buffer[0] == 'n'):
+        Settings["Data Chunk Size"] = None;
+    else:
+        Settings["Data Chunk Size"] = int(Buffer);
+        if(Settings["Data Chunk Size"] < 1):
+            raise Read_Error("\"Data Chunk Size\" should be a positive integer or None. Got %d" % Settings["Data Chunk Size"]);
+
+    Settings["Prefetch Data"] = Read_Bool_Setting(File, "Prefetch Data Chunks [bool]:");
+
     # All done! Return the settings!
     File.close();
     return Settings;
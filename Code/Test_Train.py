@@ -12,10 +12,13 @@ sys.path.append(Classes_Path);
 import  torch;
 from    typing     import List, Tuple, Dict, Callable;
 
-from    Network    import Network;
-from    Loss       import Data_Loss, Coll_Loss, Lp_Loss, L2_Squared_Loss;
+from    Network    import Network, Ensemble_Network;
+from    Loss       import Data_Loss, Streaming_Data_Loss, Coll_Loss, Lp_Loss, L2_Squared_Loss, Ensemble_Data_Loss, Ensemble_Coll_Loss;
 from    Derivative import Derivative;
 from    Term       import Term;
+from    Evaluate_Derivatives import Derivative_Plan;
+from    Library_Matrix  import Library_Matrix;
+from    Parallel        import Is_Distributed, All_Reduce_Sum, All_Reduce_Max;
 
 
 
@@ -31,7 +34,17 @@ def Training(   U_List              : List[Network],
                 p                   : float,
                 Weights             : Dict[str, float],
                 Optimizer           : torch.optim.Optimizer,
-                Device              : torch.device = torch.device('cpu')) -> Dict:
+                Plan                : Derivative_Plan   = None,
+                Library             : Library_Matrix    = None,
+                Coll_Batch_Size     : int               = None,
+                Step_Per_Batch      : bool              = False,
+                Ensemble            : Ensemble_Network  = None,
+                Point_Weights_List  : List[torch.Tensor] = None,
+                Data_Chunk_Size     : int               = None,
+                Prefetch_Data       : bool              = False,
+                Data_Batch_Size     : int               = None,
+                Generator           : torch.Generator   = None,
+                Device              : torch.device      = torch.device('cpu')) -> Dict:
     """ 
     This function runs one epoch of training. We enforce the learned PDE 
     (library-Xi product) for each U_List[i] at its corresponding set of 
@@ -88,14 +101,95 @@ def Training(   U_List              : List[Network],
     Optimizer: the optimizer we use to train U and Xi. It should have
     been initialized with both network's parameters.
 
+    Plan: A Derivative_Plan or Forward_Derivative_Plan object built from
+    Derivatives (see Coll_Loss).
+
+    Library: A Library_Matrix object built from Derivatives, LHS_Term, and
+    RHS_Terms (see Coll_Loss).
+
+    Coll_Batch_Size: If this is None, we evaluate the collocation loss for 
+    each data set at all of its collocation points at once. Otherwise, we 
+    split each Coll_Points_List[i] into batches with (at most) this many 
+    points, and evaluate the collocation loss one batch at a time. We 
+    back-propagate each batch's loss as soon as we evaluate it, which frees 
+    the batch's graph. Thus, peak memory depends on the batch size rather than
+    the number of collocation points.
+
+    Step_Per_Batch: Only matters if Coll_Batch_Size is not None. If False, we
+    accumulate the gradients from every batch and take one optimizer step per
+    epoch (this gives the same gradient as Coll_Batch_Size = None). If True, we
+    take one optimizer step per batch. The kth step uses the kth batch of each
+    data set's collocation points (along with all of its data points, unless
+    Data_Batch_Size is not None; see below).
+
+    Ensemble: An Ensemble_Network built from U_List, or None. If this is not 
+    None, we evaluate the collocation and data losses for every data set at 
+    once using the ensemble (rather than one network at a time). Since the 
+    ensemble uses the networks' parameters, this does not change the values
+    of the losses or their gradients.
+
+    Point_Weights_List: A list of tensors whose ith entry holds the weight of
+    each of Coll_Points_List[i] (see Coll_Loss' Point_Weights), or None. If 
+    None, every collocation point has weight 1.
+
+    Data_Chunk_Size: If this is None, we evaluate each data set's data loss
+    at all of its data points at once. Otherwise, we stream the data points
+    through the network in chunks with this many points (see 
+    Streaming_Data_Loss), back-propagating each chunk as we go. In this case,
+    Inputs_List and Targets_List can live on the CPU (and be memory-mapped),
+    and we only copy one chunk at a time to Device. This also applies if 
+    Ensemble is not None (each network streams its own data set).
+
+    Prefetch_Data: Only matters if Data_Chunk_Size is not None. If True, we 
+    read the next chunk in the background while we evaluate the current one.
+
+    Data_Batch_Size: If this is None, every step evaluates each data set's 
+    data loss at all of its data points. Otherwise, we shuffle each data set's
+    data points (we draw a random permutation of them at the start of the 
+    epoch) and split the shuffled points into batches with (at most) this many
+    points. We take one optimizer step per data batch: the kth step uses the 
+    kth batch of each data set's data points. If a data set has fewer batches
+    than there are steps, we cycle through its batches. We pair each data 
+    batch with a slice of the collocation points: we split each data set's 
+    collocation points into (at least) as many batches as there are data 
+    batches, and divide these batches between the steps. Thus, each step's 
+    data and collocation losses only depend on a subset of the points, and 
+    each epoch evaluates every collocation point once. If Step_Per_Batch is 
+    True, we instead take one step per collocation batch (cycling through the
+    data batches if there are fewer of them). The reported data loss counts 
+    each data point once, even if we cycled through its batch. Note that LBFGS expects the loss to be the same every time it evaluates 
+    it; use None with LBFGS. If this process is one of several workers, we
+    take the largest number of data batches over every worker's data sets.
+
+    Generator: The random number generator we use to shuffle the data points
+    (only matters if Data_Batch_Size is not None). If None, we use torch's 
+    default generator.
+
     Device: The device for U and Xi.
 
+    If this process is one of several worker processes (see Parallel.py), 
+    U_List, Coll_Points_List, Inputs_List, and Targets_List should only hold 
+    the networks and points for the data sets that this worker owns. Each 
+    step, we add up the workers' gradients with respect to Xi. Since each 
+    network belongs to exactly one worker, every worker has the gradient that
+    a single process would have. An optimizer that updates each parameter 
+    using only that parameter's gradient (like Adam) thus takes the same step
+    for Xi on every worker, and each network takes the step that it would take
+    if a single process owned every data set. This is not true for LBFGS,
+    which uses dot products over every parameter (see Settings_Reader).
+
     ----------------------------------------------------------------------------
     Returns:
 
     A dictionary with the following keys:
+        "Residuals": a list of tensors whose ith entry holds the PDE residual 
+        at each of the ith data set's collocation points.
+
         "Coll Loss", "Data Loss", "L2 Loss": lists of floats whose ith entry
-        holds the corresponding loss for the ith data set. 
+        holds the corresponding loss for the ith data set. If we take several
+        steps, these are averages over the steps. We weight each step's data 
+        loss by the number of data points it uses, so that if we use data 
+        batches, the data loss is the mean over every data point in the epoch.
 
         "Total Loss": a list of floats whose ith entry houses the total loss for
         the ith data set.
@@ -109,6 +203,70 @@ def Training(   U_List              : List[Network],
 
     Num_DataSets : int = len(U_List);
 
+    # If we use data batches, shuffle each data set's data points and split
+    # the shuffled indices into batches. The batches do not overlap, and 
+    # together they hold every data point. If we are one of several workers,
+    # every worker must take the same number of steps, so we use the largest
+    # number of data batches over every worker's data sets.
+    Data_Batches_List   : List[Tuple[torch.Tensor]] = None;
+    Num_Data_Batches    : int                       = 1;
+    if(Data_Batch_Size is not None):
+        assert(Data_Batch_Size > 0);
+        Data_Batches_List = [];
+        for i in range(Num_DataSets):
+            Num_Data_Points : int           = Inputs_List[i].shape[0];
+            Permutation     : torch.Tensor  = torch.randperm(   Num_Data_Points,
+                                                                generator   = Generator,
+                                                                device      = torch.device('cpu') if Generator is None else Generator.device);
+            Data_Batches_List.append(torch.split(Permutation.to(device = Inputs_List[i].device), Data_Batch_Size));
+
+        Num_Data_Batches = _Max_Over_Workers(max([len(Data_Batches) for Data_Batches in Data_Batches_List]));
+
+    # Split the collocation points into batches. If Coll_Batch_Size is None, 
+    # each data set gets one batch with all of its collocation points. If we
+    # use data batches, we pair each data batch with its own slice of the 
+    # collocation points, so we split each data set's collocation points into
+    # (at least) Num_Data_Batches batches.
+    Coll_Batches_List : List[Tuple[torch.Tensor]] = [];
+    for i in range(Num_DataSets):
+        Num_Coll_Points : int = Coll_Points_List[i].shape[0];
+        ith_Batch_Size  : int = max(Num_Coll_Points, 1);
+        if(Coll_Batch_Size is not None):
+            assert(Coll_Batch_Size > 0);
+            ith_Batch_Size = Coll_Batch_Size;
+        if(Num_Data_Batches > 1):
+            ith_Batch_Size = min(ith_Batch_Size, max(-(-Num_Coll_Points // Num_Data_Batches), 1));
+        Coll_Batches_List.append(torch.split(Coll_Points_List[i], ith_Batch_Size));
+
+    # Split the weights the same way (if there are any).
+    Weight_Batches_List : List[Tuple[torch.Tensor]] = None;
+    if(Point_Weights_List is not None):
+        assert(len(Point_Weights_List) == Num_DataSets);
+        Weight_Batches_List = [];
+        for i in range(Num_DataSets):
+            assert(Point_Weights_List[i].shape[0] == Coll_Points_List[i].shape[0]);
+            Weight_Batches_List.append(torch.split(Point_Weights_List[i], max(Coll_Batches_List[i][0].shape[0], 1)));
+
+    # Figure out which batches each optimizer step uses. If we are one of 
+    # several workers, every worker must take the same number of steps, so we
+    # use the largest number of batches over every worker's data sets. A 
+    # worker skips the batches that its data sets do not have.
+    #
+    # Without data batches, we take one step per collocation batch if 
+    # Step_Per_Batch is True, and one step per epoch otherwise. With data 
+    # batches, each step also uses one data batch. If Step_Per_Batch is True,
+    # we still take one step per collocation batch (cycling through the data
+    # batches if there are fewer of them). Otherwise, we take one step per 
+    # data batch, and divide the collocation batches between those steps. 
+    # Either way, each epoch evaluates each collocation point once.
+    Num_Batches : int = _Max_Over_Workers(max([len(Coll_Batches) for Coll_Batches in Coll_Batches_List]));
+    if(Coll_Batch_Size is not None and Step_Per_Batch == True):
+        Steps : List[List[int]] = [[k] for k in range(max(Num_Batches, Num_Data_Batches))];
+    else:
+        Steps : List[List[int]] = [list(range((k*Num_Batches)//Num_Data_Batches, ((k + 1)*Num_Batches)//Num_Data_Batches)) for k in range(Num_Data_Batches)];
+
+    Num_Steps : int = len(Steps);
+
     # Put each U in training mode.
     for i in range(Num_DataSets):
         U_List[i].train();
@@ -116,89 +274,235 @@ def Training(   U_List              : List[Network],
     # Initialize variables to track the residual, losses. We need to do this
     # because we find these variables in the Closure function (which has its own
     # scope. Thus, any variables created in Closure are inaccessible from
-    # outside Closure).
+    # outside Closure). LBFGS may call Closure several times per step, so 
+    # Closure overwrites the values for the current step.
     Residual_List       : List[float] = [];
-    Coll_Loss_List      : List[float] = [0]*Num_DataSets;
-    Data_Loss_List      : List[float] = [0]*Num_DataSets;
-    L2_Loss_List        : List[float] = [0]*Num_DataSets;
-    Lp_Loss_Buffer      = 0.0;
-    Total_Loss_List     : List[float] = [0]*Num_DataSets;
+    Coll_Loss_List      : List[List[float]] = [[0]*Num_DataSets for k in range(Num_Steps)];
+    Data_Loss_List      : List[List[float]] = [[0]*Num_DataSets for k in range(Num_Steps)];
+    L2_Loss_List        : List[List[float]] = [[0]*Num_DataSets for k in range(Num_Steps)];
+    Lp_Loss_Buffer      : List[float]       = [0]*Num_Steps;
+    Total_Loss_List     : List[List[float]] = [[0]*Num_DataSets for k in range(Num_Steps)];
+    Num_Coll_List       : List[List[int]]   = [[0]*Num_DataSets for k in range(Num_Steps)];
+    Num_Data_List       : List[List[int]]   = [[0]*Num_DataSets for k in range(Num_Steps)];
 
     for i in range(Num_DataSets):
         Residual_List.append(torch.empty(Coll_Points_List[i].shape[0], dtype = torch.float32));
 
-    # Define closure function (needed for LBFGS)
-    def Closure() -> torch.Tensor:
+    # Define closure function (needed for LBFGS). Step_Inputs_List and 
+    # Step_Targets_List hold the data points that each data set uses in the 
+    # kth step.
+    def Closure(k                   : int,
+                Step_Inputs_List    : List[torch.Tensor],
+                Step_Targets_List   : List[torch.Tensor]) -> torch.Tensor:
         # Zero out the gradients (if they are enabled).
         if (torch.is_grad_enabled()):
             Optimizer.zero_grad();
 
         # Set up buffers to hold the losses
-        Coll_Loss_Value     = torch.zeros(1, dtype = torch.float32);
-        Data_Loss_Value     = torch.zeros(1, dtype = torch.float32);
-        L2_Loss_Value       = torch.zeros(1, dtype = torch.float32);
         Total_Loss_Value    = torch.zeros(1, dtype = torch.float32);
 
-        # First, calculate the L2 loss, since it is not specific to each data set.
+        # We back-propagate each batch's collocation loss as soon as we 
+        # evaluate it. The other losses (which share the Lp loss' graph) get 
+        # added up and back-propagated at the end.
+        Other_Loss_Value    = torch.zeros(1, dtype = torch.float32);
+
+        # First, calculate the Lp loss, since it is not specific to each data set.
         Lp_Loss_Value = Lp_Loss(    Xi      = Xi,
                                     Mask    = Mask,
                                     p       = p);
-        Lp_Loss_Buffer = Lp_Loss_Value.detach().item()
+        Lp_Loss_Buffer[k] = Lp_Loss_Value.detach().item();
 
-        # Now calculate the losses for each data set.
+        # Find the number of collocation points that each data set uses in 
+        # this step (the batches in Steps[k], or at least, the ones that 
+        # exist).
+        Num_Step_Points : List[int] = [];
+        for i in range(Num_DataSets):
+            Num_Step_Points.append(sum([Coll_Batches_List[i][b].shape[0] for b in Steps[k] if b < len(Coll_Batches_List[i])]));
+
+        # Coll_Loss returns the mean over a batch. We weight each batch by its
+        # share of the step's points so that the batches add up to the mean 
+        # over all of the step's points.
+        Coll_Loss_Values : List[float] = [0.0]*Num_DataSets;
+
+        if(Ensemble is None):
+            # Get the collocation loss for each data set, one batch at a time.
+            for i in range(Num_DataSets):
+                for b in [b for b in Steps[k] if b < len(Coll_Batches_List[i])]:
+                    Batch : torch.Tensor = Coll_Batches_List[i][b];
+
+                    bth_Coll_Loss_Value, bth_Residual = Coll_Loss(
+                                                U           = U_List[i],
+                                                Xi          = Xi,
+                                                Mask        = Mask,
+                                                Coll_Points = Batch,
+                                                Derivatives = Derivatives,
+                                                LHS_Term    = LHS_Term,
+                                                RHS_Terms   = RHS_Terms,
+                                                Plan        = Plan,
+                                                Library     = Library,
+                                                Point_Weights = None if Weight_Batches_List is None else Weight_Batches_List[i][b],
+                                                Device      = Device);
+
+                    bth_Coll_Loss_Value = bth_Coll_Loss_Value*(Batch.shape[0]/Num_Step_Points[i]);
+                    if (bth_Coll_Loss_Value.requires_grad == True):
+                        (Weights["Coll"]*bth_Coll_Loss_Value).backward();
+
+                    # Store the batch's residual.
+                    Start : int = b*Coll_Batches_List[i][0].shape[0];
+                    Residual_List[i][Start:(Start + Batch.shape[0])] = bth_Residual.detach();
+                    Coll_Loss_Values[i] += bth_Coll_Loss_Value.detach().item();
+
+            # Get the data loss for each data set (unless we stream it, see 
+            # below).
+            if(Data_Chunk_Size is None):
+                Data_Loss_Values : List[torch.Tensor] = [];
+                for i in range(Num_DataSets):
+                    Data_Loss_Values.append(Data_Loss(  U       = U_List[i],
+                                                        Inputs  = Step_Inputs_List[i],
+                                                        Targets = Step_Targets_List[i]));
+        
+        else:
+            # Get the collocation loss for every data set at once, one batch at
+            # a time. If a data set does not have a bth batch, we give it an
+            # empty one.
+            for b in Steps[k]:
+                # If none of our data sets has a bth batch, skip it.
+                if(all([b >= len(Coll_Batches) for Coll_Batches in Coll_Batches_List])):
+                    continue;
+
+                Batch_List          : List[torch.Tensor] = [];
+                Weight_Batch_List   : List[torch.Tensor] = None if Weight_Batches_List is None else [];
+                for i in range(Num_DataSets):
+                    if(b < len(Coll_Batches_List[i])):
+                        Batch_List.append(Coll_Batches_List[i][b]);
+                        if(Weight_Batch_List is not None):
+                            Weight_Batch_List.append(Weight_Batches_List[i][b]);
+                    else:
+                        Batch_List.append(Coll_Points_List[i][0:0]);
+                        if(Weight_Batch_List is not None):
+                            Weight_Batch_List.append(Point_Weights_List[i][0:0]);
+
+                bth_Coll_Loss_List, bth_Residual_List = Ensemble_Coll_Loss(
+                                                U                   = Ensemble,
+                                                Xi                  = Xi,
+                                                Mask                = Mask,
+                                                Coll_Points_List    = Batch_List,
+                                                Derivatives         = Derivatives,
+                                                LHS_Term            = LHS_Term,
+                                                RHS_Terms           = RHS_Terms,
+                                                Plan                = Plan,
+                                                Library             = Library,
+                                                Point_Weights_List  = Weight_Batch_List,
+                                                Device              = Device);
+
+                bth_Coll_Loss_Value = torch.zeros(1, dtype = torch.float32);
+                for i in range(Num_DataSets):
+                    if(Batch_List[i].shape[0] == 0):
+                        continue;
+
+                    ith_Coll_Loss_Value  = bth_Coll_Loss_List[i]*(Batch_List[i].shape[0]/Num_Step_Points[i]);
+                    bth_Coll_Loss_Value += ith_Coll_Loss_Value;
+
+                    # Store the batch's residual.
+                    Start : int = b*Coll_Batches_List[i][0].shape[0];
+                    Residual_List[i][Start:(Start + Batch_List[i].shape[0])] = bth_Residual_List[i].detach();
+                    Coll_Loss_Values[i] += ith_Coll_Loss_Value.detach().item();
+
+                if (bth_Coll_Loss_Value.requires_grad == True):
+                    (Weights["Coll"]*bth_Coll_Loss_Value).backward();
+
+            # Get the data loss for every data set at once (unless we stream
+            # it, see below).
+            if(Data_Chunk_Size is None):
+                Data_Loss_Values : List[torch.Tensor] = Ensemble_Data_Loss( U               = Ensemble,
+                                                                            Inputs_List     = Step_Inputs_List,
+                                                                            Targets_List    = Step_Targets_List);
+
+        # If we stream the data, we back-propagate the data loss one chunk at
+        # a time. The returned losses are not part of a graph, so they do not
+        # contribute to the gradient below.
+        if(Data_Chunk_Size is not None):
+            Data_Loss_Values : List[torch.Tensor] = [];
+            for i in range(Num_DataSets):
+                Data_Loss_Values.append(Streaming_Data_Loss(U           = U_List[i],
+                                                            Inputs      = Step_Inputs_List[i],
+                                                            Targets     = Step_Targets_List[i],
+                                                            Chunk_Size  = Data_Chunk_Size,
+                                                            Scale       = Weights["Data"],
+                                                            Prefetch    = Prefetch_Data,
+                                                            Device      = Device));
+
+        # Now calculate the remaining losses for each data set.
         for i in range(Num_DataSets):
-            # Get the collocation, data, and L2 loss for the ith data set.
-            ith_Coll_Loss_Value, ith_Residual = Coll_Loss(
-                                            U           = U_List[i],
-                                            Xi          = Xi,
-                                            Mask        = Mask,
-                                            Coll_Points = Coll_Points_List[i],
-                                            Derivatives = Derivatives,
-                                            LHS_Term    = LHS_Term,
-                                            RHS_Terms   = RHS_Terms,
-                                            Device      = Device);
-
-            ith_Data_Loss_Value = Data_Loss(U                   = U_List[i],
-                                            Inputs              = Inputs_List[i],
-                                            Targets             = Targets_List[i]);
+            ith_Coll_Loss_Value : float         = Coll_Loss_Values[i];
+            ith_Data_Loss_Value : torch.Tensor  = Data_Loss_Values[i];
 
+            # Get the L2 loss for the ith data set.
             ith_L2_Loss_Value = L2_Squared_Loss(U = U_List[i]);
 
-            ith_Total_Loss_Value = (Weights["Data"]*ith_Data_Loss_Value + 
-                                    Weights["Coll"]*ith_Coll_Loss_Value + 
+            ith_Other_Loss_Value = (Weights["Data"]*ith_Data_Loss_Value + 
                                     Weights["Lp"]*Lp_Loss_Value + 
                                     Weights["L2"]*ith_L2_Loss_Value);
 
+            ith_Total_Loss_Value : float = Weights["Coll"]*ith_Coll_Loss_Value + ith_Other_Loss_Value.detach().item();
+
             # Store those losses in the buffers (for the returned dict)
-            Residual_List[i][:] = ith_Residual.detach();
-            Coll_Loss_List[i]   = ith_Coll_Loss_Value.detach().item();
-            Data_Loss_List[i]   = ith_Data_Loss_Value.detach().item();
-            L2_Loss_List[i]     = ith_L2_Loss_Value.detach().item();
-            Total_Loss_List[i]  = ith_Total_Loss_Value.detach().item();
+            Coll_Loss_List[k][i]   = ith_Coll_Loss_Value;
+            Data_Loss_List[k][i]   = ith_Data_Loss_Value.detach().item();
+            Num_Coll_List[k][i]    = Num_Step_Points[i];
+            Num_Data_List[k][i]    = Step_Inputs_List[i].shape[0] if Data_Batches_List is None or k < len(Data_Batches_List[i]) else 0;
+            L2_Loss_List[k][i]     = ith_L2_Loss_Value.detach().item();
+            Total_Loss_List[k][i]  = ith_Total_Loss_Value;
 
             # Finally, accumulate the losses.
-            Coll_Loss_Value     += ith_Coll_Loss_Value;
-            Data_Loss_Value     += ith_Data_Loss_Value;
-            L2_Loss_Value       += ith_L2_Loss_Value;
+            Other_Loss_Value    += ith_Other_Loss_Value;
             Total_Loss_Value    += ith_Total_Loss_Value;
         
-        # Back-propagate to compute gradients of Total_Loss with respect to
-        # network parameters (only do if this if the loss requires grad)
-        if (Total_Loss_Value.requires_grad == True):
-            Total_Loss_Value.backward();
+        # Back-propagate to compute gradients of the remaining losses with 
+        # respect to network parameters (only do if this if the loss requires 
+        # grad)
+        if (Other_Loss_Value.requires_grad == True):
+            Other_Loss_Value.backward();
+
+        # If we are one of several worker processes, each worker only has the 
+        # losses for its own data sets. The workers share Xi, so we add up 
+        # their gradients with respect to Xi (the other parameters belong to 
+        # one worker). We also add up the loss so that every worker's 
+        # optimizer sees the same loss (LBFGS uses it to pick the step size).
+        if(Is_Distributed() == True):
+            if(torch.is_grad_enabled() and Xi.grad is not None):
+                All_Reduce_Sum(Xi.grad);
+            All_Reduce_Sum(Total_Loss_Value);
 
         return Total_Loss_Value;
 
     # update network parameters.
-    Optimizer.step(Closure);
-
-    # Return the residual tensor.
+    for k in range(Num_Steps):
+        # Find the data points that each data set uses in this step.
+        if(Data_Batches_List is None):
+            Step_Inputs_List    : List[torch.Tensor] = Inputs_List;
+            Step_Targets_List   : List[torch.Tensor] = Targets_List;
+        else:
+            Step_Inputs_List    : List[torch.Tensor] = [];
+            Step_Targets_List   : List[torch.Tensor] = [];
+            for i in range(Num_DataSets):
+                Index : torch.Tensor = Data_Batches_List[i][k % len(Data_Batches_List[i])];
+                Step_Inputs_List.append(Inputs_List[i][Index]);
+                Step_Targets_List.append(Targets_List[i][Index]);
+
+        Optimizer.step(lambda : Closure(k, Step_Inputs_List, Step_Targets_List));
+
+    # Return the residual tensor, and the losses (averaged over the steps). We
+    # weight each step's collocation and data losses by its number of 
+    # collocation and data points. If we cycled through a data set's data 
+    # batches, we only count each batch the first time we used it, so that 
+    # the data loss is the mean over the data set's (distinct) data points.
     return {"Residuals"     : Residual_List,
-            "Coll Losses"   : Coll_Loss_List,
-            "Data Losses"   : Data_Loss_List,
-            "Lp Loss"       : Lp_Loss_Buffer,
-            "L2 Losses"     : L2_Loss_List,
-            "Total Losses"  : Total_Loss_List};
+            "Coll Losses"   : [sum([Coll_Loss_List[k][i]*Num_Coll_List[k][i] for k in range(Num_Steps)])/max(sum([Num_Coll_List[k][i] for k in range(Num_Steps)]), 1) for i in range(Num_DataSets)],
+            "Data Losses"   : [sum([Data_Loss_List[k][i]*Num_Data_List[k][i] for k in range(Num_Steps)])/max(sum([Num_Data_List[k][i] for k in range(Num_Steps)]), 1) for i in range(Num_DataSets)],
+            "Lp Loss"       : sum(Lp_Loss_Buffer)/Num_Steps,
+            "L2 Losses"     : [sum([L2_Loss_List[k][i]    for k in range(Num_Steps)])/Num_Steps for i in range(Num_DataSets)],
+            "Total Losses"  : [sum([Total_Loss_List[k][i] for k in range(Num_Steps)])/Num_Steps for i in range(Num_DataSets)]};
 
 
 
@@ -213,7 +517,13 @@ def Testing(    U_List              : List[Network],
                 RHS_Terms           : List[Term],
                 p                   : float,
                 Weights             : Dict[str, float],
-                Device              : torch.device = torch.device('cpu')) -> Dict[str, float]:
+                Plan                : Derivative_Plan   = None,
+                Library             : Library_Matrix    = None,
+                Coll_Batch_Size     : int               = None,
+                Ensemble            : Ensemble_Network  = None,
+                Data_Chunk_Size     : int               = None,
+                Prefetch_Data       : bool              = False,
+                Device              : torch.device      = torch.device('cpu')) -> Dict[str, float]:
     """ 
     This function evaluates the losses.
 
@@ -265,6 +575,20 @@ def Testing(    U_List              : List[Network],
 
     p, Lambda: the settings value for p and Lambda (in the loss function).
 
+    Plan: A Derivative_Plan or Forward_Derivative_Plan object built from
+    Derivatives (see Coll_Loss).
+
+    Library: A Library_Matrix object built from Derivatives, LHS_Term, and
+    RHS_Terms (see Coll_Loss).
+
+    Coll_Batch_Size: If this is not None, we evaluate the collocation loss in 
+    batches with (at most) this many points (see Training).
+
+    Ensemble: An Ensemble_Network built from U_List, or None (see Training).
+
+    Data_Chunk_Size, Prefetch_Data: If Data_Chunk_Size is not None, we 
+    evaluate the data loss in chunks with this many points (see Training).
+
     Device: The device for Sol_NN and PDE_NN.
 
     ----------------------------------------------------------------------------
@@ -301,20 +625,77 @@ def Testing(    U_List              : List[Network],
     L2_Loss_List    : List[float] = [0]*Num_DataSets;
     Total_Loss_List : List[float] = [0]*Num_DataSets;
 
+    # Split the collocation points into batches (see Training). We evaluate
+    # the collocation loss one batch at a time and weight each batch's (mean)
+    # loss by its share of the points.
+    Coll_Batches_List : List[Tuple[torch.Tensor]] = [];
     for i in range(Num_DataSets):
-        Data_Loss_List[i] = Data_Loss(  U           = U_List[i],
-                                        Inputs      = Inputs_List[i],
-                                        Targets     = Targets_List[i]).item();
-
-        Coll_Loss_List[i] = Coll_Loss(  U           = U_List[i],
-                                        Xi          = Xi,
-                                        Mask        = Mask,
-                                        Coll_Points = Coll_Points_List[i],
-                                        Derivatives = Derivatives,
-                                        LHS_Term    = LHS_Term,
-                                        RHS_Terms   = RHS_Terms,
-                                        Device      = Device)[0].item();
+        Num_Coll_Points : int = Coll_Points_List[i].shape[0];
+        Coll_Batches_List.append(torch.split(Coll_Points_List[i], max(Num_Coll_Points, 1) if Coll_Batch_Size is None else Coll_Batch_Size));
+
+    if(Ensemble is None):
+        for i in range(Num_DataSets):
+            if(Data_Chunk_Size is None):
+                Data_Loss_List[i] = Data_Loss(  U           = U_List[i],
+                                                Inputs      = Inputs_List[i],
+                                                Targets     = Targets_List[i]).item();
+
+            Coll_Loss_List[i] = 0.0;
+            for Batch in Coll_Batches_List[i]:
+                Coll_Loss_List[i] += Coll_Loss( U           = U_List[i],
+                                                Xi          = Xi,
+                                                Mask        = Mask,
+                                                Coll_Points = Batch,
+                                                Derivatives = Derivatives,
+                                                LHS_Term    = LHS_Term,
+                                                RHS_Terms   = RHS_Terms,
+                                                Plan        = Plan,
+                                                Library     = Library,
+                                                Device      = Device)[0].item()*(Batch.shape[0]/Coll_Points_List[i].shape[0]);
+
+    else:
+        if(Data_Chunk_Size is None):
+            Data_Loss_List = [Loss.item() for Loss in Ensemble_Data_Loss(   U               = Ensemble,
+                                                                            Inputs_List     = Inputs_List,
+                                                                            Targets_List    = Targets_List)];
+
+        Coll_Loss_List = [0.0]*Num_DataSets;
+        for b in range(max([len(Coll_Batches) for Coll_Batches in Coll_Batches_List])):
+            Batch_List : List[torch.Tensor] = [];
+            for i in range(Num_DataSets):
+                if(b < len(Coll_Batches_List[i])):
+                    Batch_List.append(Coll_Batches_List[i][b]);
+                else:
+                    Batch_List.append(Coll_Points_List[i][0:0]);
+
+            bth_Coll_Loss_List = Ensemble_Coll_Loss(U                   = Ensemble,
+                                                    Xi                  = Xi,
+                                                    Mask                = Mask,
+                                                    Coll_Points_List    = Batch_List,
+                                                    Derivatives         = Derivatives,
+                                                    LHS_Term            = LHS_Term,
+                                                    RHS_Terms           = RHS_Terms,
+                                                    Plan                = Plan,
+                                                    Library             = Library,
+                                                    Device              = Device)[0];
+            
+            for i in range(Num_DataSets):
+                if(Batch_List[i].shape[0] > 0):
+                    Coll_Loss_List[i] += bth_Coll_Loss_List[i].item()*(Batch_List[i].shape[0]/Coll_Points_List[i].shape[0]);
+
+    # If we stream the data, evaluate the data loss one chunk at a time. We do
+    # not need gradients here.
+    if(Data_Chunk_Size is not None):
+        with torch.no_grad():
+            for i in range(Num_DataSets):
+                Data_Loss_List[i] = Streaming_Data_Loss(U           = U_List[i],
+                                                        Inputs      = Inputs_List[i],
+                                                        Targets     = Targets_List[i],
+                                                        Chunk_Size  = Data_Chunk_Size,
+                                                        Prefetch    = Prefetch_Data,
+                                                        Device      = Device).item();
 
+    for i in range(Num_DataSets):
         L2_Loss_List[i] = L2_Squared_Loss(U = U_List[i]).item();
 
         Total_Loss_List[i] =          ( Weights["Data"]*Data_Loss_List[i] + 
@@ -328,3 +709,15 @@ def Testing(    U_List              : List[Network],
             "Lp Loss"       : Lp_Loss_Value,
             "L2 Losses"     : L2_Loss_List,
             "Total Losses"  : Total_Loss_List};
+
+
+
+def _Max_Over_Workers(Value : int) -> int:
+    """
+    This function returns the maximum of Value over every worker process (or 
+    Value, if this process is the only one). Every worker must call it.
+    """
+
+    Buffer : torch.Tensor = torch.tensor([Value], dtype = torch.int64);
+    All_Reduce_Max(Buffer);
+    return int(Buffer.item());
@@ -20,11 +20,16 @@ from Settings_Reader    import Settings_Reader;
 from Library_Reader     import Read_Library;
 from Data               import Data_Loader;
 from Derivative         import Derivative;
+from Evaluate_Derivatives import Derivative_Plan, Forward_Derivative_Plan, Jet_Derivative_Plan;
+from Library_Matrix     import Library_Matrix;
 from Term               import Term, Build_Term_From_State;
-from Network            import Network;
+from Network            import Network, Ensemble_Network;
 from Test_Train         import Testing, Training;
-from Points             import Generate_Points;
+from Points             import Importance_Points;
+from Residual_Pool      import Residual_Pool;
+from Collocation_Buffer import Collocation_Buffer;
 from Plot               import Plot_Losses;
+from Parallel           import Find_Free_Port, Setup_Process_Group, Configure_Threads, Cleanup_Process_Group, Owned_DataSets, Gather_DataSet_Lists;
 
 
 
@@ -38,6 +43,62 @@ def main():
     for (Setting, Value) in Settings.items():
         print("%-25s = %s" % (Setting, str(Value)));
 
+    # If we want several worker processes, spawn them. Each one runs Run (see
+    # below) on its share of the data sets. Otherwise, run everything in this 
+    # process.
+    if(Settings["Num Processes"] > 1):
+        Port : int = Find_Free_Port();
+        torch.multiprocessing.spawn(Run, 
+                                    args    = (Settings["Num Processes"], Port, Settings), 
+                                    nprocs  = Settings["Num Processes"]);
+    else:
+        Run(Rank = 0, World_Size = 1, Port = None, Settings = Settings);
+
+
+
+def Run(Rank        : int, 
+        World_Size  : int, 
+        Port        : int, 
+        Settings    : Dict) -> None:
+    """
+    This function sets up the networks, Xi, and the library, trains them, and
+    then saves the results. 
+
+    If World_Size > 1, this function runs in each of World_Size worker 
+    processes. Each worker owns some of the data sets (see Owned_DataSets). It
+    trains the networks for those data sets, using their data and collocation
+    points. Every worker trains the same Xi: each step, the workers add up 
+    their gradients with respect to Xi before taking a step (see Training). 
+    Thus, with Adam, we get the same Xi and networks as if a single process 
+    trained everything (Settings_Reader does not allow LBFGS with several 
+    workers). Only worker 0 prints, saves, and plots.
+
+    ----------------------------------------------------------------------------
+    Arguments:
+
+    Rank : The index of this worker, in {0, 1, ... , World_Size - 1}. 
+
+    World_Size : The number of worker processes.
+
+    Port : If World_Size > 1, a free port that the workers use to talk to 
+    each other (see Setup_Process_Group). Otherwise, this is ignored.
+
+    Settings : The settings dictionary (see Settings_Reader).
+    """
+
+    # Connect to the other workers, if there are any. Only worker 0 reports.
+    if(World_Size > 1):
+        Setup_Process_Group(Rank = Rank, World_Size = World_Size, Port = Port);
+        if(Rank != 0):
+            sys.stdout = open(os.devnull, "w");
+
+    # Set up this process' threads (and, optionally, which cores it runs on).
+    Configure_Threads(  Intra_Threads   = Settings["Intra-op Threads"],
+                        Inter_Threads   = Settings["Inter-op Threads"],
+                        Affinity        = Settings["CPU Affinity"],
+                        Rank            = Rank,
+                        World_Size      = World_Size);
+
     # Start a setup timer.
     Setup_Timer : float = time.perf_counter();
     print("\nSetting up...\n");
@@ -76,9 +137,11 @@ def main():
                                                     "Test Targets"          : [],
                                                     "Input Bounds"          : [],
                                                     "Number of Dimensions"  : []};
+    # If we stream the data, the data sets stay on the CPU (see Training).
+    Data_Device : torch.device = Settings["Device"] if Settings["Data Chunk Size"] is None else torch.device('cpu');
     for i in range(Num_DataSets):
         ith_Data_Dict : Dict = Data_Loader( DataSet_Name    = Settings["DataSet Names"][i],
-                                            Device          = Settings["Device"]);
+                                            Device          = Data_Device);
         
         Data_Dict["Train Inputs"            ].append(ith_Data_Dict["Train Inputs"]);
         Data_Dict["Train Targets"           ].append(ith_Data_Dict["Train Targets"]);
@@ -93,6 +156,16 @@ def main():
     for i in range(1, Num_DataSets):
         assert(Data_Dict["Number of Dimensions"][i] == Num_Dimensions);
 
+    # Determine which data sets this worker owns (every data set if there is 
+    # one worker). We train the networks for these data sets.
+    Owned           : List[int]                 = Owned_DataSets(Num_DataSets = Num_DataSets, Rank = Rank, World_Size = World_Size);
+    Num_Owned       : int                       = len(Owned);
+    Local_Data_Dict : Dict[str, List]           = {};
+    for Key in ["Train Inputs", "Train Targets", "Test Inputs", "Test Targets", "Input Bounds"]:
+        Local_Data_Dict[Key] = [Data_Dict[Key][i] for i in Owned];
+    if(World_Size > 1):
+        print("Running %u worker processes. Worker 0 owns data sets %s.\n" % (World_Size, str(Owned)));
+
 
 
     ############################################################################
@@ -142,6 +215,18 @@ def main():
         print("Set up the solution networks using settings in Settings.txt.")
 
 
+    # Fetch the networks that this worker trains.
+    Local_U_List : List[Network] = [U_List[i] for i in Owned];
+
+    # If there are multiple data sets, and we want to, set up an ensemble 
+    # which evaluates every U at once. The ensemble uses the parameters of the
+    # networks in U_List, so training it trains them.
+    Ensemble : Ensemble_Network = None;
+    if(Settings["Ensemble"] == True and Num_Owned > 1):
+        Ensemble = Ensemble_Network(U_List = Local_U_List);
+        print("Evaluating the %u networks as an ensemble.\n" % Num_Owned);
+
+
     # Second, either build Xi + library or load it from save. Also build the mask.
     if(Settings["Load Xi, Library"] == True):
         # First, load Xi.
@@ -185,6 +270,46 @@ def main():
                     
         print("Build Xi, Library using settings in Settings.txt");
     
+    # Compile the library. This lets Coll_Loss evaluate every library term at 
+    # once.
+    Settings["Library Matrix"] = Library_Matrix(Derivatives = Settings["Derivatives"],
+                                                LHS_Term    = Settings["LHS Term"],
+                                                RHS_Terms   = Settings["RHS Terms"],
+                                                Device      = Settings["Device"]);
+
+    # Build the mask. The library only evaluates the un-masked terms. 
+    Mask : torch.Tensor = torch.zeros(Num_RHS_Terms, dtype = torch.bool);
+    if(Settings["Load Xi, Library"] == True and Settings["Mask Small Xi Components"] == True):
+        for i in range(Num_RHS_Terms):
+            if(abs(Xi[i].item()) < Threshold):
+                Mask[i] = True;   
+    Settings["Library Matrix"].Set_Mask(Mask);
+
+    # Build the derivative plan. This tells Coll_Loss how to compute each 
+    # derivative from the lower order ones we have already computed. We only
+    # need the derivatives that the un-masked terms use (the plan computes 
+    # any lower order derivatives that it needs along the way).
+    Required_Derivatives : List[Derivative] = Settings["Library Matrix"].Required_Derivatives;
+    if(Settings["Derivative Backend"] == "Jet"):
+        Settings["Derivative Plan"] = Jet_Derivative_Plan(Derivatives = Required_Derivatives);
+        print("    Derivative plan:       %u jets and %u forward sweeps for %u derivatives" % (len(Settings["Derivative Plan"].Jet_Orders), Settings["Derivative Plan"].Num_Forward_Sweeps, len(Required_Derivatives)));
+    elif(Settings["Derivative Backend"] == "Forward"):
+        Settings["Derivative Plan"] = Forward_Derivative_Plan(Derivatives = Required_Derivatives);
+        print("    Derivative plan:       %u forward sweeps for %u derivatives" % (Settings["Derivative Plan"].Num_Forward_Sweeps, len(Required_Derivatives)));
+    else:
+        Settings["Derivative Plan"] = Derivative_Plan(Derivatives = Required_Derivatives);
+        print("    Derivative plan:       %u backward passes for %u derivatives" % (Settings["Derivative Plan"].Num_Grad_Passes, len(Required_Derivatives)));
+    if(len(Required_Derivatives) < len(Settings["Derivatives"])):
+        print("    Skipping %u derivatives that only masked terms use" % (len(Settings["Derivatives"]) - len(Required_Derivatives)));
+
+    # Compile the residual, if we want to.
+    if(Settings["Compile Residual"] == True):
+        Compile_Time : float = Settings["Library Matrix"].Compile();
+        if(Settings["Library Matrix"].Compiled == True):
+            print("    Compiled the residual. Took %7.2fs" % Compile_Time);
+        else:
+            print("    Failed to compile the residual after %7.2fs; using the un-compiled residual." % Compile_Time);
+
     # Make a copy of Xi. We will use this after training to counter momentum 
     # (see below)
     Initial_Xi = torch.clone(Xi);
@@ -208,12 +333,6 @@ def main():
         else:
             print("\n");
 
-    # Build the mask.
-    Mask : torch.Tensor = torch.zeros(Num_RHS_Terms, dtype = torch.bool);
-    if(Settings["Load Xi, Library"] == True and Settings["Mask Small Xi Components"] == True):
-        for i in range(Num_RHS_Terms):
-            if(abs(Xi[i].item()) < Threshold):
-                Mask[i] = True;   
     print("Masking %u RHS terms\n" % torch.sum(Mask));
 
 
@@ -225,8 +344,8 @@ def main():
     # optimizer optimizes the correct Xi tensor).
 
     Params = [];
-    for i in range(Num_DataSets):
-        Params = Params + list(U_List[i].parameters());
+    for i in range(Num_Owned):
+        Params = Params + list(Local_U_List[i].parameters());
     Params.append(Xi);
 
     if(  Settings["Optimizer"] == "Adam"):
@@ -238,6 +357,11 @@ def main():
         exit();
 
     if(Settings["Load Optimizer"]  == True ):
+        # Saves from several workers do not have an optimizer state.
+        if(Saved_State["Optimizer"] is None):
+            print("The save \"%s\" does not have an optimizer state (it was made by several worker processes)." % Settings["Load File Name"]);
+            exit();
+
         # Now load the optimizer.
         Optimizer.load_state_dict(Saved_State["Optimizer"]);
 
@@ -250,13 +374,59 @@ def main():
 
 
 
+    ############################################################################
+    # Set up the random number generator for the collocation points. Each 
+    # worker offsets the seed by its rank, so that the workers draw different
+    # points.
+
+    Generator : torch.Generator = torch.Generator(device = Settings["Device"]);
+    if(Settings["Collocation Seed"] is None):
+        Generator.seed();
+    else:
+        Generator.manual_seed(Settings["Collocation Seed"] + Rank);
+
+
+
     ############################################################################
     # Run the Epochs!
 
-    # Set up an array to hold the collocation points.
+    # Set up an array to hold the collocation points (for the data sets that
+    # this worker owns).
     Targeted_Coll_Pts_List : List[torch.Tensor]= [];
-    for i in range(Num_DataSets):
-        Targeted_Coll_Pts_List.append(torch.empty((0, Num_Dimensions), dtype = torch.float32));
+    for i in range(Num_Owned):
+        Targeted_Coll_Pts_List.append(torch.empty((0, Num_Dimensions), dtype = torch.float32, device = Settings["Device"]));
+
+    # Set up the buffers that hold the random training and testing collocation
+    # points for each data set that this worker owns. We refresh these in 
+    # place (see below).
+    Train_Coll_Buffers  : List[Collocation_Buffer] = [];
+    Test_Coll_Buffers   : List[Collocation_Buffer] = [];
+    for i in range(Num_Owned):
+        Train_Coll_Buffers.append(Collocation_Buffer(   Bounds              = Local_Data_Dict["Input Bounds"][i],
+                                                        Num_Points          = Settings["Num Train Coll Points"],
+                                                        Refresh_Fraction    = Settings["Coll Refresh Fraction"],
+                                                        Sampler             = Settings["Collocation Sampler"],
+                                                        Device              = Settings["Device"],
+                                                        Generator           = Generator));
+    for i in range(Num_Owned):
+        Test_Coll_Buffers.append(Collocation_Buffer(    Bounds              = Local_Data_Dict["Input Bounds"][i],
+                                                        Num_Points          = Settings["Num Test Coll Points"],
+                                                        Refresh_Fraction    = 1.0,
+                                                        Sampler             = Settings["Collocation Sampler"],
+                                                        Device              = Settings["Device"],
+                                                        Generator           = Generator));
+
+    # If we keep the targeted points in a pool, set up a pool for each data 
+    # set that this worker owns.
+    Pool_List : List[Residual_Pool] = [];
+    if(Settings["Targeting Method"] == "Pool"):
+        for i in range(Num_Owned):
+            Pool_List.append(Residual_Pool( Num_Dim     = Num_Dimensions,
+                                            Capacity    = Settings["Pool Capacity"],
+                                            Num_Samples = Settings["Pool Samples"],
+                                            Max_Age     = Settings["Pool Max Age"],
+                                            Decay       = Settings["Pool Decay"],
+                                            Device      = Settings["Device"]));
 
     # Set up buffers to hold losses, also set up a timer.
     Epoch_Timer         : float                             = time.perf_counter();
@@ -284,33 +454,77 @@ def main():
         # Train
 
         # First, we need to set up the collocation points for each data set for
-        # this epoch. This set is a combination of randomly generated points 
-        # and the targeted points from the last epoch.
-
-        Train_Coll_Points_List : List[numpy.ndarray] = [];
-        for i in range(Num_DataSets):
-            ith_Random_Coll_Points  : torch.Tensor = Generate_Points(
-                                                    Bounds      = Data_Dict["Input Bounds"][i],
+        # this epoch. This set is a combination of random points (from the 
+        # buffers, which we partly refresh after the first epoch) and the 
+        # targeted points from the last epoch (or from the pool). If we use 
+        # importance sampling, we instead draw the points based on the last 
+        # epoch's residuals, and weight them (the first epoch uses the 
+        # buffers' points).
+
+        Point_Weights_List : List[torch.Tensor] = None;
+        if(Settings["Targeting Method"] == "Importance" and t > 0):
+            Point_Weights_List = [];
+            for i in range(Num_Owned):
+                ith_Coll_Points, ith_Point_Weights = Importance_Points(
+                                                    Bounds      = Local_Data_Dict["Input Bounds"][i],
                                                     Num_Points  = Settings["Num Train Coll Points"],
-                                                    Device      = Settings["Device"]);
+                                                    Old_Points  = Train_Coll_Points_List[i],
+                                                    Residuals   = Train_Dict["Residuals"][i],
+                                                    Exponent    = Settings["Importance Exponent"],
+                                                    Grid_Size   = Settings["Importance Grid Size"],
+                                                    Device      = Settings["Device"],
+                                                    Generator   = Generator);
+
+                Train_Coll_Points_List[i] = ith_Coll_Points;
+                Point_Weights_List.append(ith_Point_Weights);
+        else:
+            Train_Coll_Points_List : List[torch.Tensor] = [];
+            for i in range(Num_Owned):
+                if(Settings["Targeting Method"] == "Pool"):
+                    Targeted_Coll_Pts_List[i] = Pool_List[i].Sample(Generator = Generator);
+
+                if(t > 0):
+                    Train_Coll_Buffers[i].Refresh(Generator = Generator);
 
-            Train_Coll_Points_List.append(torch.vstack((ith_Random_Coll_Points, Targeted_Coll_Pts_List[i])));
+                # Only copy the random points if we need to add targeted ones.
+                if(Targeted_Coll_Pts_List[i].shape[0] == 0):
+                    Train_Coll_Points_List.append(Train_Coll_Buffers[i].Points);
+                else:
+                    Train_Coll_Points_List.append(torch.vstack((Train_Coll_Buffers[i].Points, Targeted_Coll_Pts_List[i])));
 
         # Now run a Training Epoch.
-        Train_Dict = Training(  U_List              = U_List,
+        Train_Dict = Training(  U_List              = Local_U_List,
                                 Xi                  = Xi,
                                 Mask                = Mask,
                                 Coll_Points_List    = Train_Coll_Points_List,
-                                Inputs_List         = Data_Dict["Train Inputs"],
-                                Targets_List        = Data_Dict["Train Targets"],
+                                Inputs_List         = Local_Data_Dict["Train Inputs"],
+                                Targets_List        = Local_Data_Dict["Train Targets"],
                                 Derivatives         = Settings["Derivatives"],
                                 LHS_Term            = Settings["LHS Term"],
                                 RHS_Terms           = Settings["RHS Terms"],
                                 p                   = Settings["p"],
                                 Weights             = Settings["Weights"],
                                 Optimizer           = Optimizer,
+                                Plan                = Settings["Derivative Plan"],
+                                Library             = Settings["Library Matrix"],
+                                Coll_Batch_Size     = Settings["Coll Batch Size"],
+                                Step_Per_Batch      = Settings["Step Per Coll Batch"],
+                                Ensemble            = Ensemble,
+                                Point_Weights_List  = Point_Weights_List,
+                                Data_Chunk_Size     = Settings["Data Chunk Size"],
+                                Prefetch_Data       = Settings["Prefetch Data"],
+                                Data_Batch_Size     = Settings["Data Batch Size"],
+                                Generator           = Generator,
                                 Device              = Settings["Device"]);
 
+        # Collect every worker's losses (the residuals stay local).
+        Train_Dict.update(Gather_DataSet_Lists(
+                            Local_Dict      = { "Data Losses"   : Train_Dict["Data Losses"],
+                                                "Coll Losses"   : Train_Dict["Coll Losses"],
+                                                "Total Losses"  : Train_Dict["Total Losses"]},
+                            Owned           = Owned,
+                            Num_DataSets    = Num_DataSets));
+
         # Append the train loss history.
         for i in range(Num_DataSets):
             Train_Losses[i]["Data Losses"][t]  = Train_Dict["Data Losses"][i];
@@ -322,29 +536,44 @@ def main():
         ########################################################################
         # Test
 
-        # First, generate random collocation points then evaluate the
-        # network on them.
+        # First, fetch the testing collocation points (replacing them if it is
+        # time to), then evaluate the network on them.
         Test_Coll_Points_List : List[torch.Tensor]= [];
-        for i in range(Num_DataSets):
-            Test_Coll_Points_List.append(Generate_Points(
-                                Bounds      = Data_Dict["Input Bounds"][i],
-                                Num_Points  = Settings["Num Test Coll Points"],
-                                Device      = Settings["Device"]));
+        for i in range(Num_Owned):
+            if(Settings["Test Coll Refresh Period"] is not None and t > 0 and t % Settings["Test Coll Refresh Period"] == 0):
+                Test_Coll_Buffers[i].Refresh(Generator = Generator);
+
+            Test_Coll_Points_List.append(Test_Coll_Buffers[i].Points);
 
         # Evaluate losses on the testing points.
-        Test_Dict = Testing(    U_List              = U_List,
+        Test_Dict = Testing(    U_List              = Local_U_List,
                                 Xi                  = Xi,
                                 Mask                = Mask,
                                 Coll_Points_List    = Test_Coll_Points_List,
-                                Inputs_List         = Data_Dict["Test Inputs"],
-                                Targets_List        = Data_Dict["Test Targets"],
+                                Inputs_List         = Local_Data_Dict["Test Inputs"],
+                                Targets_List        = Local_Data_Dict["Test Targets"],
                                 Derivatives         = Settings["Derivatives"],
                                 LHS_Term            = Settings["LHS Term"],
                                 RHS_Terms           = Settings["RHS Terms"],
                                 p                   = Settings["p"],
                                 Weights             = Settings["Weights"],
+                                Plan                = Settings["Derivative Plan"],
+                                Library             = Settings["Library Matrix"],
+                                Coll_Batch_Size     = Settings["Coll Batch Size"],
+                                Ensemble            = Ensemble,
+                                Data_Chunk_Size     = Settings["Data Chunk Size"],
+                                Prefetch_Data       = Settings["Prefetch Data"],
                                 Device              = Settings["Device"]);
 
+        # Collect every worker's losses.
+        Test_Dict.update(Gather_DataSet_Lists(
+                            Local_Dict      = { "Data Losses"   : Test_Dict["Data Losses"],
+                                                "Coll Losses"   : Test_Dict["Coll Losses"],
+                                                "Total Losses"  : Test_Dict["Total Losses"],
+                                                "L2 Losses"     : Test_Dict["L2 Losses"]},
+                            Owned           = Owned,
+                            Num_DataSets    = Num_DataSets));
+
         # Append the test loss history.
         for i in range(Num_DataSets):
             Test_Losses[i]["Data Losses"][t]   = Test_Dict["Data Losses"][i];
@@ -362,12 +591,25 @@ def main():
         ########################################################################
         # Update targeted residual points.
 
-        for i in range(Num_DataSets):
+        Cutoff_List     : List[float]   = [];
+        Num_Targeted    : List[int]     = [];
+        for i in range(Num_Owned):
             # Find the Absolute value of the residuals for the ith data set. 
             # Isolate those corresponding to the "random" collocation points.
             Abs_Residual        : torch.Tensor = torch.abs(Train_Dict["Residuals"][i]);
             Random_Residuals    : torch.Tensor = Abs_Residual[:Settings["Num Train Coll Points"]];
 
+            # If we use a pool, let it decide which points to keep (the 
+            # residuals past the random ones belong to the points we drew from
+            # the pool).
+            if(Settings["Targeting Method"] == "Pool"):
+                Pool_List[i].Update(Random_Points       = Train_Coll_Points_List[i][:Settings["Num Train Coll Points"], :],
+                                    Random_Residuals    = Random_Residuals,
+                                    Sampled_Residuals   = Abs_Residual[Settings["Num Train Coll Points"]:]);
+                Cutoff_List.append(Pool_List[i].Cutoff);
+                Num_Targeted.append(Pool_List[i].Size());
+                continue;
+
             # Evaluate the mean, standard deviation of the absolute residual at the
             # random points.
             Residual_Mean   : torch.Tensor = torch.mean(Random_Residuals);
@@ -379,9 +621,24 @@ def main():
             # here, so we should hold onto that point.
             Cutoff                  : float         = Residual_Mean + 3*Residual_SD
             Big_Residual_Indices    : torch.Tensor  = torch.greater_equal(Abs_Residual, Cutoff);
+            Cutoff_List.append(float(Cutoff));
+
+            # Importance sampling does not use targeted points.
+            if(Settings["Targeting Method"] == "Importance"):
+                Num_Targeted.append(0);
+                continue;
 
             # Keep the corresponding collocation points.
             Targeted_Coll_Pts_List[i] = Train_Coll_Points_List[i][Big_Residual_Indices, :].detach();
+            Num_Targeted.append(Targeted_Coll_Pts_List[i].shape[0]);
+
+        # Collect every worker's targeted point counts and cutoffs (we report
+        # these below).
+        Targeted_Dict : Dict[str, List] = Gather_DataSet_Lists(
+                            Local_Dict      = { "Num Targeted"  : Num_Targeted,
+                                                "Cutoffs"       : Cutoff_List},
+                            Owned           = Owned,
+                            Num_DataSets    = Num_DataSets);
 
 
 
@@ -401,7 +658,7 @@ def main():
         else:
             print("Epoch #%-4d | \t" % (t + 1), end = '');
             for i in range(Num_DataSets):
-                print("\t Targeted[%u] = %3d \t Cutoff[%u] = %.7f "   % (i, Targeted_Coll_Pts_List[i].shape[0], i, Cutoff), end = '');
+                print("\t Targeted[%u] = %3d \t Cutoff[%u] = %.7f "   % (i, Targeted_Dict["Num Targeted"][i], i, Targeted_Dict["Cutoffs"][i]), end = '');
             print();
 
     # Finally, replaced the final masked components of Xi with their 
@@ -426,6 +683,16 @@ def main():
     Epoch_Runtime : float = time.perf_counter() - Epoch_Timer;
     print("Done! It took %7.2fs, an average of %7.2fs per epoch)" % (Epoch_Runtime,  (Epoch_Runtime / Settings["Num Epochs"])));
 
+    # Collect every network's state. Once we have them, only worker 0 needs 
+    # to continue.
+    U_States : List[Dict] = Gather_DataSet_Lists(
+                            Local_Dict      = {"U States" : [Local_U_List[i].Get_State() for i in range(Num_Owned)]},
+                            Owned           = Owned,
+                            Num_DataSets    = Num_DataSets)["U States"];
+    Cleanup_Process_Group();
+    if(Rank != 0):
+        return;
+
 
 
     ############################################################################
@@ -496,11 +763,6 @@ def main():
         Counter         += 1;
         Save_File_Name   = Base_File_Name + ("_%u" % Counter);
 
-    # Next, get each U's state
-    U_States : List[Dict] = [];
-    for i in range(Num_DataSets):
-        U_States.append(U_List[i].Get_State());
-
     # Next, get the encoding vectors for each element of Derivatives.
     Derivative_Encodings : List[numpy.ndarray] = [];
     for i in range(len(Settings["Derivatives"])):
@@ -516,7 +778,7 @@ def main():
     # We can now save!
     torch.save({"U States"              : U_States,
                 "Xi"                    : Xi,
-                "Optimizer"             : Optimizer.state_dict(),
+                "Optimizer"             : Optimizer.state_dict() if World_Size == 1 else None,
                 "Derivative Encodings"  : Derivative_Encodings,
                 "LHS Term State"        : LHS_Term_State,
                 "RHS Term States"       : RHS_Term_States, 
@@ -1,4 +1,15 @@
 import numpy;
+import json;
+import os;
+from   typing import Dict, List;
+
+
+
+# The arrays in a DataSet, in the order we write them.
+Array_Names = ["Train_Inputs", "Train_Targets", "Test_Inputs", "Test_Targets", "Input_Bounds"];
+
+# The name of the file that describes the arrays in a directory DataSet.
+Manifest_Name : str = "Manifest.json";
 
 
 
@@ -7,18 +18,20 @@ def Create_Data_Set(        Name            : str,
                             Train_Targets   : numpy.ndarray,
                             Test_Inputs     : numpy.ndarray,
                             Test_Targets    : numpy.ndarray,
-                            Input_Bounds    : numpy.ndarray) -> None:
-    """ This function generates a DataSet (a file in Data/DataSets) with a
-    specified Name, set of inputs, target values, and problem domain bounds. We
-    assume the inputs are a rectangle in R^n. That is, there is some {a_1, ... ,
-    a_n, b_1, ... , b_n} such that each input (test and train) is in the set
-    [a_1, b_1] x ... x [a_n, b_n].
+                            Input_Bounds    : numpy.ndarray,
+                            Format          : str = "Directory",
+                            DataSets_Path   : str = "./DataSets/") -> None:
+    """ This function generates a DataSet (a file or directory in Data/DataSets)
+    with a specified Name, set of inputs, target values, and problem domain
+    bounds. We assume the inputs are a rectangle in R^n. That is, there is some
+    {a_1, ... , a_n, b_1, ... , b_n} such that each input (test and train) is
+    in the set [a_1, b_1] x ... x [a_n, b_n].
 
     ----------------------------------------------------------------------------
     Arguments:
 
     Name : This is a string. This function creates a new DataSet. This is the
-    name of the file we save the DataSet set to.
+    name of the file (or directory) we save the DataSet to.
 
     Train_Inputs : This should be a matrix of data. If there are m training
     inputs, each one of which lives in R^n, then this should be a m by n matrix
@@ -34,23 +47,113 @@ def Create_Data_Set(        Name            : str,
     x ... x [a_n, b_n]. This argument should be a n by 2 array whose ith row is
     [a_i, b_i].
 
+    Format : Either "Directory" or "npz". If "Directory", we create a directory
+    called Name which holds each array in its own (uncompressed) .npy file,
+    along with a small JSON manifest ("Manifest.json") that lists the arrays'
+    files, shapes, and types. Data_Loader memory-maps these files, so even very
+    large DataSets load instantly, and several runs can share one copy of the
+    DataSet. If "npz", we save every array in a single .npz file called
+    Name.npz (the original format).
+
+    DataSets_Path : The directory that holds the DataSets.
+
     ----------------------------------------------------------------------------
     Returns:
 
     Nothing! """
 
-    # Fist, open the file.
-    Path : str = "./DataSets/" + Name + ".npz";
-    File = open(Path, mode = "wb");
+    Arrays : Dict[str, numpy.ndarray] = {   "Train_Inputs"  : Train_Inputs,
+                                            "Train_Targets" : Train_Targets,
+                                            "Test_Inputs"   : Test_Inputs,
+                                            "Test_Targets"  : Test_Targets,
+                                            "Input_Bounds"  : Input_Bounds};
+
+    if(Format == "npz"):
+        # Fist, open the file.
+        Path : str = os.path.join(DataSets_Path, Name + ".npz");
+        File = open(Path, mode = "wb");
+
+        # Now, serialize the Inputs and Targets arrays
+        numpy.savez(file = File, **Arrays);
+
+        # All done!
+        File.close();
+        return;
+
+    elif(Format != "Directory"):
+        raise ValueError("Format should be \"Directory\" or \"npz\". Got " + Format);
+
+    # Make the DataSet's directory. If we are overwriting a DataSet, remove 
+    # its manifest first. Data_Loader only treats a directory as a DataSet if
+    # it has a manifest, so it will not use the old manifest with partly 
+    # written arrays.
+    Directory       : str = os.path.join(DataSets_Path, Name);
+    Manifest_Path   : str = os.path.join(Directory, Manifest_Name);
+    os.makedirs(Directory, exist_ok = True);
+    if(os.path.exists(Manifest_Path)):
+        os.remove(Manifest_Path);
+
+    # Save each array in its own .npy file. We store the arrays as contiguous
+    # arrays so that Data_Loader can memory-map them. Another run may have 
+    # memory-mapped the old arrays, so we never rewrite an array file in 
+    # place (truncating a memory-mapped file can crash the other run). 
+    # Instead, we write each array to a temporary file, and once every array
+    # is written, we rename the temporary files over the old ones. The other
+    # run keeps reading the old files' contents.
+    Manifest    : Dict      = {"Format Version" : 1, "Arrays" : {}};
+    Temp_Paths  : List[str] = [];
+    try:
+        for Array_Name in Array_Names:
+            Array       : numpy.ndarray = numpy.ascontiguousarray(Arrays[Array_Name]);
+            File_Name   : str           = Array_Name + ".npy";
+            Temp_Paths.append(os.path.join(Directory, File_Name + ".tmp"));
+            with open(Temp_Paths[-1], mode = "wb") as File:
+                numpy.save(File, Array, allow_pickle = False);
 
-    # Now, serialize the Inputs and Targets arrays
-    numpy.savez(    file            = File,
-                    Train_Inputs    = Train_Inputs,
-                    Train_Targets   = Train_Targets,
-                    Test_Inputs     = Test_Inputs,
-                    Test_Targets    = Test_Targets,
-                    Input_Bounds    = Input_Bounds);
+            Manifest["Arrays"][Array_Name] = {  "File"  : File_Name,
+                                                "Shape" : list(Array.shape),
+                                                "Dtype" : Array.dtype.str};
+    except BaseException:
+        for Temp_Path in Temp_Paths:
+            if(os.path.exists(Temp_Path)):
+                os.remove(Temp_Path);
+        raise;
+
+    for Temp_Path in Temp_Paths:
+        os.replace(Temp_Path, Temp_Path[:-len(".tmp")]);
+
+    # Write the manifest last (see above), so a partly written DataSet is 
+    # never used. We write it to a temporary file and then rename it, so the
+    # manifest itself is never partly written either.
+    with open(Manifest_Path + ".tmp", mode = "w") as File:
+        json.dump(Manifest, File, indent = 4);
+    os.replace(Manifest_Path + ".tmp", Manifest_Path);
 
-    # All done!
-    File.close();
     return;
+
+
+
+def Convert_Data_Set(   Name            : str,
+                        DataSets_Path   : str = "./DataSets/") -> None:
+    """ This function converts a .npz DataSet (called Name.npz) into a
+    directory DataSet (called Name, see Create_Data_Set). It does not delete
+    the .npz file. Note that Data_Loader uses the directory DataSet if both
+    exist.
+
+    ----------------------------------------------------------------------------
+    Arguments:
+
+    Name : The name of the DataSet (without the .npz extension).
+
+    DataSets_Path : The directory that holds the DataSets. """
+
+    DataSet = numpy.load(os.path.join(DataSets_Path, Name + ".npz"));
+
+    Create_Data_Set(Name            = Name,
+                    Train_Inputs    = DataSet["Train_Inputs"],
+                    Train_Targets   = DataSet["Train_Targets"],
+                    Test_Inputs     = DataSet["Test_Inputs"],
+                    Test_Targets    = DataSet["Test_Targets"],
+                    Input_Bounds    = DataSet["Input_Bounds"],
+                    Format          = "Directory",
+                    DataSets_Path   = DataSets_Path);
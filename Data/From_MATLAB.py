@@ -1,8 +1,14 @@
-
 import numpy;
-import random;
+import os;
 import scipy.io;
 import matplotlib.pyplot as pyplot;
+from   typing import List, Tuple, Dict;
+
+# We only need h5py to read v7.3 (HDF5) .mat files.
+try:
+    import h5py;
+except ImportError:
+    h5py = None;
 
 from Create_Data_Set import Create_Data_Set;
 
@@ -19,41 +25,53 @@ def main():
     Num_Train_Examples      : int   = 10000;
     Num_Test_Examples       : int   = 1000;
 
-    # Now pass them to "From_MATLAB".
-    if(Num_Spatial_Dimensions == 1):
-        From_MATLAB_1D( Data_File_Name      = Data_File_Name,
-                        Noise_Proportion    = Noise_Proportion,
-                        Num_Train_Examples  = Num_Train_Examples,
-                        Num_Test_Examples   = Num_Test_Examples);
-    else: # Num_Spatial_Dimensions == 2
-        From_MATLAB_2D( Data_File_Name      = Data_File_Name,
-                        Noise_Proportion    = Noise_Proportion,
-                        Num_Train_Examples  = Num_Train_Examples,
-                        Num_Test_Examples   = Num_Test_Examples);
-
-
-
+    # The number of entries of usol we read at once (only matters for v7.3
+    # .mat files).
+    Chunk_Size              : int   = 2**24;
 
-def From_MATLAB_1D( Data_File_Name      : str,
-                    Noise_Proportion    : float,
-                    Num_Train_Examples  : int,
-                    Num_Test_Examples   : int) -> None:
-    """ This function loads a .mat data set with 1D data (one spatial variable,
-    and one temporal variable) and generates a sparse and noisy data set from
+    # Now pass them to "From_MATLAB".
+    From_MATLAB(Data_File_Name          = Data_File_Name,
+                Num_Spatial_Dimensions  = Num_Spatial_Dimensions,
+                Noise_Proportion        = Noise_Proportion,
+                Num_Train_Examples      = Num_Train_Examples,
+                Num_Test_Examples       = Num_Test_Examples,
+                Chunk_Size              = Chunk_Size);
+
+
+
+
+def From_MATLAB(    Data_File_Name          : str,
+                    Num_Spatial_Dimensions  : int,
+                    Noise_Proportion        : float,
+                    Num_Train_Examples      : int,
+                    Num_Test_Examples       : int,
+                    Axis_Names              : List[str]                 = None,
+                    Chunk_Size              : int                       = 2**24,
+                    Data_Directory          : str                       = "../MATLAB/Data/",
+                    DataSets_Path           : str                       = "./DataSets/",
+                    Generator               : numpy.random.Generator    = None) -> str:
+    """ This function loads a .mat data set with 1, 2, or 3 spatial variables
+    (and one temporal variable) and generates a sparse and noisy data set from
     it. To do this, we first read in a .mat data set. We assume this file
-    contains three fields: t, x, and usol. t and x are ordered lists of the t
-    and x grid lines (lines along which there are grid-points), respectively. We
-    assume that the values in x are uniformly spaced. u sol contains the value
-    of the true solution at each grid-point. Each row of usol contains the
-    solution for a particular position, while each column contains the solution
-    for a particular time.
-
-    We then add the desired noise level (Noise_Proportion*100% noise) to usol,
-    yielding a noisy data set. Next, we draw a sample of Num_Train_Examples
-    from the set of coordinates, along with the corresponding elements of noisy
-    data set. This becomes our Training data set. We draw another sample of
-    Num_Test_Examples from the set of coordinates along with the
-    corresponding elements of the noisy data set. These become our Testing set.
+    contains a field for each coordinate (t, x, and, if there are 2 or 3
+    spatial variables, y and z), as well as a field called usol. The
+    coordinate fields are ordered lists of the grid lines (lines along which
+    there are grid-points) along the corresponding axes. usol holds the value
+    of the true solution at each grid-point. Axis_Names tells us which
+    coordinate each of usol's axes corresponds to.
+
+    We then draw a sample of Num_Train_Examples from the set of coordinates,
+    along with the corresponding elements of usol, and add the desired noise
+    level (Noise_Proportion*100% noise) to those elements. This becomes our
+    Training data set. We draw another sample of Num_Test_Examples from the set
+    of coordinates along with the corresponding (noisy) elements of usol. These
+    become our Testing set. See Sample_Grid.
+
+    We can read v5 and v7.3 .mat files (MATLAB saves a file in the v7.3 format
+    if you pass it the "-v7.3" flag). A v7.3 file is an HDF5 file, which we
+    read with h5py. In this case, we read usol a few entries at a time (see
+    Chunk_Size), so usol does not need to fit in memory. We read a v5 file
+    with scipy.io.loadmat, which reads all of usol at once.
 
     ----------------------------------------------------------------------------
     Arguments:
@@ -61,79 +79,109 @@ def From_MATLAB_1D( Data_File_Name      : str,
     Data_File_Name: A string containing the name of a .mat file (without the
     extension) that houses the matlab data set we want to read.
 
+    Num_Spatial_Dimensions: The number of spatial variables (1, 2, or 3).
+
     Noise_Proportion: The noise level we want to introduce.
 
     Num_Train_Examples, Num_Test_Examples: The number of Training/Testing
     examples we want, respectively.
 
+    Axis_Names: A list whose kth entry is the name of the coordinate ("t",
+    "x", "y", or "z") along usol's kth axis in MATLAB. For example, if the
+    i,j,k entry of usol holds the solution at (t_i, x_j, y_k), this should be
+    ["t", "x", "y"]. If None, we use ["x", "t"] if there is one spatial
+    variable (each row of usol holds the solution at a particular position,
+    and each column holds the solution at a particular time), and ["t", "x",
+    "y"] or ["t", "x", "y", "z"] otherwise. This matches the data sets in
+    MATLAB/Data.
+
+    Chunk_Size: The (approximate) number of entries of usol we read at once,
+    if the file is a v7.3 file.
+
+    Data_Directory: The directory that holds the .mat file.
+
+    DataSets_Path: The directory we save the DataSet to.
+
+    Generator: The random number generator we use to draw the samples and the
+    noise. If None, we make a new one.
+
     ----------------------------------------------------------------------------
     Returns:
 
-    Nothing! """
+    The name of the new DataSet. """
 
-    # Load data file.
-    Data_File_Path = "../MATLAB/Data/" + Data_File_Name + ".mat";
-    data_in        = scipy.io.loadmat(Data_File_Path);
+    assert(Num_Spatial_Dimensions >= 1 and Num_Spatial_Dimensions <= 3);
 
-    # Fetch spatial, temporal coordinates and the true solution. We cast these
-    # to singles (32 bit fp) since that's what PDE-LEARN uses.
-    t_points : numpy.ndarray = data_in['t'].reshape(-1).astype(dtype = numpy.float32);
-    x_points : numpy.ndarray = data_in['x'].reshape(-1).astype(dtype = numpy.float32);
-    Data_Set : numpy.ndarray = (numpy.real(data_in['usol'])).astype( dtype = numpy.float32);
+    # The coordinates, in the order that PDE-LEARN expects them.
+    Coordinate_Names : List[str] = ["t", "x", "y", "z"][:(Num_Spatial_Dimensions + 1)];
 
-    # Determine problem bounds.
-    Input_Bounds : numpy.ndarray    = numpy.empty(shape = (2, 2), dtype = numpy.float32);
-    Input_Bounds[0, 0]              = t_points[ 0];
-    Input_Bounds[0, 1]              = t_points[-1];
-    Input_Bounds[1, 0]              = x_points[ 0];
-    Input_Bounds[1, 1]              = x_points[-1];
-
-    # Add noise to true solution.
-    Noisy_Data_Set = Data_Set + (Noise_Proportion)*numpy.std(Data_Set)*numpy.random.randn(*Data_Set.shape);
-
-    # Generate the grid of (t, x) coordinates. The i,j entry of usol should
-    # hold the value of the solution at the i,j coordinate.
-    t_coords_matrix, x_coords_matrix = numpy.meshgrid(t_points, x_points);
-
-    if(Make_Plot == True):
-        epsilon : float = .0001;
-        Data_min : float = numpy.min(Noisy_Data_Set) - epsilon;
-        Data_max : float = numpy.max(Noisy_Data_Set) + epsilon;
-
-        # Plot!
-        pyplot.contourf(    t_coords_matrix,
-                            x_coords_matrix,
-                            Noisy_Data_Set,
-                            levels      = numpy.linspace(Data_min, Data_max, 500),
-                            cmap        = pyplot.cm.jet);
+    if(Axis_Names is None):
+        Axis_Names = ["x", "t"] if Num_Spatial_Dimensions == 1 else Coordinate_Names;
+    if(sorted(Axis_Names) != sorted(Coordinate_Names)):
+        raise ValueError("Axis_Names should be an ordering of %s. Got %s" % (str(Coordinate_Names), str(Axis_Names)));
 
-        pyplot.colorbar();
-        pyplot.xlabel("t");
-        pyplot.ylabel("x");
-        pyplot.show();
+    # Load data file. The major version is 2 for v7.3 (HDF5) files.
+    Data_File_Path : str = os.path.join(Data_Directory, Data_File_Name + ".mat");
+    Is_HDF5 : bool = (scipy.io.matlab.matfile_version(Data_File_Path)[0] == 2);
 
-    # Now, stitch successive the rows of the coordinate matrices together
-    # to make a 1D array. We interpret the result as a 1 column matrix.
-    t_coords_1D : numpy.ndarray = t_coords_matrix.flatten().reshape(-1, 1);
-    x_coords_1D : numpy.ndarray = x_coords_matrix.flatten().reshape(-1, 1);
+    if(Is_HDF5 == True):
+        if(h5py is None):
+            raise ImportError("%s is a v7.3 .mat file. We need h5py to read it." % Data_File_Path);
 
-    # Generate data coordinates, corresponding Data Values.
-    All_Data_Coords : numpy.ndarray = numpy.hstack((t_coords_1D, x_coords_1D));
-    All_Data_Values : numpy.ndarray = Noisy_Data_Set.flatten();
+        File = h5py.File(Data_File_Path, mode = "r");
 
-    # Next, generate the Testing/Training sets. To do this, we sample a uniform
-    # distribution over subsets of {1, ... , N} of size Num_Train_Examples,
-    # and another over subsets of {1, ... , N} of size Num_Test_Examples.
-    # Here, N is the number of coordinates.
-    Train_Indices : numpy.ndarray = numpy.random.choice(All_Data_Coords.shape[0], Num_Train_Examples, replace = False);
-    Test_Indices  : numpy.ndarray = numpy.random.choice(All_Data_Coords.shape[0], Num_Test_Examples , replace = False);
+        # MATLAB stores arrays in column-major order, so h5py sees usol's
+        # axes in reverse order. We read the h5py dataset (not an array) so
+        # that Sample_Grid can read it in chunks.
+        Data_Set        = File["usol"];
+        Data_Axis_Names : List[str]                 = list(reversed(Axis_Names));
+        Fields          : Dict[str, numpy.ndarray]  = {Name : numpy.asarray(File[Name]) for Name in Coordinate_Names};
+    else:
+        data_in         : Dict                      = scipy.io.loadmat(Data_File_Path);
+        Data_Set        : numpy.ndarray             = data_in['usol'];
+        Data_Axis_Names : List[str]                 = Axis_Names;
+        Fields          : Dict[str, numpy.ndarray]  = {Name : data_in[Name] for Name in Coordinate_Names};
 
-    # Now select the corresponding testing, training data points/values.
-    Train_Inputs    = All_Data_Coords[Train_Indices, :];
-    Train_Targets   = All_Data_Values[Train_Indices];
+    # Fetch the grid lines. We cast these to singles (32 bit fp) since that's
+    # what PDE-LEARN uses.
+    Grid_Lines : Dict[str, numpy.ndarray] = {Name : Fields[Name].reshape(-1).astype(dtype = numpy.float32) for Name in Coordinate_Names};
 
-    Test_Inputs     = All_Data_Coords[Test_Indices, :];
-    Test_Targets    = All_Data_Values[Test_Indices];
+    # Determine problem bounds.
+    Input_Bounds : numpy.ndarray = numpy.empty(shape = (Num_Spatial_Dimensions + 1, 2), dtype = numpy.float32);
+    for k in range(Num_Spatial_Dimensions + 1):
+        Input_Bounds[k, 0] = Grid_Lines[Coordinate_Names[k]][ 0];
+        Input_Bounds[k, 1] = Grid_Lines[Coordinate_Names[k]][-1];
+
+    # Draw the Testing/Training sets. Sample_Grid returns the coordinates in
+    # the order of usol's axes; we reorder them to (t, x, ...).
+    Train_Inputs, Train_Targets, Test_Inputs, Test_Targets = Sample_Grid(
+                                                Grid_Points         = [Grid_Lines[Name] for Name in Data_Axis_Names],
+                                                Data_Set            = Data_Set,
+                                                Noise_Proportion    = Noise_Proportion,
+                                                Num_Train_Examples  = Num_Train_Examples,
+                                                Num_Test_Examples   = Num_Test_Examples,
+                                                Chunk_Size          = Chunk_Size if Is_HDF5 else None,
+                                                Generator           = Generator);
+
+    if(Is_HDF5 == True):
+        File.close();
+
+    Columns         : List[int]     = [Data_Axis_Names.index(Name) for Name in Coordinate_Names];
+    Train_Inputs    : numpy.ndarray = Train_Inputs[:, Columns];
+    Test_Inputs     : numpy.ndarray = Test_Inputs[:, Columns];
+
+    if(Make_Plot == True and Num_Spatial_Dimensions == 1):
+        # Plot the Training set.
+        pyplot.scatter( Train_Inputs[:, 0],
+                        Train_Inputs[:, 1],
+                        c           = Train_Targets,
+                        s           = 2,
+                        cmap        = pyplot.cm.jet);
+
+        pyplot.colorbar();
+        pyplot.xlabel("t");
+        pyplot.ylabel("x");
+        pyplot.show();
 
     # Send everything to Create_Data_Set
     DataSet_Name : str = (  Data_File_Name + "_" +
@@ -145,122 +193,144 @@ def From_MATLAB_1D( Data_File_Name      : str,
                         Train_Targets   = Train_Targets,
                         Test_Inputs     = Test_Inputs,
                         Test_Targets    = Test_Targets,
-                        Input_Bounds    = Input_Bounds);
+                        Input_Bounds    = Input_Bounds,
+                        DataSets_Path   = DataSets_Path);
+
+    return DataSet_Name;
 
 
 
-def From_MATLAB_2D( Data_File_Name      : str,
+def Sample_Grid(    Grid_Points         : List[numpy.ndarray],
+                    Data_Set            : numpy.ndarray,
                     Noise_Proportion    : float,
                     Num_Train_Examples  : int,
-                    Num_Test_Examples   : int) -> None:
-    """ This function loads a .mat data set with 2D data (two spatial variables,
-    and one temporal variable) and generates a sparse and noisy data set from
-    it. To do this, we first read in a .mat data set. We assume this file
-    contains four fields: t, x, y, and usol. t, x, and y are ordered lists of
-    the t, x, and y t grid lines (lines along which there are grid-points),
-    respectively. We assume that the values in x and y are uniformly spaced.
-    usol is a gigantic 3d array whose i, j, k entry holds the value of the
-    solution at (t_i, x_j, y_k), where t_i is the ith entry of t, x_j is the
-    jth entry of x, and y_k is the kth entry of y.
-
-    We then add the desired noise level (Noise_Proportion*100% noise) to usol,
-    yielding a noisy data set. Next, we draw a sample of Num_Train_Examples
-    from the set of coordinates, along with the corresponding elements of noisy
-    data set. This becomes our Training data set. We draw another sample of
-    Num_Test_Examples from the set of coordinates along with the
-    corresponding elements of the noisy data set. These become our Testing set.
+                    Num_Test_Examples   : int,
+                    Chunk_Size          : int                       = None,
+                    Generator           : numpy.random.Generator    = None) -> Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+    """ This function draws the Training and Testing sets from a solution
+    that lives on a grid. We first sample a uniform distribution over subsets
+    of {0, ... , N - 1} of size Num_Train_Examples, and another over subsets
+    of size Num_Test_Examples, where N is the number of grid points. We then
+    find the grid coordinates of the selected points (and only the selected
+    points) using the points' indices, and add noise to the selected values.
+    Thus, we never build the full grid of coordinates (or a noisy copy of the
+    solution), which would need several times as much memory as the solution
+    itself.
+
+    We read Data_Set one chunk at a time (a few slices along its first axis).
+    We pick out the selected values in each chunk, and keep a running mean and
+    variance of the chunks (we need the standard deviation of the solution to
+    scale the noise). Thus, we only read Data_Set once, and only one chunk
+    needs to be in memory at a time.
 
     ----------------------------------------------------------------------------
     Arguments:
 
-    Data_File_Name: A string containing the name of a .mat file (without the
-    extension) that houses the matlab data set we want to read.
+    Grid_Points: A list of 1D arrays whose kth entry holds the grid lines
+    along the kth axis of Data_Set. If Data_Set has shape (n_0, ... , n_d),
+    then Grid_Points[k] should have n_k entries.
 
-    Noise_Proportion: The noise level we want to introduce.
+    Data_Set: An array whose i_0, ... , i_d entry holds the solution at the
+    point (Grid_Points[0][i_0], ... , Grid_Points[d][i_d]). This can be a view
+    (e.g., a transpose) of another array, or anything else that we can slice
+    along its first axis (e.g., an h5py dataset). If it is complex, we use its
+    real part.
+
+    Noise_Proportion: The noise level we want to introduce. We add
+    Noise_Proportion*std(Data_Set)*Z to each selected value, where Z is a
+    standard normal random variable. If a point is in both the Training and
+    Testing sets, it gets the same noise in both.
 
     Num_Train_Examples, Num_Test_Examples: The number of Training/Testing
     examples we want, respectively.
 
-    ----------------------------------------------------------------------------
-    Returns:
-
-    Nothing! """
+    Chunk_Size: The (approximate) number of entries of Data_Set we read at
+    once. Each chunk holds at least one slice along Data_Set's first axis. If
+    None, we read all of Data_Set at once.
 
-    # Load data file.
-    Data_File_Path = "../MATLAB/Data/" + Data_File_Name + ".mat";
-    data_in        = scipy.io.loadmat(Data_File_Path);
+    Generator: The random number generator we use. If None, we make a new one.
 
-    # Fetch spatial, temporal coordinates and the true solution. We cast these
-    # to singles (32 bit fp) since that's what PDE-LEARN uses.
-    t_points : numpy.ndarray = data_in['t'].reshape(-1).astype(dtype = numpy.float32);
-    x_points : numpy.ndarray = data_in['x'].reshape(-1).astype(dtype = numpy.float32);
-    y_points : numpy.ndarray = data_in['y'].reshape(-1).astype(dtype = numpy.float32);
-    Data_Set : numpy.ndarray = (numpy.real(data_in['usol'])).astype( dtype = numpy.float32);
+    ----------------------------------------------------------------------------
+    Returns:
 
-    # Determine problem bounds.
-    Input_Bounds : numpy.ndarray    = numpy.empty(shape = (3, 2), dtype = numpy.float32);
-    Input_Bounds[0, 0]              = t_points[ 0];
-    Input_Bounds[0, 1]              = t_points[-1];
-    Input_Bounds[1, 0]              = x_points[ 0];
-    Input_Bounds[1, 1]              = x_points[-1];
-    Input_Bounds[2, 0]              = y_points[ 0];
-    Input_Bounds[2, 1]              = y_points[-1];
-
-    # Add noise to true solution.
-    Noisy_Data_Set : numpy.ndarray = Data_Set + (Noise_Proportion)*numpy.std(Data_Set)*numpy.random.randn(*Data_Set.shape);
-
-    # Generate the grid of (t, x, y) coordinates. The i,j,k entry of usol should
-    # hold the value of the solution at the i,j,k coordinate.
-    num_t_values : int = t_points.size;
-    num_x_values : int = x_points.size;
-    num_y_values : int = y_points.size;
-
-    t_coords_matrix = numpy.empty((num_t_values, num_x_values, num_y_values), dtype = numpy.float32);
-    x_coords_matrix = numpy.empty((num_t_values, num_x_values, num_y_values), dtype = numpy.float32);
-    y_coords_matrix = numpy.empty((num_t_values, num_x_values, num_y_values), dtype = numpy.float32);
-
-    for i in range(num_t_values):
-        for j in range(num_x_values):
-            for k in range(num_y_values):
-                t_coords_matrix[i, j, k] = t_points[i];
-                x_coords_matrix[i, j, k] = x_points[j];
-                y_coords_matrix[i, j, k] = y_points[k];
-    
-    # Now, stitch successive the rows of the coordinate matrices together
-    # to make a 1d array. We interpret the result as a 1 column matrix.
-    t_coords_1D : numpy.ndarray = t_coords_matrix.reshape(-1, 1);
-    x_coords_1D : numpy.ndarray = x_coords_matrix.reshape(-1, 1);
-    y_coords_1D : numpy.ndarray = y_coords_matrix.reshape(-1, 1);
-
-    # Generate data coordinates, corresponding Data Values.
-    All_Data_Coords : numpy.ndarray = numpy.hstack((t_coords_1D, x_coords_1D, y_coords_1D));
-    All_Data_Values : numpy.ndarray = Noisy_Data_Set.reshape(-1);
-
-    # Next, generate the Testing/Training sets. To do this, we sample a uniform
-    # distribution over subsets of {1, ... , N} of size Num_Train_Examples,
-    # and another over subsets of {1, ... , N} of size Num_Test_Examples.
-    # Here, N is the number of coordinates.
-    Train_Indices : numpy.ndarray = numpy.random.choice(All_Data_Coords.shape[0], Num_Train_Examples, replace = False);
-    Test_Indices  : numpy.ndarray = numpy.random.choice(All_Data_Coords.shape[0], Num_Test_Examples , replace = False);
-
-    # Now select the corresponding testing, training data points/values.
-    Train_Inputs    = All_Data_Coords[Train_Indices, :];
-    Train_Targets   = All_Data_Values[Train_Indices];
-
-    Test_Inputs     = All_Data_Coords[Test_Indices, :];
-    Test_Targets    = All_Data_Values[Test_Indices];
+    The Training inputs, Training targets, Testing inputs, and Testing targets
+    (in that order). The inputs are arrays whose ith row holds the coordinates
+    of the ith example; the targets are 1D arrays. Everything is a single
+    (32 bit fp), since that's what PDE-LEARN uses. """
+
+    Shape : Tuple[int, ...] = tuple(Data_Set.shape);
+    assert(len(Grid_Points) == len(Shape));
+    for k in range(len(Shape)):
+        assert(Grid_Points[k].size == Shape[k]);
+
+    if(Generator is None):
+        Generator = numpy.random.default_rng();
+
+    # Sample the flat indices of the Training and Testing points.
+    Num_Points      : int           = int(numpy.prod(Shape));
+    Train_Indices   : numpy.ndarray = Generator.choice(Num_Points, Num_Train_Examples, replace = False);
+    Test_Indices    : numpy.ndarray = Generator.choice(Num_Points, Num_Test_Examples,  replace = False);
+
+    # Find the grid coordinates of the selected points. We find each distinct
+    # point once, so a point that is in both sets gets the same noise in both.
+    # numpy.unique sorts the indices, so the points in each chunk are
+    # consecutive.
+    Selected_Indices, Inverse = numpy.unique(numpy.concatenate((Train_Indices, Test_Indices)), return_inverse = True);
+    Grid_Indices    : Tuple[numpy.ndarray, ...] = numpy.unravel_index(Selected_Indices, Shape);
+    Selected_Inputs : numpy.ndarray = numpy.stack([Grid_Points[k][Grid_Indices[k]] for k in range(len(Shape))], axis = 1).astype(dtype = numpy.float32);
+
+    # Read Data_Set one chunk at a time. We pick out the selected values, and
+    # update the mean and variance (we merge each chunk's mean and sum of
+    # squared deviations into the running ones).
+    Slice_Size      : int           = Num_Points // max(Shape[0], 1);
+    Slices_Per_Chunk: int           = Shape[0] if Chunk_Size is None else max(Chunk_Size // max(Slice_Size, 1), 1);
+    Selected_Values : numpy.ndarray = numpy.empty(Selected_Indices.size, dtype = numpy.float32);
+    Count           : int           = 0;
+    Mean            : float         = 0.0;
+    Sum_Squares     : float         = 0.0;
+
+    for Start in range(0, Shape[0], Slices_Per_Chunk):
+        End     : int           = min(Start + Slices_Per_Chunk, Shape[0]);
+        Chunk   : numpy.ndarray = numpy.asarray(Data_Set[Start:End]);
+
+        # h5py reads complex MATLAB arrays as records with real and imaginary
+        # fields.
+        if(Chunk.dtype.names is not None and "real" in Chunk.dtype.names):
+            Chunk = Chunk["real"];
+        Chunk = numpy.real(Chunk).astype(dtype = numpy.float32);
+
+        # Pick out the selected points in this chunk.
+        First   : int = int(numpy.searchsorted(Selected_Indices, Start*Slice_Size));
+        Last    : int = int(numpy.searchsorted(Selected_Indices, End*Slice_Size));
+        Chunk_Indices : Tuple[numpy.ndarray, ...] = (Grid_Indices[0][First:Last] - Start,) + tuple(Grid_Indices[k][First:Last] for k in range(1, len(Shape)));
+        Selected_Values[First:Last] = Chunk[Chunk_Indices];
+
+        # Update the running mean and variance.
+        if(Noise_Proportion != 0):
+            Chunk_Count         : int   = Chunk.size;
+            Chunk_Mean          : float = float(numpy.mean(Chunk, dtype = numpy.float64));
+            Chunk_Sum_Squares   : float = float(numpy.sum(numpy.square(Chunk - Chunk_Mean, dtype = numpy.float64)));
+
+            Delta       : float = Chunk_Mean - Mean;
+            New_Count   : int   = Count + Chunk_Count;
+            Mean        = Mean + Delta*(Chunk_Count/New_Count);
+            Sum_Squares = Sum_Squares + Chunk_Sum_Squares + Delta*Delta*(Count*Chunk_Count/New_Count);
+            Count       = New_Count;
+
+    # Add noise to the selected values.
+    if(Noise_Proportion != 0):
+        Noise_Scale     : float = Noise_Proportion*numpy.sqrt(Sum_Squares/Count);
+        Selected_Values = (Selected_Values + Noise_Scale*Generator.standard_normal(Selected_Values.size)).astype(dtype = numpy.float32);
+
+    # Now split the selected points into the Training and Testing sets.
+    Inverse         : numpy.ndarray = Inverse.reshape(-1);
+    Train_Inverse   : numpy.ndarray = Inverse[:Num_Train_Examples];
+    Test_Inverse    : numpy.ndarray = Inverse[Num_Train_Examples:];
+
+    return (Selected_Inputs[Train_Inverse, :], Selected_Values[Train_Inverse],
+            Selected_Inputs[Test_Inverse,  :], Selected_Values[Test_Inverse]);
 
-    # Send everything to Create_Data_Set
-    DataSet_Name : str = (  Data_File_Name + "_" +
-                            "N" + str(int(100*Noise_Proportion)) + "_" +
-                            "P" + str(Num_Train_Examples) );
 
-    Create_Data_Set(    Name            = DataSet_Name,
-                        Train_Inputs    = Train_Inputs,
-                        Train_Targets   = Train_Targets,
-                        Test_Inputs     = Test_Inputs,
-                        Test_Targets    = Test_Targets,
-                        Input_Bounds    = Input_Bounds);
 
 if __name__ == "__main__":
     main();
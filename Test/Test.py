@@ -4,6 +4,10 @@ import unittest;
 # Import test files.
 from Test_Loss                  import Loss_Test;
 from Test_Evaluate_Derivatives  import Test_Derivative_From_Derivative;
+from Test_Points                import Test_Generate_Points;
+from Test_Network               import Test_Network;
+from Test_Training              import Test_Training;
+from Test_Data                  import Test_Data;
 
 # Test!
 if __name__ == "__main__":
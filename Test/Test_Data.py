@@ -0,0 +1,295 @@
+# Nonsense to add Code, Data directories to the Python search path.
+import os
+import sys
+
+# Get path to parent directory
+parent_dir  = os.path.dirname(os.path.dirname(os.path.abspath(__file__)));
+
+# Add the Code, Data directories to the python path.
+Code_Path       = os.path.join(parent_dir, "Code");
+Data_Path       = os.path.join(parent_dir, "Data");
+
+sys.path.append(Code_Path);
+sys.path.append(Data_Path);
+
+# external libraries and stuff.
+import  json;
+import  numpy;
+import  tempfile;
+import  torch;
+import  unittest;
+from    typing      import Dict, List;
+
+# Code files.
+from    Data                import Data_Loader, _Map_DataSet_Directory, _To_Tensor;
+from    Create_Data_Set     import Create_Data_Set, Convert_Data_Set;
+from    From_MATLAB         import From_MATLAB, Sample_Grid, h5py;
+import  From_MATLAB         as From_MATLAB_Module;
+import  scipy.io;
+
+
+
+class Test_Data(unittest.TestCase):
+    def test_DataSet_Formats(self):
+        # Make up a small DataSet.
+        Generator       : numpy.random.Generator = numpy.random.default_rng(0);
+        Train_Inputs    : numpy.ndarray = Generator.random((500, 3), dtype = numpy.float32);
+        Train_Targets   : numpy.ndarray = Generator.random(500, dtype = numpy.float32);
+        Test_Inputs     : numpy.ndarray = Generator.random((100, 3), dtype = numpy.float32);
+        Test_Targets    : numpy.ndarray = Generator.random(100, dtype = numpy.float32);
+        Input_Bounds    : numpy.ndarray = numpy.array([[0, 1], [0, 1], [0, 1]], dtype = numpy.float32);
+
+        with tempfile.TemporaryDirectory() as DataSets_Path:
+            ####################################################################
+            # Save the DataSet in both formats. Loading either one should give
+            # the same tensors.
+
+            for Format in ["npz", "Directory"]:
+                Create_Data_Set(Name            = Format,
+                                Train_Inputs    = Train_Inputs,
+                                Train_Targets   = Train_Targets,
+                                Test_Inputs     = Test_Inputs,
+                                Test_Targets    = Test_Targets,
+                                Input_Bounds    = Input_Bounds,
+                                Format          = Format,
+                                DataSets_Path   = DataSets_Path);
+
+                Data_Dict : Dict = Data_Loader( DataSet_Name    = Format,
+                                                Device          = torch.device('cpu'),
+                                                DataSets_Path   = DataSets_Path);
+
+                self.assertTrue(torch.equal(Data_Dict["Train Inputs"],  torch.from_numpy(Train_Inputs)));
+                self.assertTrue(torch.equal(Data_Dict["Train Targets"], torch.from_numpy(Train_Targets)));
+                self.assertTrue(torch.equal(Data_Dict["Test Inputs"],   torch.from_numpy(Test_Inputs)));
+                self.assertTrue(torch.equal(Data_Dict["Test Targets"],  torch.from_numpy(Test_Targets)));
+                self.assertTrue(numpy.array_equal(Data_Dict["Input Bounds"], Input_Bounds));
+                self.assertEqual(Data_Dict["Number of Dimensions"], 3);
+                del Data_Dict;
+
+
+            ####################################################################
+            # Converting the .npz DataSet should give the same directory
+            # DataSet. Loading it should memory-map the arrays (rather than
+            # copying them).
+
+            Convert_Data_Set(Name = "npz", DataSets_Path = DataSets_Path);
+            self.assertTrue(os.path.isfile(os.path.join(DataSets_Path, "npz", "Manifest.json")));
+
+            Data_Dict : Dict = Data_Loader( DataSet_Name    = "npz",
+                                            Device          = torch.device('cpu'),
+                                            DataSets_Path   = DataSets_Path);
+            self.assertTrue(torch.equal(Data_Dict["Train Inputs"], torch.from_numpy(Train_Inputs)));
+            del Data_Dict;
+
+            Arrays  : Dict          = _Map_DataSet_Directory(os.path.join(DataSets_Path, "npz"));
+            Tensor  : torch.Tensor  = _To_Tensor(Arrays["Train_Inputs"], torch.device('cpu'));
+            self.assertIsInstance(Arrays["Train_Inputs"], numpy.memmap);
+            self.assertEqual(Tensor.data_ptr(), Arrays["Train_Inputs"].ctypes.data);
+            del Arrays, Tensor;
+
+
+            ####################################################################
+            # Overwriting a directory DataSet should not change the arrays that
+            # another run memory-mapped: that run should keep reading the old
+            # values.
+
+            Old_Arrays : Dict = _Map_DataSet_Directory(os.path.join(DataSets_Path, "Directory"));
+            Create_Data_Set(Name            = "Directory",
+                            Train_Inputs    = 2*Train_Inputs,
+                            Train_Targets   = Train_Targets[:10],
+                            Test_Inputs     = Test_Inputs,
+                            Test_Targets    = Test_Targets,
+                            Input_Bounds    = Input_Bounds,
+                            DataSets_Path   = DataSets_Path);
+            self.assertTrue(numpy.array_equal(Old_Arrays["Train_Inputs"],  Train_Inputs));
+            self.assertTrue(numpy.array_equal(Old_Arrays["Train_Targets"], Train_Targets));
+            del Old_Arrays;
+
+            New_Arrays : Dict = _Map_DataSet_Directory(os.path.join(DataSets_Path, "Directory"));
+            self.assertTrue(numpy.array_equal(New_Arrays["Train_Inputs"], 2*Train_Inputs));
+            self.assertEqual(New_Arrays["Train_Targets"].shape[0], 10);
+            del New_Arrays;
+
+
+            ####################################################################
+            # If we fail while overwriting a directory DataSet, the old 
+            # manifest should be gone, so we can not load the partly written
+            # DataSet. We should not leave any temporary files behind.
+
+            with self.assertRaises(ValueError):
+                Create_Data_Set(Name            = "Directory",
+                                Train_Inputs    = Train_Inputs[:400],
+                                Train_Targets   = Train_Targets[:400],
+                                Test_Inputs     = numpy.array([None, "Not a number"], dtype = object),
+                                Test_Targets    = Test_Targets,
+                                Input_Bounds    = Input_Bounds,
+                                DataSets_Path   = DataSets_Path);
+            self.assertFalse(os.path.exists(os.path.join(DataSets_Path, "Directory", "Manifest.json")));
+            self.assertEqual([File_Name for File_Name in os.listdir(os.path.join(DataSets_Path, "Directory")) if File_Name.endswith(".tmp")], []);
+
+            Create_Data_Set(Name            = "Directory",
+                            Train_Inputs    = Train_Inputs,
+                            Train_Targets   = Train_Targets,
+                            Test_Inputs     = Test_Inputs,
+                            Test_Targets    = Test_Targets,
+                            Input_Bounds    = Input_Bounds,
+                            DataSets_Path   = DataSets_Path);
+
+
+            ####################################################################
+            # If the manifest does not match the arrays, loading should fail.
+
+            Manifest_Path : str = os.path.join(DataSets_Path, "Directory", "Manifest.json");
+            with open(Manifest_Path, "r") as File:
+                Manifest : Dict = json.load(File);
+            Manifest["Arrays"]["Train_Inputs"]["Shape"] = [400, 3];
+            with open(Manifest_Path, "w") as File:
+                json.dump(Manifest, File);
+
+            with self.assertRaises(ValueError):
+                Data_Loader(DataSet_Name    = "Directory",
+                            Device          = torch.device('cpu'),
+                            DataSets_Path   = DataSets_Path);
+
+
+
+    def test_Sample_Grid(self):
+        # Make up a solution on a (t, x, y) grid.
+        t_points    : numpy.ndarray = numpy.linspace(0, 1, 11, dtype = numpy.float32);
+        x_points    : numpy.ndarray = numpy.linspace(-1, 1, 7, dtype = numpy.float32);
+        y_points    : numpy.ndarray = numpy.linspace(2, 3, 5, dtype = numpy.float32);
+        Data_Set    : numpy.ndarray = (t_points.reshape(-1, 1, 1) + 10*x_points.reshape(1, -1, 1) + 100*y_points.reshape(1, 1, -1)).astype(numpy.float32);
+
+
+        ########################################################################
+        # Without noise, each target should be the solution at its input, and
+        # each set should have distinct points.
+
+        Train_Inputs, Train_Targets, Test_Inputs, Test_Targets = Sample_Grid(
+                                        Grid_Points         = [t_points, x_points, y_points],
+                                        Data_Set            = Data_Set,
+                                        Noise_Proportion    = 0.0,
+                                        Num_Train_Examples  = 300,
+                                        Num_Test_Examples   = 100,
+                                        Generator           = numpy.random.default_rng(0));
+
+        self.assertEqual(Train_Inputs.shape, (300, 3));
+        self.assertEqual(Test_Inputs.shape,  (100, 3));
+        self.assertEqual(Train_Targets.dtype, numpy.float32);
+        self.assertEqual(numpy.unique(Train_Inputs, axis = 0).shape[0], 300);
+        for (Inputs, Targets) in [(Train_Inputs, Train_Targets), (Test_Inputs, Test_Targets)]:
+            self.assertTrue(numpy.allclose(Targets, Inputs[:, 0] + 10*Inputs[:, 1] + 100*Inputs[:, 2]));
+
+
+        ########################################################################
+        # Sampling a transposed solution should work the same way. With noise,
+        # a point in both sets should get the same noise in both.
+
+        Train_Inputs, Train_Targets, Test_Inputs, Test_Targets = Sample_Grid(
+                                        Grid_Points         = [y_points, x_points, t_points],
+                                        Data_Set            = Data_Set.T,
+                                        Noise_Proportion    = 0.1,
+                                        Num_Train_Examples  = 350,
+                                        Num_Test_Examples   = 300,
+                                        Generator           = numpy.random.default_rng(1));
+
+        Noise : numpy.ndarray = Train_Targets - (Train_Inputs[:, 2] + 10*Train_Inputs[:, 1] + 100*Train_Inputs[:, 0]);
+        self.assertGreater(numpy.std(Noise), 0.01*numpy.std(Data_Set));
+        self.assertLess(   numpy.std(Noise), 0.2*numpy.std(Data_Set));
+
+        Num_Shared : int = 0;
+        for j in range(Test_Inputs.shape[0]):
+            Matches : numpy.ndarray = numpy.where(numpy.all(Train_Inputs == Test_Inputs[j], axis = 1))[0];
+            if(Matches.size > 0):
+                Num_Shared += 1;
+                self.assertEqual(Train_Targets[Matches[0]], Test_Targets[j]);
+        self.assertGreater(Num_Shared, 0);
+
+
+        ########################################################################
+        # Reading the solution in chunks should give the same sets (and the
+        # same noise) as reading it all at once.
+
+        Results : List = [];
+        for Chunk_Size in [None, 70]:
+            Results.append(Sample_Grid( Grid_Points         = [t_points, x_points, y_points],
+                                        Data_Set            = Data_Set,
+                                        Noise_Proportion    = 0.1,
+                                        Num_Train_Examples  = 200,
+                                        Num_Test_Examples   = 50,
+                                        Chunk_Size          = Chunk_Size,
+                                        Generator           = numpy.random.default_rng(2)));
+        for k in range(4):
+            self.assertTrue(numpy.allclose(Results[0][k], Results[1][k], atol = 1e-5));
+
+
+
+    def test_From_MATLAB(self):
+        From_MATLAB_Module.Make_Plot = False;
+
+        t_points    : numpy.ndarray = numpy.linspace(0, 1, 21);
+        x_points    : numpy.ndarray = numpy.linspace(-1, 1, 16);
+        y_points    : numpy.ndarray = numpy.linspace(2, 3, 9);
+
+        with tempfile.TemporaryDirectory() as Directory:
+            ####################################################################
+            # A v5 file with one spatial variable. Each row of usol holds the
+            # solution at one position.
+
+            usol_1D : numpy.ndarray = x_points.reshape(-1, 1) + 10*t_points.reshape(1, -1);
+            scipy.io.savemat(os.path.join(Directory, "One.mat"), {"t" : t_points, "x" : x_points, "usol" : usol_1D});
+
+            DataSet_Name : str = From_MATLAB(   Data_File_Name          = "One",
+                                                Num_Spatial_Dimensions  = 1,
+                                                Noise_Proportion        = 0.0,
+                                                Num_Train_Examples      = 200,
+                                                Num_Test_Examples       = 50,
+                                                Data_Directory          = Directory,
+                                                DataSets_Path           = Directory,
+                                                Generator               = numpy.random.default_rng(0));
+            self.assertEqual(DataSet_Name, "One_N0_P200");
+
+            Data_Dict : Dict = Data_Loader(DataSet_Name = DataSet_Name, Device = torch.device('cpu'), DataSets_Path = Directory);
+            Inputs  : torch.Tensor = Data_Dict["Train Inputs"];
+            self.assertEqual(tuple(Inputs.shape), (200, 2));
+            self.assertLess(torch.max(torch.abs(Data_Dict["Train Targets"] - (Inputs[:, 1] + 10*Inputs[:, 0]))).item(), 1e-4);
+            self.assertTrue(numpy.allclose(Data_Dict["Input Bounds"], [[0, 1], [-1, 1]]));
+            del Data_Dict, Inputs;
+
+
+            ####################################################################
+            # A v7.3 (HDF5) file with two spatial variables. MATLAB stores
+            # arrays in column-major order, so h5py sees each array's axes in
+            # reverse order. We read usol in small chunks.
+
+            if(h5py is None):
+                return;
+
+            usol_2D : numpy.ndarray = t_points.reshape(-1, 1, 1) + 10*x_points.reshape(1, -1, 1) + 100*y_points.reshape(1, 1, -1);
+            File_Path : str = os.path.join(Directory, "Two.mat");
+            with h5py.File(File_Path, mode = "w", userblock_size = 512) as File:
+                File["usol"]    = usol_2D.T;
+                File["t"]       = t_points.reshape(-1, 1);
+                File["x"]       = x_points.reshape(-1, 1);
+                File["y"]       = y_points.reshape(-1, 1);
+
+            # MATLAB's header (version 0x0200 means v7.3).
+            with open(File_Path, mode = "r+b") as File:
+                File.write(b"MATLAB 7.3 MAT-file".ljust(116, b" ") + bytes(8) + b"\x00\x02IM");
+
+            DataSet_Name : str = From_MATLAB(   Data_File_Name          = "Two",
+                                                Num_Spatial_Dimensions  = 2,
+                                                Noise_Proportion        = 0.0,
+                                                Num_Train_Examples      = 300,
+                                                Num_Test_Examples       = 100,
+                                                Chunk_Size              = 200,
+                                                Data_Directory          = Directory,
+                                                DataSets_Path           = Directory,
+                                                Generator               = numpy.random.default_rng(0));
+
+            Data_Dict : Dict = Data_Loader(DataSet_Name = DataSet_Name, Device = torch.device('cpu'), DataSets_Path = Directory);
+            Inputs  : torch.Tensor = Data_Dict["Test Inputs"];
+            self.assertEqual(tuple(Inputs.shape), (100, 3));
+            self.assertLess(torch.max(torch.abs(Data_Dict["Test Targets"] - (Inputs[:, 0] + 10*Inputs[:, 1] + 100*Inputs[:, 2]))).item(), 1e-3);
+            self.assertTrue(numpy.allclose(Data_Dict["Input Bounds"], [[0, 1], [-1, 1], [2, 3]]));
+            del Data_Dict, Inputs;
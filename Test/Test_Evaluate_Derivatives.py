@@ -19,9 +19,10 @@ import torch;
 import unittest;
 import random;
 import math;
+from   typing import List;
 
 # Code files.
-from Evaluate_Derivatives   import Derivative_From_Derivative;
+from Evaluate_Derivatives   import Derivative_From_Derivative, Derivative_Plan, Forward_Derivative_Plan;
 from Derivative             import Derivative;
 
 # Other test file.
@@ -195,6 +196,166 @@ class Test_Derivative_From_Derivative(unittest.TestCase):
             self.assertEqual(torch.sum(torch.greater_equal(From_Dt_P_Abs_Error,  epsilon)), 0);
 
 
+    def test_Derivative_Plan(self):
+        # Set up a polynomial and some coordinates (see test above).
+        n : int             = 4;
+        P : Polynomial_2D   = Polynomial_2D(n);
+
+        Num_Coords  : int           = 50;
+        Coords      : torch.Tensor  = torch.empty((Num_Coords, 2));
+        for i in range(Num_Coords):
+            Coords[i, 0] = random.uniform(-1, 1);          # t
+            Coords[i, 1] = random.uniform(-1, 1);          # x
+        Coords.requires_grad_(True);
+
+        P_Coords = P(Coords).view(-1);
+
+        # Set up the derivatives. This list is sorted by order, just like the 
+        # one that Read_Library returns.
+        I       : Derivative = Derivative(Encoding = numpy.array([0, 0]));
+        Dt      : Derivative = Derivative(Encoding = numpy.array([1, 0]));
+        Dx      : Derivative = Derivative(Encoding = numpy.array([0, 1]));
+        Dx2     : Derivative = Derivative(Encoding = numpy.array([0, 2]));
+        Dx_Dt   : Derivative = Derivative(Encoding = numpy.array([1, 1]));
+        Dx3     : Derivative = Derivative(Encoding = numpy.array([0, 3]));
+        Dx4     : Derivative = Derivative(Encoding = numpy.array([0, 4]));
+
+        Derivatives : List[Derivative] = [I, Dt, Dx, Dx2, Dx_Dt, Dx3, Dx4];
+
+
+        ########################################################################
+        # Check the plan itself. Computing everything from P would take 
+        # 1 + 1 + 2 + 2 + 3 + 4 = 13 backward passes. The plan needs 4: the 
+        # gradient of P gives Dt P and Dx P, the gradient of Dx P gives Dx2 P 
+        # and Dx_Dt P, and so on.
+
+        Plan : Derivative_Plan = Derivative_Plan(Derivatives = Derivatives);
+
+        self.assertEqual(Plan.Steps, [(0, 0), (0, 1), (0, 2), (0, 3)]);
+        self.assertEqual(Plan.Num_Grad_Passes, 4);
+
+
+        ########################################################################
+        # Check that executing the plan gives the same values as computing each
+        # derivative directly from P.
+
+        D_P_Dict = Plan(U_Coords = P_Coords, Coords = Coords);
+
+        epsilon : float = 1e-4;
+        for D in Derivatives:
+            D_P_True = Derivative_From_Derivative(Da = D, Db = I, Db_U = P_Coords, Coords = Coords);
+            Abs_Error = torch.abs(torch.subtract(D_P_Dict[tuple(D.Encoding)], D_P_True));
+            self.assertEqual(torch.sum(torch.greater_equal(Abs_Error, epsilon)), 0);
+
+
+
+    def test_Derivative_Plan_3D(self):
+        # Set up a polynomial and some (t, x, y) coordinates.
+        n : int             = 4;
+        P : Polynomial_3D   = Polynomial_3D(n);
+
+        Num_Coords  : int           = 50;
+        Coords      : torch.Tensor  = torch.empty((Num_Coords, 3)).uniform_(-1, 1);
+        Coords.requires_grad_(True);
+
+        P_Coords = P(Coords).view(-1);
+
+        # Set up a library with mixed partials and a Laplacian (like the one 
+        # for Heat_Exp_Cos_2D).
+        Dt      : Derivative = Derivative(Encoding = numpy.array([1, 0, 0]));
+        Dx      : Derivative = Derivative(Encoding = numpy.array([0, 1, 0]));
+        Dy      : Derivative = Derivative(Encoding = numpy.array([0, 0, 1]));
+        Dx2     : Derivative = Derivative(Encoding = numpy.array([0, 2, 0]));
+        Dx_Dy   : Derivative = Derivative(Encoding = numpy.array([0, 1, 1]));
+        Dy2     : Derivative = Derivative(Encoding = numpy.array([0, 0, 2]));
+        Dx2_Dy  : Derivative = Derivative(Encoding = numpy.array([0, 2, 1]));
+
+        Derivatives : List[Derivative] = [Dt, Dx, Dy, Dx2, Dx_Dy, Dy2, Dx2_Dy];
+
+
+        ########################################################################
+        # Computing everything from P would take 1 + 1 + 1 + 2 + 2 + 2 + 3 = 12
+        # backward passes. Since the plan keeps every column of each gradient,
+        # it needs 4 (the gradients of P, Dx P, Dy P, and Dx_Dy P).
+
+        Plan : Derivative_Plan = Derivative_Plan(Derivatives = Derivatives);
+
+        self.assertEqual(Plan.Num_Dim, 3);
+        self.assertEqual(Plan.Steps, [(0, 0, 0), (0, 1, 0), (0, 0, 1), (0, 1, 1)]);
+
+
+        ########################################################################
+        # Check the plan's values.
+
+        D_P_Dict = Plan(U_Coords = P_Coords, Coords = Coords);
+
+        I       : Derivative = Derivative(Encoding = numpy.array([0, 0, 0]));
+        epsilon : float = 1e-4;
+        for D in Derivatives:
+            D_P_True = Derivative_From_Derivative(Da = D, Db = I, Db_U = P_Coords, Coords = Coords);
+            Abs_Error = torch.abs(torch.subtract(D_P_Dict[tuple(D.Encoding)], D_P_True));
+            self.assertEqual(torch.sum(torch.greater_equal(Abs_Error, epsilon)), 0);
+
+
+
+    def test_Forward_Derivative_Plan(self):
+        # Set up a polynomial and some (t, x, y) coordinates.
+        n : int             = 4;
+        P : Polynomial_3D   = Polynomial_3D(n);
+
+        Num_Coords  : int           = 50;
+        Coords      : torch.Tensor  = torch.empty((Num_Coords, 3)).uniform_(-1, 1);
+
+        # Set up a library with derivatives up to order 4.
+        I       : Derivative = Derivative(Encoding = numpy.array([0, 0, 0]));
+        Dt      : Derivative = Derivative(Encoding = numpy.array([1, 0, 0]));
+        Dx      : Derivative = Derivative(Encoding = numpy.array([0, 1, 0]));
+        Dx2     : Derivative = Derivative(Encoding = numpy.array([0, 2, 0]));
+        Dx_Dy   : Derivative = Derivative(Encoding = numpy.array([0, 1, 1]));
+        Dx3_Dy  : Derivative = Derivative(Encoding = numpy.array([0, 3, 1]));
+        Dx4     : Derivative = Derivative(Encoding = numpy.array([0, 4, 0]));
+        Dy4     : Derivative = Derivative(Encoding = numpy.array([0, 0, 4]));
+
+        Derivatives : List[Derivative] = [I, Dt, Dx, Dx2, Dx_Dy, Dx3_Dy, Dx4, Dy4];
+
+
+        ########################################################################
+        # The sequences of Dx, Dx2 are prefixes of that of Dx4, and Dx_Dy's is 
+        # not a prefix of Dx3_Dy's (1, 1, 1, 2). Thus, we need 5 sweeps.
+
+        Plan : Forward_Derivative_Plan = Forward_Derivative_Plan(Derivatives = Derivatives);
+
+        self.assertEqual(Plan.Chains, [(0,), (1, 2), (1, 1, 1, 2), (1, 1, 1, 1), (2, 2, 2, 2)]);
+
+
+        ########################################################################
+        # Check that the plan's values match those of Derivative_From_Derivative.
+
+        D_P_Dict = Plan(U = P, Coords = Coords);
+
+        Coords.requires_grad_(True);
+        P_Coords = P(Coords).view(-1);
+
+        epsilon : float = 1e-4;
+        for D in Derivatives:
+            D_P_True = Derivative_From_Derivative(Da = D, Db = I, Db_U = P_Coords, Coords = Coords);
+            Abs_Error = torch.abs(torch.subtract(D_P_Dict[tuple(D.Encoding)], D_P_True));
+            self.assertEqual(torch.sum(torch.greater_equal(Abs_Error, epsilon)), 0);
+
+
+
+    def test_Is_Child_Of(self):
+        # D_y is not a child of D_x (even though D_x has a shorter Encoding), 
+        # but D_x is a child of D_x D_y.
+        Dx      : Derivative = Derivative(Encoding = numpy.array([0, 1]));
+        Dy      : Derivative = Derivative(Encoding = numpy.array([0, 0, 1]));
+        Dx_Dy   : Derivative = Derivative(Encoding = numpy.array([0, 1, 1]));
+
+        self.assertFalse(Dy.Is_Child_Of(Dx));
+        self.assertTrue( Dx.Is_Child_Of(Dx_Dy));
+        self.assertTrue( Dy.Is_Child_Of(Dx_Dy));
+
+
     """
     def test_Evalu_Deriv_3D(self):
         # First, we need to set up a simple function with known derivatives so that
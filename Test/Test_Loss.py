@@ -24,9 +24,11 @@ from    typing  import List;
 # Code files.
 from    Derivative  import Derivative;
 from    Term        import Term;
-from    Loss        import Coll_Loss, L0_Approx_Loss, Lp_Loss;
+from    Loss        import Coll_Loss, Lp_Loss;
 from    Points      import Generate_Points;
-from    Evaluate_Derivatives import Derivative_From_Derivative;
+from    Evaluate_Derivatives import Derivative_From_Derivative, Derivative_Plan;
+from    Library_Matrix       import Library_Matrix, Power_Cache;
+from    Network              import Network;
 
 # Other test file.
 from    Polynomials import Polynomial_2D, Polynomial_3D;
@@ -102,12 +104,193 @@ class Loss_Test(unittest.TestCase):
 
         Loss_Actual = Coll_Loss(    U               = P,
                                     Xi              = Xi,
+                                    Mask            = torch.zeros(5, dtype = torch.bool),
                                     Coll_Points     = Coords,
                                     Derivatives     = Derivatives,
                                     LHS_Term        = LHS_Term,
                                     RHS_Terms       = RHS_Terms)[0];
-        # Check that it worked!
-        self.assertEqual(Loss_Actual.item(), Loss_Pred.item());
+        # Check that it worked! Coll_Loss evaluates the library using a 
+        # matrix-vector product, which adds up the terms in a different order
+        # than we do above. Thus, we only expect agreement up to round-off.
+        self.assertLess(abs(Loss_Actual.item() - Loss_Pred.item()), 1e-5*abs(Loss_Pred.item()));
+
+
+
+    def test_Library_Matrix(self):
+        # Set up some coordinates and a polynomial (see test_Coll_Loss_2D).
+        P       = Polynomial_2D(3);
+        Bounds  = numpy.array(  [[0 , 1],
+                                 [-1, 1]], dtype = numpy.float32);
+        Coords  = Generate_Points(Bounds = Bounds, Num_Points = 100);
+        Coords.requires_grad_(True);
+
+        I   : Derivative  = Derivative(Encoding = numpy.array([0, 0]));
+        Dt  : Derivative  = Derivative(Encoding = numpy.array([1, 0]));
+        Dx  : Derivative  = Derivative(Encoding = numpy.array([0, 1]));
+
+        P_Coords    = P(Coords).view(-1);
+        Dt_P        = Derivative_From_Derivative(Da = Dt, Db = I, Db_U = P_Coords, Coords = Coords).view(-1);
+        Dx_P        = Derivative_From_Derivative(Da = Dx, Db = I, Db_U = P_Coords, Coords = Coords).view(-1);
+
+        # Set up the library. The last term uses U in two of its sub-terms; the
+        # library matrix should add their powers.
+        LHS_Term    : Term          = Term(Derivatives = [Dt],          Powers = [1]);
+        RHS_Terms   : List[Term]    = [ Term(Derivatives = [I],         Powers = [2]),
+                                        Term(Derivatives = [Dx],        Powers = [1]),
+                                        Term(Derivatives = [I, Dx, I],  Powers = [1, 2, 2])];
+
+        Library = Library_Matrix(Derivatives = [I, Dt, Dx], LHS_Term = LHS_Term, RHS_Terms = RHS_Terms);
+        self.assertEqual(Library.Max_Power, 3);
+        self.assertEqual(Library.RHS_Exponents.tolist(), [[2, 0, 0], [0, 0, 1], [3, 0, 2]]);
+
+        # The distinct factors are U^2, U^3, Dt U, Dx U, and (Dx U)^2.
+        self.assertEqual(Library.Factors, [(0, 2), (0, 3), (1, 1), (2, 1), (2, 2)]);
+
+        # Evaluate the library, check it matches what we expect.
+        Cache       = Power_Cache(D_U_Dict = {(0, 0) : P_Coords, (1, 0) : Dt_P, (0, 1) : Dx_P});
+        b_P, L_P    = Library.Evaluate(Cache);
+
+        L_P_Pred    = torch.stack(( torch.pow(P_Coords, 2),
+                                    Dx_P,
+                                    torch.pow(P_Coords, 3)*torch.pow(Dx_P, 2)), dim = 1);
+
+        epsilon : float = 1e-5;
+        self.assertLess(torch.max(torch.abs(b_P - Dt_P)).item(),     epsilon);
+        self.assertLess(torch.max(torch.abs(L_P - L_P_Pred)).item(), epsilon*torch.max(torch.abs(L_P_Pred)).item());
+
+        # Every factor is requested exactly once. Dt U and Dx U are hits. The
+        # cache builds U^2, U^3, and (Dx U)^2 (misses) with one multiplication
+        # each; each reads a lower power from the cache (a hit).
+        self.assertEqual(Cache.Misses, 3);
+        self.assertEqual(Cache.Hits,   5);
+
+
+        ########################################################################
+        # Masked terms should not affect the loss. Masking the second term 
+        # should give the same loss as setting Xi[1] = 0.
+
+        Xi      = torch.rand(3, dtype = torch.float32);
+        Xi_0    = Xi.clone();
+        Xi_0[1] = 0;
+        Mask    = torch.tensor([False, True, False]);
+
+        Masked_Loss   = Coll_Loss(U = P, Xi = Xi,   Mask = Mask,                            Coll_Points = Coords, Derivatives = [I, Dt, Dx], LHS_Term = LHS_Term, RHS_Terms = RHS_Terms)[0];
+        Unmasked_Loss = Coll_Loss(U = P, Xi = Xi_0, Mask = torch.zeros(3, dtype = torch.bool), Coll_Points = Coords, Derivatives = [I, Dt, Dx], LHS_Term = LHS_Term, RHS_Terms = RHS_Terms)[0];
+        self.assertLess(abs(Masked_Loss.item() - Unmasked_Loss.item()), 1e-5*abs(Unmasked_Loss.item()));
+
+        # Masking the last term should compact the library: U^3 and (Dx U)^2 
+        # are no longer factors, and the last column disappears.
+        Library.Set_Mask(torch.tensor([False, False, True]));
+        self.assertEqual(Library.Active_Terms, [0, 1]);
+        self.assertEqual(Library.Factors,      [(0, 2), (1, 1), (2, 1)]);
+
+        b_P, L_P = Library.Evaluate(Power_Cache(D_U_Dict = {(0, 0) : P_Coords, (1, 0) : Dt_P, (0, 1) : Dx_P}));
+        self.assertEqual(tuple(L_P.shape), (100, 2));
+        self.assertLess(torch.max(torch.abs(L_P - L_P_Pred[:, :2])).item(), epsilon*torch.max(torch.abs(L_P_Pred[:, :2])).item());
+
+        # Masked components of Xi should get zero gradient.
+        Xi      = torch.rand(3, dtype = torch.float32, requires_grad = True);
+        Mask    = torch.tensor([False, False, True]);
+        Loss    = Coll_Loss(U = P, Xi = Xi, Mask = Mask, Coll_Points = Coords, Derivatives = [I, Dt, Dx], LHS_Term = LHS_Term, RHS_Terms = RHS_Terms, Library = Library)[0] + Lp_Loss(Xi = Xi, Mask = Mask, p = 0.5);
+        Loss.backward();
+        self.assertEqual(Xi.grad[2].item(), 0.0);
+        self.assertNotEqual(Xi.grad[0].item(), 0.0);
+
+
+
+    def test_Derivative_Pruning(self):
+        # Set up a network and a library whose terms use derivatives up to 
+        # D_x^3 U.
+        U       = Network(Widths = [2, 10, 10, 1], Hidden_Activation = "Tanh");
+        Bounds  = numpy.array(  [[0 , 1],
+                                 [-1, 1]], dtype = numpy.float32);
+        Coords  = Generate_Points(Bounds = Bounds, Num_Points = 100);
+
+        I   : Derivative  = Derivative(Encoding = numpy.array([0, 0]));
+        Dt  : Derivative  = Derivative(Encoding = numpy.array([1, 0]));
+        Dx  : Derivative  = Derivative(Encoding = numpy.array([0, 1]));
+        Dx2 : Derivative  = Derivative(Encoding = numpy.array([0, 2]));
+        Dx3 : Derivative  = Derivative(Encoding = numpy.array([0, 3]));
+        Derivatives : List[Derivative] = [I, Dt, Dx, Dx2, Dx3];
+
+        LHS_Term    : Term          = Term(Derivatives = [Dt],      Powers = [1]);
+        RHS_Terms   : List[Term]    = [ Term(Derivatives = [I, Dx], Powers = [1, 1]),
+                                        Term(Derivatives = [Dx2],   Powers = [1]),
+                                        Term(Derivatives = [Dx3],   Powers = [1])];
+
+        # Without a mask, we need every derivative.
+        Library = Library_Matrix(Derivatives = Derivatives, LHS_Term = LHS_Term, RHS_Terms = RHS_Terms);
+        self.assertEqual(Library.Required_Derivatives, Derivatives);
+
+        # Masking the D_x^3 term means we do not need D_x^3 U. Masking the 
+        # D_x^2 term as well means we do not need D_x^2 U either.
+        Library.Set_Mask(torch.tensor([False, False, True]));
+        self.assertEqual(Library.Required_Derivatives, [I, Dt, Dx, Dx2]);
+
+        Mask = torch.tensor([False, True, True]);
+        Library.Set_Mask(Mask);
+        self.assertEqual(Library.Required_Derivatives, [I, Dt, Dx]);
+
+        # A plan for the required derivatives needs fewer backward passes, but
+        # should give the same loss as a plan for every derivative.
+        Pruned_Plan = Derivative_Plan(Derivatives = Library.Required_Derivatives);
+        Full_Plan   = Derivative_Plan(Derivatives = Derivatives);
+        self.assertLess(Pruned_Plan.Num_Grad_Passes, Full_Plan.Num_Grad_Passes);
+
+        Xi = torch.rand(3, dtype = torch.float32);
+        Losses : List[float] = [];
+        for Plan in [Pruned_Plan, Full_Plan, None]:
+            Losses.append(Coll_Loss(U = U, Xi = Xi, Mask = Mask, Coll_Points = Coords.clone(), Derivatives = Derivatives, LHS_Term = LHS_Term, RHS_Terms = RHS_Terms, Plan = Plan, Library = Library)[0].item());
+        self.assertLess(abs(Losses[0] - Losses[1]), 1e-6*max(abs(Losses[1]), 1));
+        self.assertLess(abs(Losses[0] - Losses[2]), 1e-6*max(abs(Losses[1]), 1));
+
+        # If we un-mask the D_x^2 term, the pruned plan no longer computes 
+        # every derivative we need. Coll_Loss should catch this.
+        Mask = torch.tensor([False, False, True]);
+        Library.Set_Mask(Mask);
+        with self.assertRaises(AssertionError):
+            Coll_Loss(U = U, Xi = Xi, Mask = Mask, Coll_Points = Coords.clone(), Derivatives = Derivatives, LHS_Term = LHS_Term, RHS_Terms = RHS_Terms, Plan = Pruned_Plan, Library = Library);
+
+
+
+    def test_Compiled_Residual(self):
+        # Set up a network and a library (see test_Library_Matrix). 
+        U       = Network(Widths = [2, 10, 10, 1], Hidden_Activation = "Tanh");
+        Bounds  = numpy.array(  [[0 , 1],
+                                 [-1, 1]], dtype = numpy.float32);
+
+        I   : Derivative  = Derivative(Encoding = numpy.array([0, 0]));
+        Dt  : Derivative  = Derivative(Encoding = numpy.array([1, 0]));
+        Dx  : Derivative  = Derivative(Encoding = numpy.array([0, 1]));
+
+        LHS_Term    : Term          = Term(Derivatives = [Dt],          Powers = [1]);
+        RHS_Terms   : List[Term]    = [ Term(Derivatives = [I],         Powers = [2]),
+                                        Term(Derivatives = [Dx],        Powers = [1]),
+                                        Term(Derivatives = [I, Dx, I],  Powers = [1, 2, 2])];
+
+        Library             = Library_Matrix(Derivatives = [I, Dt, Dx], LHS_Term = LHS_Term, RHS_Terms = RHS_Terms);
+        Compiled_Library    = Library_Matrix(Derivatives = [I, Dt, Dx], LHS_Term = LHS_Term, RHS_Terms = RHS_Terms);
+        Compiled_Library.Compile();
+
+        # The compiled and un-compiled residuals (and their gradients) should
+        # match, for several numbers of points. If compilation failed, we fall
+        # back on the un-compiled residual, which should also match.
+        Xi      = torch.rand(3, dtype = torch.float32, requires_grad = True);
+        Mask    = torch.tensor([False, True, False]);
+        for Num_Points in [50, 100]:
+            Coords = Generate_Points(Bounds = Bounds, Num_Points = Num_Points);
+
+            Results : List = [];
+            for Lib in [Library, Compiled_Library]:
+                U.zero_grad();
+                Xi.grad = None;
+
+                Loss, Residual = Coll_Loss(U = U, Xi = Xi, Mask = Mask, Coll_Points = Coords.clone(), Derivatives = [I, Dt, Dx], LHS_Term = LHS_Term, RHS_Terms = RHS_Terms, Library = Lib);
+                Loss.backward();
+                Results.append((Residual.detach(), Xi.grad.clone(), U.Layers[0].weight.grad.clone()));
+
+            for k in range(3):
+                self.assertLess(torch.max(torch.abs(Results[0][k] - Results[1][k])).item(), 1e-5*max(torch.max(torch.abs(Results[0][k])).item(), 1));
 
     """
     def test_Coll_Loss_3D(self):
@@ -188,7 +371,7 @@ class Loss_Test(unittest.TestCase):
 
         # In this case, we expect the Lp loss to be 0.
         Predict : float = 0;
-        Actual  : float = Lp_Loss(Xi = Xi, p = p).item();
+        Actual  : float = Lp_Loss(Xi = Xi, Mask = torch.zeros(N, dtype = torch.bool), p = p).item();
 
         # Check results
         epsilon : float = .00001;
@@ -204,7 +387,7 @@ class Loss_Test(unittest.TestCase):
 
         # In this case, we expect the result to be N*(x^p).
         Predict = N*(x ** p);
-        Actual  = Lp_Loss(Xi = Xi, p = p).item();
+        Actual  = Lp_Loss(Xi = Xi, Mask = torch.zeros(N, dtype = torch.bool), p = p).item();
 
         # Check results
         self.assertLess(abs(Predict - Actual), epsilon);
@@ -218,12 +401,27 @@ class Loss_Test(unittest.TestCase):
 
         # In this case, we expect the result to be M*(x^p).
         Predict = M*(x **p );
-        Actual = Lp_Loss(Xi = Xi, p = p).item();
+        Actual = Lp_Loss(Xi = Xi, Mask = torch.zeros(N, dtype = torch.bool), p = p).item();
 
         self.assertLess(abs(Predict - Actual), epsilon);
         #print("p = %f, x = %f, M = %d, Predict = %lf, actual = %f" % (p, x, M, Predict, Actual));
 
+        ########################################################################
+        # Test 4 : Same as test 3, but we mask the first K components of Xi.
+        # Masked components should not contribute to the loss.
+
+        K : int = random.randrange(0, M);
+        Mask = torch.zeros(N, dtype = torch.bool);
+        Mask[:K] = True;
+
+        # In this case, we expect the result to be (M - K)*(x^p).
+        Predict = (M - K)*(x ** p);
+        Actual  = Lp_Loss(Xi = Xi, Mask = Mask, p = p).item();
+
+        self.assertLess(abs(Predict - Actual), epsilon*(M - K));
+
 
+    @unittest.skip("L0_Approx_Loss no longer exists in Loss.py")
     def test_L0_Approx_Loss(self):
         ########################################################################
         # Test 1 : Xi = 0
@@ -0,0 +1,179 @@
+# Nonsense to add Code, Classes directories to the Python search path.
+import os
+import sys
+
+# Get path to parent directory
+parent_dir  = os.path.dirname(os.path.dirname(os.path.abspath(__file__)));
+
+# Add the Code, Classes directories to the python path.
+Code_Path       = os.path.join(parent_dir, "Code");
+Classes_Path    = os.path.join(Code_Path, "Classes");
+
+sys.path.append(Code_Path);
+sys.path.append(Classes_Path);
+
+# external libraries and stuff.
+import  numpy;
+import  torch;
+import  unittest;
+from    typing      import List;
+
+# Code files.
+from    Network                 import Network, Ensemble_Network, Rational_Function, Rational, Unfused_Rational;
+from    Derivative              import Derivative;
+from    Evaluate_Derivatives    import Derivative_From_Derivative, Jet_Derivative_Plan;
+
+
+
+class Test_Network(unittest.TestCase):
+    def test_Jet_Forward(self):
+        # For each hidden activation function, check that the jet matches the
+        # derivatives that autograd gives us. The output layer does not use an
+        # activation function, so this also tests the "None" case.
+        for Activation in ["Tanh", "Sigmoid", "Elu", "Rational"]:
+            U : Network = Network(Widths = [2, 20, 20, 1], Hidden_Activation = Activation);
+
+            Num_Coords  : int           = 100;
+            Coords      : torch.Tensor  = torch.empty((Num_Coords, 2)).uniform_(-1, 1);
+            Coords.requires_grad_(True);
+
+            # Find the value and first four x derivatives using autograd.
+            D_U     : torch.Tensor          = U(Coords).view(-1);
+            D_U_List: List[torch.Tensor]    = [D_U];
+            for k in range(4):
+                D_U = torch.autograd.grad(  outputs         = D_U,
+                                            inputs          = Coords,
+                                            grad_outputs    = torch.ones_like(D_U),
+                                            create_graph    = True)[0][:, 1];
+                D_U_List.append(D_U);
+
+            D_U_True    : torch.Tensor = torch.stack(D_U_List, dim = 1);
+            Jet         : torch.Tensor = U.Jet_Forward(X = Coords, Axis = 1, Order = 4);
+
+            self.assertEqual(tuple(Jet.shape), (Num_Coords, 5));
+
+            # Compare each column, relative to its largest element.
+            for k in range(5):
+                Error : float = torch.max(torch.abs(Jet[:, k] - D_U_True[:, k])).item();
+                Scale : float = max(torch.max(torch.abs(D_U_True[:, k])).item(), 1e-3);
+                self.assertLess(Error, 1e-4*Scale);
+
+
+
+    def test_Jet_Derivative_Plan(self):
+        # Set up a network and some (t, x, y) coordinates.
+        U : Network = Network(Widths = [3, 20, 20, 1], Hidden_Activation = "Rational");
+
+        Num_Coords  : int           = 100;
+        Coords      : torch.Tensor  = torch.empty((Num_Coords, 3)).uniform_(-1, 1);
+
+        # Set up a library with a mixed partial. The plan should use jets for 
+        # the t and x derivatives, and fall back on forward-mode for D_x D_y.
+        I       : Derivative = Derivative(Encoding = numpy.array([0, 0, 0]));
+        Dt      : Derivative = Derivative(Encoding = numpy.array([1, 0, 0]));
+        Dx      : Derivative = Derivative(Encoding = numpy.array([0, 1, 0]));
+        Dx_Dy   : Derivative = Derivative(Encoding = numpy.array([0, 1, 1]));
+        Dx3     : Derivative = Derivative(Encoding = numpy.array([0, 3, 0]));
+        Derivatives : List[Derivative] = [I, Dt, Dx, Dx_Dy, Dx3];
+
+        Plan : Jet_Derivative_Plan = Jet_Derivative_Plan(Derivatives = Derivatives);
+        self.assertEqual(Plan.Jet_Orders,         {0 : 1, 1 : 3});
+        self.assertEqual(Plan.Mixed_Derivatives,  [Dx_Dy]);
+        self.assertEqual(Plan.Chains,             [(1, 2)]);
+
+        # Check the plan's values.
+        D_U_Dict = Plan(U = U, Coords = Coords);
+
+        Coords.requires_grad_(True);
+        U_Coords : torch.Tensor = U(Coords).view(-1);
+
+        for D in Derivatives:
+            D_U_True    : torch.Tensor  = Derivative_From_Derivative(Da = D, Db = I, Db_U = U_Coords, Coords = Coords);
+            Error       : float         = torch.max(torch.abs(D_U_Dict[tuple(D.Encoding)] - D_U_True)).item();
+            Scale       : float         = max(torch.max(torch.abs(D_U_True)).item(), 1e-3);
+            self.assertLess(Error, 1e-4*Scale);
+
+
+
+    def test_Rational_Function(self):
+        # Check Rational_Function's first and second derivatives (with respect
+        # to X and the coefficients) against finite differences. We use 
+        # doubles, since finite differences are not accurate in single 
+        # precision.
+        X   : torch.Tensor = torch.empty((10, 3), dtype = torch.float64).uniform_(-2, 2).requires_grad_(True);
+        a   : torch.Tensor = torch.tensor((0.0218, 0.5, 1.5957, 1.1915), dtype = torch.float64, requires_grad = True);
+        b   : torch.Tensor = torch.tensor((1.0, 0.0, 2.3830),           dtype = torch.float64, requires_grad = True);
+
+        self.assertTrue(torch.autograd.gradcheck(    Rational_Function.apply, (X, a, b), check_forward_ad = True));
+        self.assertTrue(torch.autograd.gradgradcheck(Rational_Function.apply, (X, a, b)));
+
+        # Now check batched coefficients (as the ensemble uses them): a[j] and
+        # b[j] are 2 by 1 by 1, and broadcast with a 2 by 5 by 3 tensor.
+        Y   : torch.Tensor = torch.empty((2, 5, 3), dtype = torch.float64).uniform_(-2, 2).requires_grad_(True);
+        a_R : torch.Tensor = (a.detach().view(4, 1) + 0.1*torch.rand((4, 2), dtype = torch.float64)).view(4, 2, 1, 1).requires_grad_(True);
+        b_R : torch.Tensor = (b.detach().view(3, 1) + 0.1*torch.rand((3, 2), dtype = torch.float64)).view(3, 2, 1, 1).requires_grad_(True);
+
+        self.assertTrue(torch.autograd.gradcheck(    Rational_Function.apply, (Y, a_R, b_R), check_forward_ad = True));
+        self.assertTrue(torch.autograd.gradgradcheck(Rational_Function.apply, (Y, a_R, b_R)));
+
+        # Rational_Function should work with torch.func's vmap and jvp. Nested
+        # jvps need Unfused_Rational; they should then match the second 
+        # derivative that autograd gives.
+        R   : Rational      = Rational().to(dtype = torch.float64);
+        Z   : torch.Tensor  = X.detach()[:, 0];
+        One : torch.Tensor  = torch.ones_like(Z);
+
+        Mapped : torch.Tensor = torch.func.vmap(Rational_Function.apply, in_dims = (0, None, None))(X.detach(), a.detach(), b.detach());
+        self.assertTrue(torch.allclose(Mapped, Rational_Function.apply(X, a, b).detach()));
+
+        dR  = lambda Z : torch.func.jvp(R, (Z,), (One,))[1];
+        d2R = lambda Z : torch.func.jvp(dR, (Z,), (One,))[1];
+        with Unfused_Rational():
+            Nested_d2R : torch.Tensor = d2R(Z);
+
+        Z_Grad  : torch.Tensor = Z.clone().requires_grad_(True);
+        dR_Z    : torch.Tensor = torch.autograd.grad(R(Z_Grad).sum(), Z_Grad, create_graph = True)[0];
+        d2R_Z   : torch.Tensor = torch.autograd.grad(dR_Z.sum(), Z_Grad)[0];
+        self.assertTrue(torch.allclose(dR(Z), dR_Z.detach()));
+        self.assertTrue(torch.allclose(Nested_d2R, d2R_Z));
+
+
+
+    def test_Ensemble_Network(self):
+        # Set up three networks (with different rational coefficients).
+        U_List : List[Network] = [];
+        for k in range(3):
+            U_List.append(Network(Widths = [2, 10, 10, 1], Hidden_Activation = "Rational"));
+            with torch.no_grad():
+                U_List[k].Activation_Functions[0].a.add_(0.1*torch.randn(4));
+
+        Ensemble : Ensemble_Network = Ensemble_Network(U_List = U_List);
+
+        # The first 40 rows go to U_List[0], the next 40 to U_List[1], etc.
+        B       : int           = 40;
+        Coords  : torch.Tensor  = torch.empty((3*B, 2)).uniform_(-1, 1);
+
+        U_Coords        : torch.Tensor = Ensemble(Coords);
+        U_Coords_True   : torch.Tensor = torch.cat([U_List[k](Coords[k*B:(k + 1)*B]) for k in range(3)], dim = 0);
+        self.assertLess(torch.max(torch.abs(U_Coords - U_Coords_True)).item(), 1e-5);
+
+        Jet         : torch.Tensor = Ensemble.Jet_Forward(X = Coords, Axis = 1, Order = 3);
+        Jet_True    : torch.Tensor = torch.cat([U_List[k].Jet_Forward(X = Coords[k*B:(k + 1)*B], Axis = 1, Order = 3) for k in range(3)], dim = 0);
+        self.assertLess(torch.max(torch.abs(Jet - Jet_True)).item(), 1e-4*torch.max(torch.abs(Jet_True)).item());
+
+        # Gradients should flow back to each network's parameters.
+        torch.sum(U_Coords).backward();
+        for k in range(3):
+            self.assertIsNotNone(U_List[k].Layers[0].weight.grad);
+            self.assertIsNotNone(U_List[k].Activation_Functions[0].a.grad);
+
+        # The ensemble should match the networks for every activation 
+        # function. In particular, Softmax should normalize over each 
+        # network's neurons (not over the networks).
+        for Activation in ["None", "Tanh", "Sigmoid", "Elu", "Softmax", "Rational"]:
+            Activation_U_List   : List[Network]     = [Network(Widths = [2, 10, 10, 1], Hidden_Activation = Activation) for k in range(3)];
+            Activation_Ensemble : Ensemble_Network  = Ensemble_Network(U_List = Activation_U_List);
+
+            U_Coords        = Activation_Ensemble(Coords);
+            U_Coords_True   = torch.cat([Activation_U_List[k](Coords[k*B:(k + 1)*B]) for k in range(3)], dim = 0);
+            self.assertLess(torch.max(torch.abs(U_Coords - U_Coords_True)).item(), 1e-5, msg = Activation);
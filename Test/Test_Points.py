@@ -0,0 +1,271 @@
+# Nonsense to add Code directory to the Python search path.
+import os
+import sys
+
+# Get path to parent directory
+parent_dir  = os.path.dirname(os.path.dirname(os.path.abspath(__file__)));
+
+# Add the Code directory to the python path.
+Code_Path       = os.path.join(parent_dir, "Code");
+
+# Add the Code, Classes paths.
+sys.path.append(Code_Path);
+sys.path.append(os.path.join(Code_Path, "Classes"));
+
+# external libraries and stuff.
+import  numpy;
+import  torch;
+import  unittest;
+
+# Code files.
+from    Points          import Generate_Points, Importance_Points, Samplers, Latin_Hypercube_Sampler, Stratified_Grid_Sampler;
+from    Residual_Pool   import Residual_Pool;
+from    Collocation_Buffer import Collocation_Buffer;
+
+
+
+class Test_Generate_Points(unittest.TestCase):
+    def test_Generate_Points(self):
+        Bounds = numpy.array(  [[0 , 1],
+                                [-1, 1],
+                                [2 , 5]], dtype = numpy.float32);
+        Num_Points : int = 10000;
+
+        ########################################################################
+        # Check that the points have the right shape, and that they live in the
+        # rectangle.
+
+        Points : torch.Tensor = Generate_Points(Bounds = Bounds, Num_Points = Num_Points);
+        self.assertEqual(tuple(Points.shape), (Num_Points, 3));
+
+        for j in range(3):
+            self.assertTrue(torch.all(Points[:, j] >= Bounds[j, 0]).item());
+            self.assertTrue(torch.all(Points[:, j] <= Bounds[j, 1]).item());
+
+
+        ########################################################################
+        # Check that two generators with the same seed give the same points.
+
+        Generator_1 : torch.Generator = torch.Generator();
+        Generator_2 : torch.Generator = torch.Generator();
+        Generator_1.manual_seed(1234);
+        Generator_2.manual_seed(1234);
+
+        Points_1 : torch.Tensor = Generate_Points(Bounds = Bounds, Num_Points = Num_Points, Generator = Generator_1);
+        Points_2 : torch.Tensor = Generate_Points(Bounds = Bounds, Num_Points = Num_Points, Generator = Generator_2);
+        self.assertTrue(torch.equal(Points_1, Points_2));
+
+
+
+    def test_Samplers(self):
+        Bounds = numpy.array(  [[0 , 1],
+                                [-1, 1]], dtype = numpy.float32);
+        Num_Points : int = 1000;
+
+        ########################################################################
+        # Each sampler should give Num_Points points in the rectangle, and 
+        # should be reproducible.
+
+        for Sampler in Samplers.keys():
+            Generator_1 : torch.Generator = torch.Generator();
+            Generator_2 : torch.Generator = torch.Generator();
+            Generator_1.manual_seed(1234);
+            Generator_2.manual_seed(1234);
+
+            Points_1 : torch.Tensor = Generate_Points(Bounds = Bounds, Num_Points = Num_Points, Generator = Generator_1, Sampler = Sampler);
+            Points_2 : torch.Tensor = Generate_Points(Bounds = Bounds, Num_Points = Num_Points, Generator = Generator_2, Sampler = Sampler);
+
+            self.assertEqual(tuple(Points_1.shape), (Num_Points, 2));
+            self.assertTrue(torch.equal(Points_1, Points_2));
+
+            for j in range(2):
+                self.assertTrue(torch.all(Points_1[:, j] >= Bounds[j, 0]).item());
+                self.assertTrue(torch.all(Points_1[:, j] <= Bounds[j, 1]).item());
+
+
+        ########################################################################
+        # In a Latin hypercube sample, each of the Num_Points intervals along 
+        # each axis should contain exactly one point. Thus, if we sort the jth
+        # coordinates, the kth one should lie in [k/Num_Points, (k + 1)/Num_Points]
+        # (up to round-off).
+
+        Points : torch.Tensor = Latin_Hypercube_Sampler(Num_Points = Num_Points, Num_Dim = 3, Device = torch.device('cpu'));
+        Lower  : torch.Tensor = torch.arange(Num_Points, dtype = torch.float64)/Num_Points;
+        for j in range(3):
+            Sorted : torch.Tensor = torch.sort(Points[:, j].to(dtype = torch.float64))[0];
+            self.assertTrue(torch.all(Sorted >= Lower - 1e-6).item());
+            self.assertTrue(torch.all(Sorted <= Lower + 1.0/Num_Points + 1e-6).item());
+
+
+        ########################################################################
+        # A stratified grid sample with 1000 points in 3D should put one point 
+        # in each cell of a 10 x 10 x 10 grid.
+
+        Points : torch.Tensor = Stratified_Grid_Sampler(Num_Points = Num_Points, Num_Dim = 3, Device = torch.device('cpu'));
+        Cells  : torch.Tensor = torch.floor(Points*10).to(dtype = torch.int64);
+        Cell_Indices : torch.Tensor = Cells[:, 0]*100 + Cells[:, 1]*10 + Cells[:, 2];
+        self.assertEqual(torch.unique(Cell_Indices).numel(), Num_Points);
+
+
+
+    def test_Residual_Pool(self):
+        Pool : Residual_Pool = Residual_Pool(Num_Dim = 2, Capacity = 5, Num_Samples = 3, Max_Age = 1, Decay = 0.5);
+
+        Generator : torch.Generator = torch.Generator();
+        Generator.manual_seed(1234);
+
+        ########################################################################
+        # An empty pool should give no points. Next, give the pool 100 random 
+        # points whose residuals are zero except at 8 of the points. The pool 
+        # should keep the 5 (its capacity) of those 8 points with the largest 
+        # residuals.
+
+        self.assertEqual(Pool.Sample(Generator = Generator).shape[0], 0);
+
+        Points      : torch.Tensor = torch.rand((100, 2), generator = Generator);
+        Residuals   : torch.Tensor = torch.zeros(100);
+        Residuals[10:18] = 100 + torch.arange(1, 9, dtype = torch.float32);
+
+        Pool.Update(Random_Points = Points, Random_Residuals = Residuals, Sampled_Residuals = torch.empty(0));
+        self.assertEqual(Pool.Size(), 5);
+        self.assertTrue(torch.equal(torch.sort(Pool.Residuals)[0], 100 + torch.arange(4, 9, dtype = torch.float32)));
+        for k in range(5):
+            Index : int = int(Pool.Residuals[k].item()) - 100 + 9;
+            self.assertTrue(torch.equal(Pool.Points[k, :], Points[Index, :]));
+
+
+        ########################################################################
+        # Sample should draw Num_Samples distinct points from the pool. If the
+        # residual at these points decays to zero, the pool should evict them.
+
+        Sampled : torch.Tensor = Pool.Sample(Generator = Generator);
+        self.assertEqual(tuple(Sampled.shape), (3, 2));
+        self.assertEqual(torch.unique(Sampled, dim = 0).shape[0], 3);
+
+        # Half of these residuals are 0 and half are 1, so no point is 3 
+        # standard deviations above the mean.
+        Quiet : torch.Tensor = (torch.arange(100) % 2).to(dtype = torch.float32);
+        Pool.Update(Random_Points = Points, Random_Residuals = Quiet, Sampled_Residuals = torch.zeros(3));
+        self.assertEqual(Pool.Size(), 2);
+        for k in range(2):
+            self.assertFalse(torch.any(torch.all(Sampled == Pool.Points[k, :], dim = 1)).item());
+
+
+        ########################################################################
+        # The remaining points should leave once they are older than Max_Age, 
+        # even if their residual is still large.
+
+        Pool.Sample(Generator = Generator);
+        Pool.Update(Random_Points = Points, Random_Residuals = Quiet, Sampled_Residuals = torch.full((2,), 100.0));
+        self.assertEqual(Pool.Size(), 0);
+
+
+        ########################################################################
+        # Training stores the residuals on the CPU, so Update should accept 
+        # CPU residuals for a pool on another device (a GPU, when we have one), 
+        # and keep its own tensors on the pool's device.
+
+        Device  : torch.device  = torch.device('cuda') if torch.cuda.is_available() else torch.device('cpu');
+        Pool                    = Residual_Pool(Num_Dim = 2, Capacity = 5, Num_Samples = 3, Max_Age = 1, Decay = 0.5, Device = Device);
+
+        Pool.Update(Random_Points = Points.double(), Random_Residuals = Residuals.double(), Sampled_Residuals = torch.empty(0));
+        self.assertEqual(Pool.Size(), 5);
+        for Tensor in (Pool.Points, Pool.Residuals, Pool.Ages):
+            self.assertEqual(Tensor.device.type, Device.type);
+        self.assertEqual(Pool.Points.dtype,     torch.float32);
+        self.assertEqual(Pool.Residuals.dtype,  torch.float32);
+
+        Pool.Sample(Generator = Generator if Device.type == 'cpu' else None);
+        Pool.Update(Random_Points = Points, Random_Residuals = Quiet, Sampled_Residuals = torch.zeros(3));
+        self.assertEqual(Pool.Size(), 2);
+        self.assertEqual(Pool.Residuals.device.type, Device.type);
+
+
+
+    def test_Importance_Points(self):
+        Bounds = numpy.array(  [[0 , 1],
+                                [-1, 1]], dtype = numpy.float32);
+
+        Generator : torch.Generator = torch.Generator();
+        Generator.manual_seed(1234);
+
+        # Make up a residual which is large near (0.9, 0.9) and small elsewhere.
+        def Residual(X : torch.Tensor) -> torch.Tensor:
+            return 0.1 + 10*torch.exp(-50*torch.sum((X - torch.tensor([0.9, 0.9]))**2, dim = 1));
+
+        Old_Points  : torch.Tensor = Generate_Points(Bounds = Bounds, Num_Points = 5000, Generator = Generator);
+        Num_Points  : int          = 20000;
+        Points, Weights = Importance_Points(Bounds      = Bounds,
+                                            Num_Points  = Num_Points,
+                                            Old_Points  = Old_Points,
+                                            Residuals   = Residual(Old_Points),
+                                            Exponent    = 2.0,
+                                            Grid_Size   = 8,
+                                            Generator   = Generator);
+
+        ########################################################################
+        # The points should live in the rectangle, and should be concentrated
+        # near (0.9, 0.9).
+
+        self.assertEqual(tuple(Points.shape),  (Num_Points, 2));
+        self.assertEqual(tuple(Weights.shape), (Num_Points,));
+        for j in range(2):
+            self.assertTrue(torch.all(Points[:, j] >= Bounds[j, 0]).item());
+            self.assertTrue(torch.all(Points[:, j] <= Bounds[j, 1]).item());
+
+        Near : torch.Tensor = torch.sum((Points - torch.tensor([0.9, 0.9]))**2, dim = 1) < 0.1**2;
+        self.assertGreater(torch.mean(Near.to(dtype = torch.float32)).item(), 0.1);
+
+
+        ########################################################################
+        # The weighted mean of the square residual should match the mean over 
+        # uniform points (the weights make the estimate unbiased).
+
+        Uniform_Points  : torch.Tensor = Generate_Points(Bounds = Bounds, Num_Points = 200000, Generator = Generator);
+        Uniform_Mean    : float        = torch.mean(Residual(Uniform_Points)**2).item();
+        Weighted_Mean   : float        = torch.mean(Weights*Residual(Points)**2).item();
+
+        self.assertAlmostEqual(torch.mean(Weights).item(), 1.0, delta = 0.1);
+        self.assertAlmostEqual(Weighted_Mean/Uniform_Mean, 1.0, delta = 0.05);
+
+
+
+    def test_Collocation_Buffer(self):
+        Bounds = numpy.array(  [[0 , 1],
+                                [-1, 1]], dtype = numpy.float32);
+
+        Generator : torch.Generator = torch.Generator();
+        Generator.manual_seed(1234);
+
+        Buffer : Collocation_Buffer = Collocation_Buffer(   Bounds              = Bounds,
+                                                            Num_Points          = 100,
+                                                            Refresh_Fraction    = 0.3,
+                                                            Generator           = Generator);
+        Points  : torch.Tensor = Buffer.Points;
+        Old     : torch.Tensor = torch.clone(Points);
+
+        ########################################################################
+        # Each refresh should replace the 30 oldest points, in place. After 
+        # four refreshes, we have replaced 120 points, so the first 20 rows 
+        # have been replaced twice and every row has been replaced.
+
+        self.assertEqual(Buffer.Refresh(Generator = Generator), 30);
+        self.assertEqual(Buffer.Points.data_ptr(), Points.data_ptr());
+        self.assertTrue(torch.all(torch.any(Points[:30] != Old[:30], dim = 1)).item());
+        self.assertTrue(torch.equal(Points[30:], Old[30:]));
+
+        for k in range(3):
+            Buffer.Refresh(Generator = Generator);
+        self.assertTrue(torch.all(torch.any(Points != Old, dim = 1)).item());
+
+        for j in range(2):
+            self.assertTrue(torch.all(Points[:, j] >= Bounds[j, 0]).item());
+            self.assertTrue(torch.all(Points[:, j] <= Bounds[j, 1]).item());
+
+
+        ########################################################################
+        # A refresh with fraction 0 should not change anything.
+
+        Old = torch.clone(Points);
+        self.assertEqual(Buffer.Refresh(Generator = Generator, Fraction = 0.0), 0);
+        self.assertTrue(torch.equal(Points, Old));
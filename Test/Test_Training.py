@@ -0,0 +1,537 @@
+# Nonsense to add Code, Classes directories to the Python search path.
+import os
+import sys
+
+# Get path to parent directory
+parent_dir  = os.path.dirname(os.path.dirname(os.path.abspath(__file__)));
+
+# Add the Code, Classes directories to the python path.
+Code_Path       = os.path.join(parent_dir, "Code");
+Classes_Path    = os.path.join(Code_Path, "Classes");
+
+sys.path.append(Code_Path);
+sys.path.append(Classes_Path);
+
+# external libraries and stuff.
+import  numpy;
+import  torch;
+import  copy;
+import  tempfile;
+import  unittest;
+from    typing      import List, Dict, Callable;
+
+# Code files.
+from    Network                 import Network, Ensemble_Network;
+from    Derivative              import Derivative;
+from    Term                    import Term;
+from    Test_Train              import Training, Testing;
+import  Test_Train;
+from    Data                    import Iterate_Chunks;
+from    Parallel                import Find_Free_Port, Setup_Process_Group, Configure_Threads, Cleanup_Process_Group, Owned_DataSets;
+
+
+
+class Test_Training(unittest.TestCase):
+    def test_Coll_Batches(self):
+        # Set up a network, Xi, and a library for Burgers' equation.
+        U   : Network       = Network(Widths = [2, 10, 10, 1], Hidden_Activation = "Tanh");
+        Xi  : torch.Tensor  = torch.rand(2, dtype = torch.float32, requires_grad = True);
+
+        Dt  : Derivative    = Derivative(Encoding = numpy.array([1, 0]));
+        Dx  : Derivative    = Derivative(Encoding = numpy.array([0, 1]));
+        Dx2 : Derivative    = Derivative(Encoding = numpy.array([0, 2]));
+        I   : Derivative    = Derivative(Encoding = numpy.array([0, 0]));
+
+        Derivatives : List[Derivative]  = [I, Dt, Dx, Dx2];
+        LHS_Term    : Term              = Term(Derivatives = [Dt],     Powers = [1]);
+        RHS_Terms   : List[Term]        = [ Term(Derivatives = [Dx2],   Powers = [1]),
+                                            Term(Derivatives = [I, Dx], Powers = [1, 1])];
+
+        Coll_Points : torch.Tensor = torch.rand((200, 2), dtype = torch.float32);
+        Inputs      : torch.Tensor = torch.rand((50, 2),  dtype = torch.float32);
+        Targets     : torch.Tensor = torch.rand(50,       dtype = torch.float32);
+
+        Weights : Dict[str, float] = {"Data" : 1.0, "Coll" : 1.0, "Lp" : 0.1, "L2" : 0.0};
+
+
+        ########################################################################
+        # Run one epoch without batches, and one with batches of 64 points (and
+        # one step per epoch), starting from the same parameters. The two 
+        # should take the same step and give the same residuals.
+
+        Results : List[Dict] = [];
+        Params  : List[List[torch.Tensor]] = [];
+        for Coll_Batch_Size in [None, 64]:
+            U_Copy  : Network       = copy.deepcopy(U);
+            Xi_Copy : torch.Tensor  = Xi.detach().clone().requires_grad_(True);
+
+            Optimizer = torch.optim.SGD(list(U_Copy.parameters()) + [Xi_Copy], lr = 0.01);
+
+            Results.append(Training(U_List              = [U_Copy],
+                                    Xi                  = Xi_Copy,
+                                    Mask                = torch.zeros(2, dtype = torch.bool),
+                                    Coll_Points_List    = [Coll_Points.clone()],
+                                    Inputs_List         = [Inputs],
+                                    Targets_List        = [Targets],
+                                    Derivatives         = Derivatives,
+                                    LHS_Term            = LHS_Term,
+                                    RHS_Terms           = RHS_Terms,
+                                    p                   = 0.5,
+                                    Weights             = Weights,
+                                    Optimizer           = Optimizer,
+                                    Coll_Batch_Size     = Coll_Batch_Size));
+            Params.append([P.detach() for P in U_Copy.parameters()] + [Xi_Copy.detach()]);
+
+        epsilon : float = 1e-5;
+        for k in range(len(Params[0])):
+            self.assertLess(torch.max(torch.abs(Params[0][k] - Params[1][k])).item(), epsilon);
+        
+        self.assertLess(torch.max(torch.abs(Results[0]["Residuals"][0] - Results[1]["Residuals"][0])).item(), epsilon);
+        self.assertLess(abs(Results[0]["Coll Losses"][0] - Results[1]["Coll Losses"][0]), epsilon);
+        self.assertLess(abs(Results[0]["Total Losses"][0] - Results[1]["Total Losses"][0]), epsilon);
+
+
+        ########################################################################
+        # With one step per batch, we should take ceil(200/64) = 4 steps. Check
+        # that we still get a residual for every collocation point.
+
+        Optimizer   = torch.optim.SGD(list(U.parameters()) + [Xi], lr = 0.01);
+        Result      = Training( U_List              = [U],
+                                Xi                  = Xi,
+                                Mask                = torch.zeros(2, dtype = torch.bool),
+                                Coll_Points_List    = [Coll_Points],
+                                Inputs_List         = [Inputs],
+                                Targets_List        = [Targets],
+                                Derivatives         = Derivatives,
+                                LHS_Term            = LHS_Term,
+                                RHS_Terms           = RHS_Terms,
+                                p                   = 0.5,
+                                Weights             = Weights,
+                                Optimizer           = Optimizer,
+                                Coll_Batch_Size     = 64,
+                                Step_Per_Batch      = True);
+
+        self.assertEqual(Result["Residuals"][0].shape[0], 200);
+        self.assertTrue(torch.all(torch.isfinite(Result["Residuals"][0])).item());
+
+
+
+    def test_Streaming_Data(self):
+        # Set up a network, Xi, and a library for Burgers' equation.
+        U   : Network       = Network(Widths = [2, 10, 10, 1], Hidden_Activation = "Tanh");
+        Xi  : torch.Tensor  = torch.rand(2, dtype = torch.float32, requires_grad = True);
+
+        Dt  : Derivative    = Derivative(Encoding = numpy.array([1, 0]));
+        Dx  : Derivative    = Derivative(Encoding = numpy.array([0, 1]));
+        Dx2 : Derivative    = Derivative(Encoding = numpy.array([0, 2]));
+        I   : Derivative    = Derivative(Encoding = numpy.array([0, 0]));
+
+        Derivatives : List[Derivative]  = [I, Dt, Dx, Dx2];
+        LHS_Term    : Term              = Term(Derivatives = [Dt],     Powers = [1]);
+        RHS_Terms   : List[Term]        = [ Term(Derivatives = [Dx2],   Powers = [1]),
+                                            Term(Derivatives = [I, Dx], Powers = [1, 1])];
+
+        Coll_Points : torch.Tensor = torch.rand((100, 2), dtype = torch.float32);
+        Inputs      : torch.Tensor = torch.rand((250, 2), dtype = torch.float32);
+        Targets     : torch.Tensor = torch.rand(250,      dtype = torch.float32);
+
+        Weights : Dict[str, float] = {"Data" : 2.0, "Coll" : 1.0, "Lp" : 0.1, "L2" : 0.0};
+
+
+        ########################################################################
+        # Streaming the data in chunks of 64 points (with or without 
+        # prefetching) should give the same step and losses as evaluating the
+        # data loss all at once.
+
+        Results : List[Dict] = [];
+        Params  : List[List[torch.Tensor]] = [];
+        for (Data_Chunk_Size, Prefetch_Data) in [(None, False), (64, False), (64, True)]:
+            U_Copy  : Network       = copy.deepcopy(U);
+            Xi_Copy : torch.Tensor  = Xi.detach().clone().requires_grad_(True);
+
+            Optimizer = torch.optim.SGD(list(U_Copy.parameters()) + [Xi_Copy], lr = 0.01);
+
+            Arguments : Dict = {"U_List"            : [U_Copy],
+                                "Xi"                : Xi_Copy,
+                                "Mask"              : torch.zeros(2, dtype = torch.bool),
+                                "Coll_Points_List"  : [Coll_Points.clone()],
+                                "Inputs_List"       : [Inputs],
+                                "Targets_List"      : [Targets],
+                                "Derivatives"       : Derivatives,
+                                "LHS_Term"          : LHS_Term,
+                                "RHS_Terms"         : RHS_Terms,
+                                "p"                 : 0.5,
+                                "Weights"           : Weights,
+                                "Data_Chunk_Size"   : Data_Chunk_Size,
+                                "Prefetch_Data"     : Prefetch_Data};
+
+            Results.append(Training(Optimizer = Optimizer, **Arguments));
+            Results[-1]["Test"] = Testing(**Arguments);
+            Params.append([P.detach() for P in U_Copy.parameters()] + [Xi_Copy.detach()]);
+
+        epsilon : float = 1e-5;
+        for j in [1, 2]:
+            for k in range(len(Params[0])):
+                self.assertLess(torch.max(torch.abs(Params[0][k] - Params[j][k])).item(), epsilon);
+
+            self.assertLess(abs(Results[0]["Data Losses"][0]  - Results[j]["Data Losses"][0]),  epsilon);
+            self.assertLess(abs(Results[0]["Total Losses"][0] - Results[j]["Total Losses"][0]), epsilon);
+            self.assertLess(abs(Results[0]["Test"]["Data Losses"][0] - Results[j]["Test"]["Data Losses"][0]), epsilon);
+
+
+        ########################################################################
+        # Iterate_Chunks should cover every point once, in order, and should 
+        # stop its background thread if we stop early.
+
+        for Prefetch in [False, True]:
+            Chunks : List = list(Iterate_Chunks(Inputs = Inputs, Targets = Targets, Chunk_Size = 64, Prefetch = Prefetch));
+            self.assertEqual([Chunk[0].shape[0] for Chunk in Chunks], [64, 64, 64, 58]);
+            self.assertTrue(torch.equal(torch.cat([Chunk[0] for Chunk in Chunks]), Inputs));
+            self.assertTrue(torch.equal(torch.cat([Chunk[1] for Chunk in Chunks]), Targets));
+
+        for Chunk in Iterate_Chunks(Inputs = Inputs, Targets = Targets, Chunk_Size = 8, Prefetch = True):
+            break;
+
+
+
+    def test_Data_Batches(self):
+        # Set up two networks, Xi, and a library for Burgers' equation.
+        U_List  : List[Network] = [Network(Widths = [2, 10, 10, 1], Hidden_Activation = "Tanh") for k in range(2)];
+        Xi      : torch.Tensor  = torch.rand(2, dtype = torch.float32, requires_grad = True);
+
+        Dt  : Derivative    = Derivative(Encoding = numpy.array([1, 0]));
+        Dx  : Derivative    = Derivative(Encoding = numpy.array([0, 1]));
+        Dx2 : Derivative    = Derivative(Encoding = numpy.array([0, 2]));
+        I   : Derivative    = Derivative(Encoding = numpy.array([0, 0]));
+
+        Derivatives : List[Derivative]  = [I, Dt, Dx, Dx2];
+        LHS_Term    : Term              = Term(Derivatives = [Dt],     Powers = [1]);
+        RHS_Terms   : List[Term]        = [ Term(Derivatives = [Dx2],   Powers = [1]),
+                                            Term(Derivatives = [I, Dx], Powers = [1, 1])];
+
+        Coll_Points_List    : List[torch.Tensor] = [torch.rand((100, 2)), torch.rand((80, 2))];
+        Inputs_List         : List[torch.Tensor] = [torch.rand((250, 2)), torch.rand((120, 2))];
+        Targets_List        : List[torch.Tensor] = [torch.rand(250),      torch.rand(120)];
+
+        Weights : Dict[str, float] = {"Data" : 1.0, "Coll" : 1.0, "Lp" : 0.1, "L2" : 0.0};
+
+        def Run(Learning_Rate   : float,
+                Use_Ensemble    : bool                  = False,
+                Inputs_List     : List[torch.Tensor]    = Inputs_List,
+                Targets_List    : List[torch.Tensor]    = Targets_List,
+                **Options) -> Dict:
+            U_Copies    : List[Network] = copy.deepcopy(U_List);
+            Xi_Copy     : torch.Tensor  = Xi.detach().clone().requires_grad_(True);
+            Ensemble    : Ensemble_Network = Ensemble_Network(U_List = U_Copies) if Use_Ensemble else None;
+            Optimizer = torch.optim.SGD(list(U_Copies[0].parameters()) + list(U_Copies[1].parameters()) + [Xi_Copy], lr = Learning_Rate);
+
+            # Count the optimizer steps.
+            Num_Steps   : List[int] = [0];
+            Step        : Callable  = Optimizer.step;
+            def Counting_Step(Closure):
+                Num_Steps[0] += 1;
+                return Step(Closure);
+            Optimizer.step = Counting_Step;
+
+            Result : Dict = Training(   U_List              = U_Copies,
+                                        Xi                  = Xi_Copy,
+                                        Mask                = torch.zeros(2, dtype = torch.bool),
+                                        Coll_Points_List    = [Coll_Points.clone() for Coll_Points in Coll_Points_List],
+                                        Inputs_List         = Inputs_List,
+                                        Targets_List        = Targets_List,
+                                        Derivatives         = Derivatives,
+                                        LHS_Term            = LHS_Term,
+                                        RHS_Terms           = RHS_Terms,
+                                        p                   = 0.5,
+                                        Weights             = Weights,
+                                        Optimizer           = Optimizer,
+                                        Ensemble            = Ensemble,
+                                        Generator           = torch.Generator().manual_seed(0),
+                                        **Options);
+            Result["Num Steps"] = Num_Steps[0];
+            Result["Params"]    = [P.detach() for U in U_Copies for P in U.parameters()] + [Xi_Copy.detach()];
+            return Result;
+
+        epsilon : float = 1e-5;
+
+
+        ########################################################################
+        # If the batch holds every data point, we should take the same step 
+        # (and get the same losses) as without batches.
+
+        Full    : Dict = Run(Learning_Rate = 0.01);
+        One     : Dict = Run(Learning_Rate = 0.01, Data_Batch_Size = 1000);
+        self.assertEqual(One["Num Steps"], 1);
+        for k in range(len(Full["Params"])):
+            self.assertLess(torch.max(torch.abs(Full["Params"][k] - One["Params"][k])).item(), epsilon);
+        for i in range(2):
+            self.assertLess(abs(Full["Data Losses"][i] - One["Data Losses"][i]), epsilon);
+
+
+        ########################################################################
+        # With smaller batches, we should take one step per data batch (of the
+        # data set with the most batches). If the learning rate is zero, the 
+        # reported data loss should be the mean over every data point, with or
+        # without the ensemble, collocation batches, or streaming.
+
+        for Options in [{},
+                        {"Use_Ensemble" : True},
+                        {"Coll_Batch_Size" : 40, "Step_Per_Batch" : True},
+                        {"Use_Ensemble" : True, "Data_Chunk_Size" : 16}]:
+            Fixed : Dict = Run(Learning_Rate = 0.0, Data_Batch_Size = 64, **Options);
+            self.assertEqual(Fixed["Num Steps"], 4);
+            for i in range(2):
+                self.assertLess(abs(Full["Data Losses"][i] - Fixed["Data Losses"][i]), epsilon);
+                self.assertTrue(torch.all(torch.isfinite(Fixed["Residuals"][i])));
+
+
+        ########################################################################
+        # Now give the data sets different numbers of batches which do not 
+        # divide each other (250 and 150 points give 4 and 3 batches), so the 
+        # second data set's first batch gets used twice. The reported data 
+        # loss should still be the mean over every data point, and the 
+        # reported collocation loss should be the mean over every collocation
+        # point. Each epoch should also evaluate each collocation point once 
+        # (rather than once per data batch).
+
+        Uneven_Inputs   : List[torch.Tensor] = [Inputs_List[0],  torch.rand((150, 2))];
+        Uneven_Targets  : List[torch.Tensor] = [Targets_List[0], torch.rand(150)];
+        Uneven_Full     : Dict = Run(Learning_Rate = 0.0, Inputs_List = Uneven_Inputs, Targets_List = Uneven_Targets);
+
+        # Count the collocation points that Training passes to Coll_Loss.
+        Num_Coll_Points : List[int] = [0];
+        Coll_Loss       : Callable  = Test_Train.Coll_Loss;
+        def Counting_Coll_Loss(**Arguments):
+            Num_Coll_Points[0] += Arguments["Coll_Points"].shape[0];
+            return Coll_Loss(**Arguments);
+        Test_Train.Coll_Loss = Counting_Coll_Loss;
+
+        try:
+            for Options in [{}, {"Coll_Batch_Size" : 40}, {"Coll_Batch_Size" : 40, "Step_Per_Batch" : True}]:
+                Num_Coll_Points[0] = 0;
+                Uneven : Dict = Run(Learning_Rate = 0.0, Data_Batch_Size = 64, Inputs_List = Uneven_Inputs, Targets_List = Uneven_Targets, **Options);
+                self.assertEqual(Uneven["Num Steps"], 4);
+                self.assertEqual(Num_Coll_Points[0], 180);
+                for i in range(2):
+                    self.assertLess(abs(Uneven_Full["Data Losses"][i] - Uneven["Data Losses"][i]), epsilon);
+                    self.assertLess(abs(Uneven_Full["Coll Losses"][i] - Uneven["Coll Losses"][i]), epsilon);
+        finally:
+            Test_Train.Coll_Loss = Coll_Loss;
+
+
+
+    def test_Ensemble(self):
+        # Set up two networks, Xi, and a library for Burgers' equation.
+        U_List  : List[Network] = [Network(Widths = [2, 10, 10, 1], Hidden_Activation = "Rational") for k in range(2)];
+        Xi      : torch.Tensor  = torch.rand(2, dtype = torch.float32, requires_grad = True);
+
+        Dt  : Derivative    = Derivative(Encoding = numpy.array([1, 0]));
+        Dx  : Derivative    = Derivative(Encoding = numpy.array([0, 1]));
+        Dx2 : Derivative    = Derivative(Encoding = numpy.array([0, 2]));
+        I   : Derivative    = Derivative(Encoding = numpy.array([0, 0]));
+
+        Derivatives : List[Derivative]  = [I, Dt, Dx, Dx2];
+        LHS_Term    : Term              = Term(Derivatives = [Dt],     Powers = [1]);
+        RHS_Terms   : List[Term]        = [ Term(Derivatives = [Dx2],   Powers = [1]),
+                                            Term(Derivatives = [I, Dx], Powers = [1, 1])];
+
+        # Give the data sets different numbers of points (the ensemble pads 
+        # them).
+        Coll_Points_List    : List[torch.Tensor] = [torch.rand((200, 2)), torch.rand((150, 2))];
+        Inputs_List         : List[torch.Tensor] = [torch.rand((50, 2)),  torch.rand((70, 2))];
+        Targets_List        : List[torch.Tensor] = [torch.rand(50),       torch.rand(70)];
+
+        Weights : Dict[str, float] = {"Data" : 1.0, "Coll" : 1.0, "Lp" : 0.1, "L2" : 0.0};
+
+
+        ########################################################################
+        # Run one epoch with and without the ensemble (and with and without 
+        # batches), starting from the same parameters. Each should take the
+        # same step and give the same losses and residuals.
+
+        Results : List[Dict] = [];
+        Params  : List[List[torch.Tensor]] = [];
+        for (Use_Ensemble, Coll_Batch_Size) in [(False, None), (True, None), (True, 64)]:
+            U_Copies    : List[Network] = copy.deepcopy(U_List);
+            Xi_Copy     : torch.Tensor  = Xi.detach().clone().requires_grad_(True);
+            Ensemble    : Ensemble_Network = Ensemble_Network(U_List = U_Copies) if Use_Ensemble else None;
+
+            Optimizer = torch.optim.SGD(list(U_Copies[0].parameters()) + list(U_Copies[1].parameters()) + [Xi_Copy], lr = 0.01);
+
+            Results.append(Training(U_List              = U_Copies,
+                                    Xi                  = Xi_Copy,
+                                    Mask                = torch.zeros(2, dtype = torch.bool),
+                                    Coll_Points_List    = [Coll_Points.clone() for Coll_Points in Coll_Points_List],
+                                    Inputs_List         = Inputs_List,
+                                    Targets_List        = Targets_List,
+                                    Derivatives         = Derivatives,
+                                    LHS_Term            = LHS_Term,
+                                    RHS_Terms           = RHS_Terms,
+                                    p                   = 0.5,
+                                    Weights             = Weights,
+                                    Optimizer           = Optimizer,
+                                    Coll_Batch_Size     = Coll_Batch_Size,
+                                    Ensemble            = Ensemble));
+            Params.append([P.detach() for P in U_Copies[0].parameters()] + [P.detach() for P in U_Copies[1].parameters()] + [Xi_Copy.detach()]);
+
+        epsilon : float = 1e-5;
+        for r in range(1, 3):
+            for k in range(len(Params[0])):
+                self.assertLess(torch.max(torch.abs(Params[0][k] - Params[r][k])).item(), epsilon);
+
+            for i in range(2):
+                self.assertEqual(Results[r]["Residuals"][i].shape, Results[0]["Residuals"][i].shape);
+                self.assertLess(torch.max(torch.abs(Results[0]["Residuals"][i] - Results[r]["Residuals"][i])).item(), epsilon);
+                self.assertLess(abs(Results[0]["Coll Losses"][i] - Results[r]["Coll Losses"][i]), epsilon);
+                self.assertLess(abs(Results[0]["Data Losses"][i] - Results[r]["Data Losses"][i]), epsilon);
+
+
+
+    def test_Distributed(self):
+        # Train two networks (and Xi) for a few epochs using Adam in this 
+        # process, then do the same with two worker processes (each of which
+        # owns one network). Both should give the same parameters. The data 
+        # sets have different numbers of points, so with batches, one worker 
+        # has fewer batches than the other (it should still take the same 
+        # number of steps).
+        for Options in [{}, {"Coll_Batch_Size" : 64, "Step_Per_Batch" : True}]:
+            Problem : Dict = _Setup_Problem();
+            Params  : List[torch.Tensor] = [];
+            for U in Problem["U List"]:
+                Params = Params + list(U.parameters());
+            Optimizer = torch.optim.Adam(Params + [Problem["Xi"]], lr = 0.01);
+
+            for t in range(3):
+                Training(   U_List              = Problem["U List"],
+                            Xi                  = Problem["Xi"],
+                            Mask                = torch.zeros(2, dtype = torch.bool),
+                            Coll_Points_List    = Problem["Coll Points List"],
+                            Inputs_List         = Problem["Inputs List"],
+                            Targets_List        = Problem["Targets List"],
+                            Derivatives         = Problem["Derivatives"],
+                            LHS_Term            = Problem["LHS Term"],
+                            RHS_Terms           = Problem["RHS Terms"],
+                            p                   = 0.5,
+                            Weights             = Problem["Weights"],
+                            Optimizer           = Optimizer,
+                            **Options);
+
+            Worker_Results : List[Dict] = _Run_Workers(Options);
+
+            epsilon : float = 1e-5;
+            for Rank in range(2):
+                # Each worker should have the same Xi as this process.
+                self.assertLess(torch.max(torch.abs(Worker_Results[Rank]["Xi"] - Problem["Xi"].detach())).item(), epsilon);
+
+                # The worker's network should match the corresponding network here.
+                U_Params : List[torch.Tensor] = [P.detach() for P in Problem["U List"][Rank].parameters()];
+                for k in range(len(U_Params)):
+                    self.assertLess(torch.max(torch.abs(Worker_Results[Rank]["U Params"][k] - U_Params[k])).item(), epsilon);
+
+        # With data batches, the data sets have different numbers of batches
+        # (4 and 5). Each worker shuffles its own data, so we can not compare
+        # to this process, but the workers should finish and agree on Xi.
+        Worker_Results : List[Dict] = _Run_Workers({"Data_Batch_Size" : 16});
+        self.assertTrue(torch.equal(Worker_Results[0]["Xi"], Worker_Results[1]["Xi"]));
+
+
+
+    def test_Configure_Threads(self):
+        # Set the number of intra-op threads, and pin this process to the 
+        # cores it can already use. Then check that torch and the OS agree.
+        Num_Threads : int = torch.get_num_threads();
+
+        Affinity : List[int] = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else None;
+        Configure_Threads(Intra_Threads = 2, Inter_Threads = None, Affinity = Affinity);
+        self.assertEqual(torch.get_num_threads(), 2);
+        if(Affinity is not None):
+            self.assertEqual(sorted(os.sched_getaffinity(0)), Affinity);
+
+        # Restore the default.
+        torch.set_num_threads(Num_Threads);
+
+
+
+def _Setup_Problem() -> Dict:
+    """
+    This function sets up two networks, Xi, and a library for Burgers' 
+    equation, along with collocation and data points for two data sets. We 
+    seed torch's generator, so every call returns the same problem.
+    """
+
+    torch.manual_seed(0);
+
+    Dt  : Derivative    = Derivative(Encoding = numpy.array([1, 0]));
+    Dx  : Derivative    = Derivative(Encoding = numpy.array([0, 1]));
+    Dx2 : Derivative    = Derivative(Encoding = numpy.array([0, 2]));
+    I   : Derivative    = Derivative(Encoding = numpy.array([0, 0]));
+
+    return {"U List"            : [Network(Widths = [2, 10, 10, 1], Hidden_Activation = "Tanh") for k in range(2)],
+            "Xi"                : torch.rand(2, dtype = torch.float32, requires_grad = True),
+            "Derivatives"       : [I, Dt, Dx, Dx2],
+            "LHS Term"          : Term(Derivatives = [Dt], Powers = [1]),
+            "RHS Terms"         : [Term(Derivatives = [Dx2], Powers = [1]), Term(Derivatives = [I, Dx], Powers = [1, 1])],
+            "Coll Points List"  : [torch.rand((200, 2)), torch.rand((150, 2))],
+            "Inputs List"       : [torch.rand((50, 2)),  torch.rand((70, 2))],
+            "Targets List"      : [torch.rand(50),       torch.rand(70)],
+            "Weights"           : {"Data" : 1.0, "Coll" : 1.0, "Lp" : 0.1, "L2" : 0.0}};
+
+
+
+def _Run_Workers(Options : Dict) -> List[Dict]:
+    """
+    This function spawns two worker processes (see _Distributed_Worker), 
+    passing Options to Training, and returns each worker's results.
+    """
+
+    with tempfile.TemporaryDirectory() as Out_Dir:
+        torch.multiprocessing.spawn(_Distributed_Worker, 
+                                    args    = (2, Find_Free_Port(), Out_Dir, Options), 
+                                    nprocs  = 2);
+        return [torch.load(os.path.join(Out_Dir, "%u.pt" % Rank)) for Rank in range(2)];
+
+
+
+def _Distributed_Worker(Rank        : int, 
+                        World_Size  : int, 
+                        Port        : int, 
+                        Out_Dir     : str,
+                        Options     : Dict) -> None:
+    """
+    This function runs in each worker process of test_Distributed. It trains
+    the networks for the data sets it owns (and Xi) for a few epochs, then 
+    saves the results to Out_Dir. We pass Options to Training.
+    """
+
+    Setup_Process_Group(Rank = Rank, World_Size = World_Size, Port = Port);
+    Configure_Threads(Intra_Threads = None, Inter_Threads = None, Affinity = None, Rank = Rank, World_Size = World_Size);
+
+    Problem : Dict      = _Setup_Problem();
+    Owned   : List[int] = Owned_DataSets(Num_DataSets = 2, Rank = Rank, World_Size = World_Size);
+
+    U_List  : List[Network] = [Problem["U List"][i] for i in Owned];
+    Params  : List[torch.Tensor] = [];
+    for U in U_List:
+        Params = Params + list(U.parameters());
+    Optimizer = torch.optim.Adam(Params + [Problem["Xi"]], lr = 0.01);
+
+    for t in range(3):
+        Training(   U_List              = U_List,
+                    Xi                  = Problem["Xi"],
+                    Mask                = torch.zeros(2, dtype = torch.bool),
+                    Coll_Points_List    = [Problem["Coll Points List"][i]   for i in Owned],
+                    Inputs_List         = [Problem["Inputs List"][i]        for i in Owned],
+                    Targets_List        = [Problem["Targets List"][i]       for i in Owned],
+                    Derivatives         = Problem["Derivatives"],
+                    LHS_Term            = Problem["LHS Term"],
+                    RHS_Terms           = Problem["RHS Terms"],
+                    p                   = 0.5,
+                    Weights             = Problem["Weights"],
+                    Optimizer           = Optimizer,
+                    **Options);
+
+    torch.save({"Xi"        : Problem["Xi"].detach(),
+                "U Params"  : [P.detach() for P in U_List[0].parameters()]},
+                os.path.join(Out_Dir, "%u.pt" % Rank));
+
+    Cleanup_Process_Group();